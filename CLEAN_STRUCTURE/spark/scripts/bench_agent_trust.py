@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark AgentTrustEngine permission checks.
+
+Compares the nested-dict policy walk check_permission used to do with the
+compiled per-(agent, resource) action bitmasks, and verifies both give the
+same answer for every agent/resource/action combination.
+
+Usage: python bench_agent_trust.py [checks]   (default: 1000000)
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services"))
+
+from agent_trust_engine import AgentTrustEngine, TrustLevel
+
+RESOURCES = ["filesystem", "chaos", "context", "media", "permissions", "custom"]
+ACTIONS = ["read", "write", "delete", "create", "update", "clear", "register", "execute"]
+
+def legacy_check(engine: AgentTrustEngine, agent_id: str, resource: str, action: str) -> bool:
+    """check_permission as it was before policies were compiled."""
+    agent_data = engine._trust_registry.get(agent_id)
+    if not agent_data:
+        return False
+    custom_policies = agent_data.get("custom_policies", {})
+    if resource in custom_policies:
+        return custom_policies[resource].get(action, False)
+    default_policy = engine._default_policies.get(agent_data["trust_level"], {})
+    return default_policy.get(resource, {}).get(action, False)
+
+def rate(check, calls, checks: int) -> float:
+    start = time.perf_counter()
+    for i in range(checks):
+        check(*calls[i % len(calls)])
+    return checks / (time.perf_counter() - start)
+
+def main(checks: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = AgentTrustEngine(os.path.join(tmp, "agent_trust.json"))
+        agents = []
+        for i, level in enumerate(TrustLevel):
+            agent_id = engine.register_agent({"name": f"bench-{i}", "type": "bench"}, level)
+            agents.append(agent_id)
+        engine.set_custom_policy(agents[2], "chaos", "delete", True)
+        engine.set_custom_policy(agents[3], "custom", "execute", True)
+
+        calls = [(a, r, act) for a in agents + ["missing"] for r in RESOURCES for act in ACTIONS]
+        mismatches = [c for c in calls if legacy_check(engine, *c) != engine.check_permission(*c)]
+
+        legacy = rate(lambda *c: legacy_check(engine, *c), calls, checks)
+        compiled = rate(engine.check_permission, calls, checks)
+        enforce = rate(lambda a, r, act: engine._enforce(a, r, act), calls, min(checks, 200000))
+        engine.flush_access_log()
+
+    print(f"legacy nested-dict checks   {legacy:12,.0f}/s")
+    print(f"compiled bitmask checks     {compiled:12,.0f}/s  (x{compiled / legacy:.1f})")
+    print(f"enforce_* incl. access log  {enforce:12,.0f}/s")
+    print(f"{'ok' if not mismatches else 'FAIL'} {len(calls)} combinations agree"
+          + (f", {len(mismatches)} differ: {mismatches[:3]}" if mismatches else ""))
+    return 0 if not mismatches else 1
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming CHAOS parser on synthetic documents.
+
+Usage: python bench_chaos_parser.py [size_mb ...]   (default: 1 100)
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services"))
+
+from chaos.parser import ChaosParser
+
+EMOTIONS = ["JOY", "GRIEF", "AWE", "FEAR", "LOVE", "RAGE"]
+INTENSITIES = ["EXTREME", "HIGH", "MEDIUM", "LOW", "MINIMAL"]
+SYMBOLS = ["FIRE", "WATER", "EARTH", "AIR", "SEED", "MIRROR"]
+PRESENCES = ["STRONG", "PRESENT", "WEAK"]
+WORDS = "eden chaos order creation the a of light dark memory river becomes".split()
+
+def write_synthetic(path: str, size_bytes: int, seed: int = 7):
+    """Write a CHAOS document of roughly size_bytes, mostly chaosfield text."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[TITLE]: synthetic\n[AUTHOR]: bench\n---EMOTIVE_LAYER---\n")
+        for _ in range(200):
+            f.write(f"[EMOTION:{rng.choice(EMOTIONS)}:{rng.choice(INTENSITIES)}]\n")
+            f.write(f"[SYMBOL:{rng.choice(SYMBOLS)}:{rng.choice(PRESENCES)}]\n")
+            f.write(f"[RELATIONSHIP:{rng.choice(SYMBOLS)}:FEEDS:{rng.choice(EMOTIONS)}]\n")
+        f.write("---CHAOSFIELD_LAYER---\n")
+        line = " ".join(rng.choice(WORDS) for _ in range(12)) + "\n"
+        while f.tell() < size_bytes:
+            f.write(line * 1000)
+
+def bench(size_mb: float):
+    parser = ChaosParser()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.chaos")
+        write_synthetic(path, int(size_mb * 1024 * 1024))
+        actual_mb = os.path.getsize(path) / (1024 * 1024)
+
+        start = time.perf_counter()
+        parsed = parser.parse_file(path)
+        stream_s = time.perf_counter() - start
+
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        start = time.perf_counter()
+        parser.parse(content)
+        string_s = time.perf_counter() - start
+
+    emotive = parsed["emotive_layer"]
+    print(f"{actual_mb:8.1f} MB  parse_file {stream_s:7.3f}s ({actual_mb / stream_s:6.1f} MB/s)  "
+          f"parse(str) {string_s:7.3f}s ({actual_mb / string_s:6.1f} MB/s)  "
+          f"tags={len(emotive['emotions']) + len(emotive['symbols']) + len(emotive['relationships'])}")
+
+if __name__ == "__main__":
+    sizes = [float(arg) for arg in sys.argv[1:]] or [1, 100]
+    for size in sizes:
+        bench(size)
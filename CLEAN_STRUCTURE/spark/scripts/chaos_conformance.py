@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+CHAOS parser conformance and performance check.
+
+Every chaos_golden/<case>.chaos is parsed through each entry point of the
+shared parser (string, line stream, file, ChaosParser) and compared with
+chaos_golden/<case>.json. A scaling check then makes sure parse time stays
+linear in chaosfield size.
+
+--update regenerates the golden JSON from the parser under test, except for
+the HAND_WRITTEN cases, whose expected output was written by hand against
+the original parsers and must not follow the parser's current behaviour.
+
+Usage: python chaos_conformance.py [--update]
+"""
+
+import glob
+import io
+import json
+import os
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_DIR = os.path.join(SCRIPTS_DIR, "chaos_golden")
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, "..", "services"))
+HAND_WRITTEN = {"marker_json_line", "emotive_open_brace"}
+
+from chaos.parser import ChaosParser
+from chaos.tokenizer import parse_document
+
+def entry_points(path: str):
+    """Parse one file through every public entry point."""
+    parser = ChaosParser()
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    with open(path, "r", encoding="utf-8") as f:
+        from_file_iter = parse_document(f)
+
+    return {
+        "parse_document(str)": parse_document(content),
+        "parse_document(stream)": parse_document(io.StringIO(content)),
+        "parse_document(file)": from_file_iter,
+        "ChaosParser.parse": parser.parse(content),
+        "ChaosParser.parse_file": parser.parse_file(path)
+    }
+
+def check_golden(update: bool = False) -> int:
+    failures = 0
+    for path in sorted(glob.glob(os.path.join(GOLDEN_DIR, "*.chaos"))):
+        golden_path = path[:-len(".chaos")] + ".json"
+        results = entry_points(path)
+        name = os.path.basename(path)
+
+        if update:
+            if name[:-len(".chaos")] in HAND_WRITTEN:
+                print(f"kept     {name} (hand-written)")
+                continue
+            with open(golden_path, "w", encoding="utf-8") as f:
+                json.dump(results["parse_document(str)"], f, indent=2, ensure_ascii=False)
+                f.write("\n")
+            print(f"updated  {name}")
+            continue
+
+        with open(golden_path, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+
+        bad = [entry for entry, result in results.items() if result != expected]
+        if bad:
+            failures += 1
+            print(f"FAIL     {name}: {', '.join(bad)}")
+        else:
+            print(f"ok       {name}")
+    return failures
+
+def check_scaling(base_lines: int = 20000, factor: int = 8) -> int:
+    """Fail if parse time grows clearly faster than input size."""
+    def timed(lines: int) -> float:
+        doc = "[TITLE]: scale\n---CHAOSFIELD_LAYER---\n" + "the river remembers the fire\n" * lines
+        start = time.perf_counter()
+        parse_document(doc)
+        return time.perf_counter() - start
+
+    small = min(timed(base_lines) for _ in range(3))
+    large = min(timed(base_lines * factor) for _ in range(3))
+    ratio = large / small if small else 0.0
+    ok = ratio < factor * 2
+    print(f"{'ok' if ok else 'FAIL':<8} scaling x{factor} input -> x{ratio:.1f} time "
+          f"({small * 1000:.1f} ms -> {large * 1000:.1f} ms)")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    update = "--update" in sys.argv[1:]
+    failures = check_golden(update)
+    if not update:
+        failures += check_scaling()
+    sys.exit(1 if failures else 0)
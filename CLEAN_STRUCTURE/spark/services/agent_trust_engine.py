@@ -4,13 +4,37 @@ EdenOS MCP Server Hub - Agent Trust Engine
 Manages agent trust levels and enforces access controls.
 """
 
+import atexit
 import json
 import os
 import time
 import hashlib
+import threading
+from collections import deque
+from itertools import islice
 from typing import Dict, Any, List, Optional
 from enum import Enum
 from permissions_engine import permissions_engine
+from rate_limiter import RateLimiter
+
+# Access log entries kept in memory per agent
+ACCESS_LOG_SIZE = 1000
+
+# Action bits for compiled policy masks; actions first seen in custom
+# policies are given the next free bit
+ACTION_BITS = {
+    "read": 1 << 0,
+    "write": 1 << 1,
+    "delete": 1 << 2,
+    "create": 1 << 3,
+    "update": 1 << 4,
+    "clear": 1 << 5,
+    "register": 1 << 6
+}
+
+# Memoized decisions are dropped wholesale past this many entries
+DECISION_CACHE_SIZE = 65536
+_MISS = object()
 
 class TrustLevel(Enum):
     """Agent trust levels."""
@@ -24,13 +48,32 @@ class TrustLevel(Enum):
 class AgentTrustEngine:
     """Manages agent trust levels and enforces access controls."""
     
-    def __init__(self, trust_file: str = "agent_trust.json"):
+    def __init__(self, trust_file: str = "agent_trust.json", access_flush_interval: float = 2.0):
         self.trust_file = trust_file
         self.hub = None  # Nerve hook
         
         # Trust registry
         self._trust_registry: Dict[str, Dict[str, Any]] = {}
         
+        # Access logs: per-agent ring buffers, persisted to an append-only
+        # JSON-lines file flushed at most every access_flush_interval seconds
+        self.access_log_file = os.path.splitext(trust_file)[0] + "_access.log"
+        self.access_flush_interval = access_flush_interval
+        self._access_logs: Dict[str, deque] = {}
+        self._access_pending: List[str] = []
+        self._access_lock = threading.Lock()
+        self._access_timer: Optional[threading.Timer] = None
+        self._access_log_lines = 0
+        atexit.register(self.flush_access_log)
+        
+        # Decision cache: (agent, resource, action, normalized path) -> denial
+        # reason or None, valid for one (trust, permissions) policy generation
+        self.policy_generation = 0
+        self._decisions: Dict[tuple, Optional[str]] = {}
+        self._decisions_generation = None
+        self._decision_hits = 0
+        self._decision_misses = 0
+        
         # Default trust policies
         self._default_policies = {
             TrustLevel.UNKNOWN: {
@@ -77,6 +120,31 @@ class AgentTrustEngine:
             }
         }
         
+        # Rate limits: trust level -> resource class -> (tokens per second,
+        # burst) or None for unlimited. "intent" covers messages agents send
+        # through the event gateway, "batch" tools that work through many
+        # files per call; other classes name the resource a tool touches,
+        # falling back to "*"
+        self._rate_limits = {
+            TrustLevel.UNKNOWN: {"intent": (1, 5), "batch": (0.1, 1), "*": (2, 10)},
+            TrustLevel.UNTRUSTED: {"intent": (0.2, 1), "batch": (0.02, 1), "*": (0.5, 2)},
+            TrustLevel.LIMITED: {"intent": (5, 20), "batch": (0.5, 2), "*": (10, 30)},
+            TrustLevel.TRUSTED: {"intent": (20, 50), "batch": (2, 5), "*": (50, 100)},
+            TrustLevel.PRIVILEGED: {"intent": (100, 200), "batch": (10, 20), "*": (200, 400)},
+            TrustLevel.SYSTEM: {"*": None}
+        }
+        # Unregistered callers share one bucket per assumed trust level
+        self._anonymous_ids = {f"~{level.value}": level for level in TrustLevel}
+        self.rate_limiter = RateLimiter(self._rate_limit_for)
+        
+        # Compiled policies: agent_id -> resource -> action bitmask
+        self._action_bits = dict(ACTION_BITS)
+        self._level_masks = {
+            level: {resource: self._compile_actions(actions) for resource, actions in policy.items()}
+            for level, policy in self._default_policies.items()
+        }
+        self._policy_masks: Dict[str, Dict[str, int]] = {}
+        
         # Load existing trust registry
         self._load_trust_registry()
     
@@ -111,14 +179,92 @@ class AgentTrustEngine:
                 self._trust_registry = data.get("agents", {})
                 
                 # Convert string trust levels back to enums
+                migrated = False
                 for agent_id, agent_data in self._trust_registry.items():
                     if "trust_level" in agent_data:
                         agent_data["trust_level"] = TrustLevel(agent_data["trust_level"])
+                    # Older registries kept access logs inline
+                    legacy_log = agent_data.pop("access_log", None)
+                    self._access_logs[agent_id] = deque(legacy_log or [], maxlen=ACCESS_LOG_SIZE)
+                    migrated = migrated or bool(legacy_log)
+                
+                self._policy_changed()
+                self._load_access_log()
+                if migrated:
+                    self._compact_access_log()
+                    self._save_trust_registry()
                         
         except Exception as e:
             print(f"[AgentTrustEngine] Failed to load trust registry: {e}")
             self._trust_registry = {}
     
+    def _load_access_log(self):
+        """Refill the per-agent ring buffers from the access log file."""
+        try:
+            if not os.path.exists(self.access_log_file):
+                return
+            with open(self.access_log_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    self._access_log_lines += 1
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    access_log = self._access_logs.get(entry.pop("agent_id", None))
+                    if access_log is not None:
+                        access_log.append(entry)
+        except Exception as e:
+            print(f"[AgentTrustEngine] Failed to load access log: {e}")
+    
+    def _append_access(self, agent_id: str, entry: Dict[str, Any]):
+        """Record an access log entry in memory and queue it for the log file."""
+        line = json.dumps({"agent_id": agent_id, **entry}, separators=(",", ":"), default=str)
+        with self._access_lock:
+            self._access_logs.setdefault(agent_id, deque(maxlen=ACCESS_LOG_SIZE)).append(entry)
+            self._access_pending.append(line)
+            if self._access_timer is None:
+                self._access_timer = threading.Timer(self.access_flush_interval, self.flush_access_log)
+                self._access_timer.daemon = True
+                self._access_timer.start()
+    
+    def flush_access_log(self) -> bool:
+        """Append queued access log entries to the access log file."""
+        with self._access_lock:
+            if self._access_timer is not None:
+                self._access_timer.cancel()
+                self._access_timer = None
+            pending, self._access_pending = self._access_pending, []
+            if not pending:
+                return True
+            
+            try:
+                # Rewrite from the ring buffers once the file holds mostly trimmed entries
+                if self._access_log_lines + len(pending) > 2 * ACCESS_LOG_SIZE * max(1, len(self._access_logs)):
+                    return self._compact_access_log()
+                with open(self.access_log_file, "a", encoding="utf-8") as f:
+                    f.write("\n".join(pending) + "\n")
+                self._access_log_lines += len(pending)
+                return True
+            except Exception as e:
+                print(f"[AgentTrustEngine] Failed to write access log: {e}")
+                # Keep the entries queued for the next flush
+                self._access_pending[:0] = pending
+                return False
+    
+    def _compact_access_log(self) -> bool:
+        # Called with _access_lock held, which also guards _access_logs
+        lines = [
+            json.dumps({"agent_id": agent_id, **entry}, separators=(",", ":"), default=str)
+            for agent_id, access_log in list(self._access_logs.items()) if agent_id in self._trust_registry
+            for entry in list(access_log)
+        ]
+        tmp_path = f"{self.access_log_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+        os.replace(tmp_path, self.access_log_file)
+        self._access_log_lines = len(lines)
+        return True
+    
     def _save_trust_registry(self) -> bool:
         """Save trust registry to file."""
         try:
@@ -160,9 +306,11 @@ class AgentTrustEngine:
             "trust_level": initial_trust,
             "created_at": time.time(),
             "updated_at": time.time(),
-            "access_log": [],
             "custom_policies": {}
         }
+        with self._access_lock:
+            self._access_logs[agent_id] = deque(maxlen=ACCESS_LOG_SIZE)
+        self._policy_changed(agent_id)
         
         # Emit agent registered event
         if self.hub:
@@ -184,9 +332,10 @@ class AgentTrustEngine:
         old_level = self._trust_registry[agent_id]["trust_level"]
         self._trust_registry[agent_id]["trust_level"] = trust_level
         self._trust_registry[agent_id]["updated_at"] = time.time()
+        self._policy_changed(agent_id)
         
         # Log trust level change
-        self._trust_registry[agent_id]["access_log"].append({
+        self._append_access(agent_id, {
             "timestamp": time.time(),
             "event": "trust_level_changed",
             "old_level": old_level.value,
@@ -227,24 +376,121 @@ class AgentTrustEngine:
         
         return agents
     
-    def check_permission(self, agent_id: str, resource: str, action: str) -> bool:
-        """Check if agent has permission for resource/action."""
+    def _compile_actions(self, actions: Dict[str, bool]) -> int:
+        """Fold an {action: allowed} policy into a bitmask."""
+        mask = 0
+        for action, allowed in actions.items():
+            if allowed:
+                bit = self._action_bits.get(action)
+                if bit is None:
+                    bit = self._action_bits[action] = 1 << len(self._action_bits)
+                mask |= bit
+        return mask
+    
+    def _compile_agent(self, agent_id: str):
+        """Recompile one agent's resource masks from its level and custom policies."""
         agent_data = self._trust_registry.get(agent_id)
         if not agent_data:
-            return False
-        
-        trust_level = agent_data["trust_level"]
-        
-        # Check custom policies first
-        custom_policies = agent_data.get("custom_policies", {})
-        if resource in custom_policies:
-            return custom_policies[resource].get(action, False)
+            self._policy_masks.pop(agent_id, None)
+            return
         
-        # Fall back to default policies
-        default_policy = self._default_policies.get(trust_level, {})
-        resource_policy = default_policy.get(resource, {})
+        masks = dict(self._level_masks.get(agent_data["trust_level"], {}))
+        # A custom policy replaces the default policy for its whole resource
+        for resource, actions in agent_data.get("custom_policies", {}).items():
+            masks[resource] = self._compile_actions(actions)
+        self._policy_masks[agent_id] = masks
+    
+    def _policy_changed(self, agent_id: Optional[str] = None):
+        """Recompile policies (one agent, or all) and invalidate cached decisions."""
+        if agent_id is None:
+            self._policy_masks = {}
+            for known_id in self._trust_registry:
+                self._compile_agent(known_id)
+        else:
+            self._compile_agent(agent_id)
+        self.rate_limiter.reset(agent_id)
+        self.policy_generation += 1
+    
+    def check_permission(self, agent_id: str, resource: str, action: str) -> bool:
+        """Check if agent has permission for resource/action."""
+        masks = self._policy_masks.get(agent_id)
+        return masks is not None and bool(masks.get(resource, 0) & self._action_bits.get(action, 0))
+    
+    def _decide(self, agent_id: str, resource: str, action: str, path: Optional[str] = None) -> Optional[str]:
+        """Denial reason for an access, or None if allowed.
+        
+        path is a normalized filesystem path to check against the
+        permissions engine as well ("" for a missing path), or None for
+        resource-only checks.
+        """
+        generation = (self.policy_generation, permissions_engine.policy_generation)
+        if self._decisions_generation != generation:
+            self._decisions.clear()
+            self._decisions_generation = generation
+        
+        key = (agent_id, resource, action, path)
+        reason = self._decisions.get(key, _MISS)
+        if reason is not _MISS:
+            self._decision_hits += 1
+            return reason
+        
+        self._decision_misses += 1
+        if not self.check_permission(agent_id, resource, action):
+            reason = "Permission denied"
+        elif path is not None and not permissions_engine.is_path_allowed(path, action):
+            reason = "Path not allowed"
+        else:
+            reason = None
+        
+        if len(self._decisions) >= DECISION_CACHE_SIZE:
+            self._decisions.clear()
+        self._decisions[key] = reason
+        return reason
+    
+    def get_decision_cache_stats(self) -> Dict[str, Any]:
+        """Decision cache hit/miss counters."""
+        lookups = self._decision_hits + self._decision_misses
+        return {
+            "hits": self._decision_hits,
+            "misses": self._decision_misses,
+            "hit_rate": self._decision_hits / lookups if lookups else 0.0,
+            "entries": len(self._decisions),
+            "generation": self.policy_generation
+        }
+    
+    def _rate_limit_for(self, agent_id: str, resource_class: str):
+        agent_data = self._trust_registry.get(agent_id)
+        if agent_data:
+            level = agent_data["trust_level"]
+        else:
+            # Also covers an agent unregistered since check_rate_limit saw it
+            level = self._anonymous_ids.get(agent_id, TrustLevel.UNKNOWN)
+        limits = self._rate_limits.get(level, {})
+        return limits.get(resource_class, limits.get("*"))
+    
+    def check_rate_limit(self, agent_id: str, resource_class: str,
+                         default_level: TrustLevel = TrustLevel.UNKNOWN) -> float:
+        """Take a rate-limit token; returns 0.0 if allowed, else seconds to retry after.
         
-        return resource_policy.get(action, False)
+        Agents not in the registry are limited as default_level, all
+        sharing one bucket, so made-up ids cannot mint fresh buckets.
+        """
+        if agent_id not in self._trust_registry:
+            agent_id = f"~{default_level.value}"
+        return self.rate_limiter.acquire(agent_id, resource_class)
+    
+    def set_rate_limit(self, trust_level: TrustLevel, resource_class: str, rate: float = None, burst: float = None) -> bool:
+        """Set a trust level's limit for a resource class ("*" for the default); no rate means unlimited."""
+        if rate is not None and (rate <= 0 or (burst is not None and burst < 1)):
+            return False
+        self._rate_limits.setdefault(trust_level, {})[resource_class] = \
+            None if rate is None else (rate, burst if burst is not None else max(1.0, rate))
+        self.rate_limiter.reset()
+        return True
+    
+    def get_rate_limit_stats(self) -> Dict[str, Any]:
+        """Allowed/rejected counters from the rate limiter."""
+        return self.rate_limiter.get_stats()
     
     def set_custom_policy(self, agent_id: str, resource: str, action: str, allowed: bool) -> bool:
         """Set custom policy for an agent."""
@@ -257,6 +503,7 @@ class AgentTrustEngine:
         
         custom_policies[resource][action] = allowed
         self._trust_registry[agent_id]["updated_at"] = time.time()
+        self._policy_changed(agent_id)
         
         return self._save_trust_registry()
     
@@ -281,6 +528,7 @@ class AgentTrustEngine:
                     del custom_policies[resource]
             
             self._trust_registry[agent_id]["updated_at"] = time.time()
+            self._policy_changed(agent_id)
             return self._save_trust_registry()
         
         return False
@@ -299,23 +547,17 @@ class AgentTrustEngine:
             "details": details
         }
         
-        self._trust_registry[agent_id]["access_log"].append(log_entry)
-        
-        # Keep only last 1000 log entries per agent
-        if len(self._trust_registry[agent_id]["access_log"]) > 1000:
-            self._trust_registry[agent_id]["access_log"] = self._trust_registry[agent_id]["access_log"][-1000:]
-        
-        # Save periodically (every 10 accesses)
-        if len(self._trust_registry[agent_id]["access_log"]) % 10 == 0:
-            self._save_trust_registry()
+        self._append_access(agent_id, log_entry)
     
     def get_access_log(self, agent_id: str, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get access log for an agent."""
-        if agent_id not in self._trust_registry:
+        """Get access log for an agent (oldest first, at most limit entries)."""
+        if agent_id not in self._trust_registry or limit <= 0:
             return []
         
-        access_log = self._trust_registry[agent_id].get("access_log", [])
-        return access_log[-limit:]
+        with self._access_lock:
+            recent = list(islice(reversed(self._access_logs.get(agent_id, ())), limit))
+        recent.reverse()
+        return recent
     
     def revoke_agent(self, agent_id: str, reason: str = None) -> bool:
         """Revoke agent access (set to UNTRUSTED)."""
@@ -327,6 +569,9 @@ class AgentTrustEngine:
             return False
         
         del self._trust_registry[agent_id]
+        with self._access_lock:
+            self._access_logs.pop(agent_id, None)
+        self._policy_changed(agent_id)
         return self._save_trust_registry()
     
     def get_trust_statistics(self) -> Dict[str, Any]:
@@ -352,59 +597,46 @@ class AgentTrustEngine:
                 })
             
             # Count total access attempts
-            stats["access_attempts"] += len(agent_data.get("access_log", []))
+            stats["access_attempts"] += len(self._access_logs.get(agent_data.get("agent_id"), ()))
         
         return stats
     
     def enforce_filesystem_access(self, agent_id: str, path: str, action: str) -> bool:
         """Enforce filesystem access for agent."""
-        if not self.check_permission(agent_id, "filesystem", action):
-            self.log_access(agent_id, "filesystem", action, path, False, "Permission denied")
-            return False
-        
-        # Also check permissions engine
-        if not permissions_engine.is_path_allowed(path, action):
-            self.log_access(agent_id, "filesystem", action, path, False, "Path not allowed")
+        # Trust policy and permissions engine path check, as one cached decision
+        reason = self._decide(agent_id, "filesystem", action, os.path.abspath(path) if path else "")
+        if reason:
+            self.log_access(agent_id, "filesystem", action, path, False, reason)
             return False
         
         self.log_access(agent_id, "filesystem", action, path, True)
         return True
     
-    def enforce_chaos_access(self, agent_id: str, action: str, filename: str = None) -> bool:
-        """Enforce CHAOS access for agent."""
-        if not self.check_permission(agent_id, "chaos", action):
-            self.log_access(agent_id, "chaos", action, filename, False, "Permission denied")
+    def _enforce(self, agent_id: str, resource: str, action: str, target: str = None) -> bool:
+        """Single mask test plus access logging for the non-path enforce_* helpers."""
+        masks = self._policy_masks.get(agent_id)
+        if masks is None or not masks.get(resource, 0) & self._action_bits.get(action, 0):
+            self.log_access(agent_id, resource, action, target, False, "Permission denied")
             return False
         
-        self.log_access(agent_id, "chaos", action, filename, True)
+        self.log_access(agent_id, resource, action, target, True)
         return True
     
+    def enforce_chaos_access(self, agent_id: str, action: str, filename: str = None) -> bool:
+        """Enforce CHAOS access for agent."""
+        return self._enforce(agent_id, "chaos", action, filename)
+    
     def enforce_context_access(self, agent_id: str, action: str) -> bool:
         """Enforce context access for agent."""
-        if not self.check_permission(agent_id, "context", action):
-            self.log_access(agent_id, "context", action, None, False, "Permission denied")
-            return False
-        
-        self.log_access(agent_id, "context", action, None, True)
-        return True
+        return self._enforce(agent_id, "context", action)
     
     def enforce_media_access(self, agent_id: str, action: str, media_id: str = None) -> bool:
         """Enforce media access for agent."""
-        if not self.check_permission(agent_id, "media", action):
-            self.log_access(agent_id, "media", action, media_id, False, "Permission denied")
-            return False
-        
-        self.log_access(agent_id, "media", action, media_id, True)
-        return True
+        return self._enforce(agent_id, "media", action, media_id)
     
     def enforce_permissions_access(self, agent_id: str, action: str) -> bool:
         """Enforce permissions access for agent."""
-        if not self.check_permission(agent_id, "permissions", action):
-            self.log_access(agent_id, "permissions", action, None, False, "Permission denied")
-            return False
-        
-        self.log_access(agent_id, "permissions", action, None, True)
-        return True
+        return self._enforce(agent_id, "permissions", action)
 
 # Global agent trust engine instance
 agent_trust_engine = AgentTrustEngine()
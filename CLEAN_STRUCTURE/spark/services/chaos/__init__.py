@@ -4,15 +4,28 @@ EdenOS MCP Server Hub - CHAOS Package
 CHAOS cognitive system components.
 """
 
-from .engine import ChaosEngine, chaos_engine
 from .parser import ChaosParser
 from .analyzers import ChaosAnalyzers
 from .storage import ChaosStorage
+from .cache import ChaosParseCache
+from .index import ChaosIndex
+from .tokenizer import parse_document
 
 __all__ = [
     "ChaosEngine",
     "chaos_engine", 
     "ChaosParser",
     "ChaosAnalyzers",
-    "ChaosStorage"
+    "ChaosStorage",
+    "ChaosParseCache",
+    "ChaosIndex",
+    "parse_document"
 ]
+
+def __getattr__(name):
+    # engine.py builds the global chaos_engine on import; defer it so the
+    # shared parser can be imported on its own (hub monolith, chaos tools)
+    if name in ("ChaosEngine", "chaos_engine"):
+        from . import engine
+        return getattr(engine, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
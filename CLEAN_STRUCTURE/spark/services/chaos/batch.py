@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - CHAOS Batch Analysis
+Per-file analysis workers and corpus-level aggregation.
+
+Worker functions are module-level so a ProcessPoolExecutor can pickle them.
+"""
+
+import os
+from collections import Counter
+from itertools import combinations
+from typing import Dict, Any, Iterable, List, Tuple
+from .analyzers import ChaosAnalyzers
+from .tokenizer import parse_document
+
+def analyze_parsed(analyzers: ChaosAnalyzers, parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """Run every per-file analyzer over a parsed CHAOS document."""
+    emotive = parsed["emotive_layer"]
+    return {
+        "structured_core": parsed["structured_core"],
+        "emotion_analysis": analyzers.analyze_emotions(emotive["emotions"]),
+        "symbol_analysis": analyzers.analyze_symbols(emotive["symbols"]),
+        "relationship_analysis": analyzers.analyze_relationships(emotive["relationships"]),
+        "chaosfield_analysis": analyzers.analyze_chaosfield(parsed["chaosfield_layer"])
+    }
+
+def analyze_chunk(chaos_dir: str, filenames: List[str]) -> List[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+    """Parse and analyze a chunk of files (runs in a worker process).
+
+    Returns (filename, analysis, emotive_layer) triples; files that cannot
+    be read are reported with an error instead of failing the chunk.
+    """
+    analyzers = ChaosAnalyzers()
+    results = []
+    for filename in filenames:
+        try:
+            with open(os.path.join(chaos_dir, filename), "r", encoding="utf-8") as f:
+                parsed = parse_document(f)
+        except Exception as e:
+            results.append((filename, {"error": str(e)}, {}))
+            continue
+        results.append((filename, analyze_parsed(analyzers, parsed), parsed["emotive_layer"]))
+    return results
+
+def aggregate(emotive_layers: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Build corpus aggregates from (filename, emotive_layer) pairs."""
+    emotion_types: Counter = Counter()
+    intensities: Counter = Counter()
+    symbol_types: Counter = Counter()
+    presences: Counter = Counter()
+    co_occurrence: Counter = Counter()
+    edges: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    entities = set()
+    file_count = 0
+
+    for filename, emotive in emotive_layers:
+        file_count += 1
+        for emotion in emotive.get("emotions", []):
+            emotion_types[emotion["type"]] += 1
+            intensities[emotion["intensity"]] += 1
+
+        file_symbols = set()
+        for symbol in emotive.get("symbols", []):
+            symbol_types[symbol["type"]] += 1
+            presences[symbol["presence"]] += 1
+            file_symbols.add(symbol["type"])
+        for pair in combinations(sorted(file_symbols), 2):
+            co_occurrence[pair] += 1
+
+        for rel in emotive.get("relationships", []):
+            key = (rel["source"], rel["type"], rel["target"])
+            edge = edges.get(key)
+            if edge is None:
+                edge = edges[key] = {"source": key[0], "type": key[1], "target": key[2], "count": 0, "files": []}
+            edge["count"] += 1
+            if not edge["files"] or edge["files"][-1] != filename:
+                edge["files"].append(filename)
+            entities.add(key[0])
+            entities.add(key[2])
+
+    return {
+        "file_count": file_count,
+        "emotion_histogram": dict(emotion_types),
+        "intensity_histogram": dict(intensities),
+        "symbol_histogram": dict(symbol_types),
+        "presence_histogram": dict(presences),
+        "symbol_co_occurrence": [
+            {"symbols": list(pair), "files": count}
+            for pair, count in co_occurrence.most_common()
+        ],
+        "relationship_graph": {
+            "entities": sorted(entities),
+            "edges": list(edges.values())
+        }
+    }
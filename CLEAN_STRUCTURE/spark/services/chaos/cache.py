@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - CHAOS Parse Cache
+LRU cache of parsed CHAOS documents keyed on file identity.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# Parsed documents are roughly this many times larger in memory than their text
+PARSED_SIZE_FACTOR = 3
+
+class ChaosParseCache:
+    """LRU cache of parsed CHAOS documents with a memory cap.
+
+    Entries are stored per filename together with the (mtime_ns, size) stamp
+    of the file they were parsed from; a lookup with a different stamp is a
+    miss, so edits made outside the engine are never served stale.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._current_bytes = 0
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _estimate_size(content: str) -> int:
+        """Approximate memory cost of a cached document."""
+        return len(content) * (1 + PARSED_SIZE_FACTOR)
+
+    def get(self, filename: str, stamp: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+        """Get a cached document if it matches the file stamp."""
+        entry = self._entries.get(filename)
+        if entry is None or entry["stamp"] != stamp:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(filename)
+        self.hits += 1
+        return entry
+
+    def put(self, filename: str, stamp: Tuple[int, int], content: str, parsed: Dict[str, Any]):
+        """Cache a parsed document, evicting least recently used entries."""
+        self.invalidate(filename, count=False)
+
+        size = self._estimate_size(content)
+        if size > self.max_bytes:
+            return
+
+        self._entries[filename] = {
+            "stamp": stamp,
+            "content": content,
+            "parsed": parsed,
+            "size": size
+        }
+        self._current_bytes += size
+
+        while self._current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._current_bytes -= evicted["size"]
+            self.evictions += 1
+
+    def invalidate(self, filename: str, count: bool = True) -> bool:
+        """Drop a cached document."""
+        entry = self._entries.pop(filename, None)
+        if entry is None:
+            return False
+
+        self._current_bytes -= entry["size"]
+        if count:
+            self.invalidations += 1
+        return True
+
+    def clear(self):
+        """Drop every cached document."""
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._current_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache metrics."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
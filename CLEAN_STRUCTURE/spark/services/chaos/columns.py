@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - CHAOS Columns
+Columnar tag storage for vectorized corpus statistics.
+
+Tags are appended to typed ``array`` columns of categorical codes, so the
+store itself has no dependencies; NumPy is only imported when statistics
+are computed, over zero-copy views of those columns.
+"""
+
+from array import array
+from typing import Dict, Any, List, Optional
+
+INTENSITIES = ["EXTREME", "HIGH", "MEDIUM", "LOW", "MINIMAL"]
+INTENSITY_WEIGHTS = [10, 7, 5, 3, 1]
+PRESENCES = ["STRONG", "PRESENT", "WEAK"]
+
+# Dead rows are compacted away once they outnumber live ones
+COMPACT_RATIO = 0.5
+
+class _TagColumns:
+    """file id / type code / level code columns for one tag kind."""
+
+    def __init__(self, levels: List[str]):
+        self.levels = {name: code for code, name in enumerate(levels)}
+        self.unknown_level = len(levels)
+        self.type_codes: Dict[str, int] = {}
+        self.type_names: List[str] = []
+        self.file_ids = array("i")
+        self.types = array("i")
+        self.level_codes = array("i")
+
+    def append(self, file_id: int, tag_type: str, level: str):
+        code = self.type_codes.get(tag_type)
+        if code is None:
+            code = self.type_codes[tag_type] = len(self.type_names)
+            self.type_names.append(tag_type)
+        self.file_ids.append(file_id)
+        self.types.append(code)
+        self.level_codes.append(self.levels.get(level, self.unknown_level))
+
+    def compact(self, alive: bytearray):
+        keep = [i for i, file_id in enumerate(self.file_ids) if alive[file_id]]
+        self.file_ids = array("i", (self.file_ids[i] for i in keep))
+        self.types = array("i", (self.types[i] for i in keep))
+        self.level_codes = array("i", (self.level_codes[i] for i in keep))
+
+class ChaosColumns:
+    """Columnar representation of every tag in the CHAOS corpus.
+
+    Each file gets an integer id; updating a file retires its old id and
+    appends its tags under a new one, so columns are append-only between
+    compactions.
+    """
+
+    def __init__(self):
+        self.emotions = _TagColumns(INTENSITIES)
+        self.symbols = _TagColumns(PRESENCES)
+
+        self._file_ids: Dict[str, int] = {}
+        self._file_names: List[str] = []
+        self._alive = bytearray()
+        self._relationship_counts = array("i")
+        self._word_counts = array("i")
+        self._dead = 0
+
+    def set_file(self, filename: str, parsed: Dict[str, Any]):
+        """Replace the tags stored for one file."""
+        self.remove_file(filename)
+
+        file_id = len(self._file_names)
+        self._file_ids[filename] = file_id
+        self._file_names.append(filename)
+        self._alive.append(1)
+
+        emotive = parsed.get("emotive_layer", {})
+        for emotion in emotive.get("emotions", []):
+            self.emotions.append(file_id, emotion["type"], emotion["intensity"])
+        for symbol in emotive.get("symbols", []):
+            self.symbols.append(file_id, symbol["type"], symbol["presence"])
+        self._relationship_counts.append(len(emotive.get("relationships", [])))
+        self._word_counts.append(len(parsed.get("chaosfield_layer", "").split()))
+
+    def remove_file(self, filename: str) -> bool:
+        """Retire a file's rows."""
+        file_id = self._file_ids.pop(filename, None)
+        if file_id is None:
+            return False
+
+        self._alive[file_id] = 0
+        self._dead += 1
+        if self._dead > COMPACT_RATIO * len(self._file_names):
+            self._compact()
+        return True
+
+    def _compact(self):
+        """Drop dead rows and renumber live files densely."""
+        self.emotions.compact(self._alive)
+        self.symbols.compact(self._alive)
+
+        remap = {}
+        names = []
+        for file_id, name in enumerate(self._file_names):
+            if self._alive[file_id]:
+                remap[file_id] = len(names)
+                names.append(name)
+
+        for columns in (self.emotions, self.symbols):
+            columns.file_ids = array("i", (remap[file_id] for file_id in columns.file_ids))
+        self._relationship_counts = array("i", (self._relationship_counts[i] for i in remap))
+        self._word_counts = array("i", (self._word_counts[i] for i in remap))
+        self._file_names = names
+        self._file_ids = {name: file_id for file_id, name in enumerate(names)}
+        self._alive = bytearray([1]) * len(names)
+        self._dead = 0
+
+    def compute_statistics(self) -> Dict[str, Any]:
+        """Histograms plus per-file intensity, dominance and composition, vectorized."""
+        import numpy as np
+
+        n_files = len(self._file_names)
+        alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+
+        e_file = np.frombuffer(self.emotions.file_ids, dtype=np.int32)
+        e_type = np.frombuffer(self.emotions.types, dtype=np.int32)
+        e_level = np.frombuffer(self.emotions.level_codes, dtype=np.int32)
+        e_live = alive[e_file] if n_files else np.zeros(0, dtype=bool)
+
+        s_file = np.frombuffer(self.symbols.file_ids, dtype=np.int32)
+        s_type = np.frombuffer(self.symbols.types, dtype=np.int32)
+        s_level = np.frombuffer(self.symbols.level_codes, dtype=np.int32)
+        s_live = alive[s_file] if n_files else np.zeros(0, dtype=bool)
+
+        # Corpus histograms
+        emotion_hist = np.bincount(e_type[e_live], minlength=len(self.emotions.type_names))
+        intensity_hist = np.bincount(e_level[e_live], minlength=len(INTENSITIES) + 1)
+        symbol_hist = np.bincount(s_type[s_live], minlength=len(self.symbols.type_names))
+        presence_hist = np.bincount(s_level[s_live], minlength=len(PRESENCES) + 1)
+
+        # Per-file counts and intensity scores (unknown intensities weigh 0)
+        emotion_counts = np.bincount(e_file, minlength=n_files)
+        symbol_counts = np.bincount(s_file, minlength=n_files)
+        weights = np.array(INTENSITY_WEIGHTS + [0], dtype=np.float64)
+        weight_sums = np.bincount(e_file, weights=weights[e_level], minlength=n_files)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            intensity_scores = np.where(
+                emotion_counts > 0,
+                np.minimum(100.0, weight_sums / (emotion_counts * 10) * 100),
+                0.0
+            )
+
+        # Dominance: first EXTREME, else first HIGH, else first emotion
+        dominant_emotion = self._first_by_priority(np, e_file, e_type, np.minimum(e_level, 2), n_files)
+        # Dominance: first STRONG, else first symbol
+        dominant_symbol = self._first_by_priority(np, s_file, s_type, np.minimum(s_level, 1), n_files)
+
+        # Composition
+        relationship_counts = np.frombuffer(self._relationship_counts, dtype=np.int32)
+        word_counts = np.frombuffer(self._word_counts, dtype=np.int32)
+        complexity = np.minimum(100.0, emotion_counts * 2 + symbol_counts * 1.5 + relationship_counts * 3
+                                + np.minimum(word_counts / 100, 10))
+        balance = np.select(
+            [
+                emotion_counts + symbol_counts + relationship_counts == 0,
+                (emotion_counts > symbol_counts) & (emotion_counts > relationship_counts),
+                (symbol_counts > emotion_counts) & (symbol_counts > relationship_counts),
+                (relationship_counts > emotion_counts) & (relationship_counts > symbol_counts)
+            ],
+            ["empty", "emotion_dominant", "symbol_dominant", "relationship_dominant"],
+            default="balanced"
+        )
+
+        files = {}
+        for file_id in np.flatnonzero(alive):
+            e_dom = dominant_emotion[file_id]
+            s_dom = dominant_symbol[file_id]
+            files[self._file_names[file_id]] = {
+                "emotion_count": int(emotion_counts[file_id]),
+                "symbol_count": int(symbol_counts[file_id]),
+                "relationship_count": int(relationship_counts[file_id]),
+                "emotional_intensity_score": float(intensity_scores[file_id]),
+                "dominant_emotion": self.emotions.type_names[e_dom] if e_dom >= 0 else None,
+                "dominant_symbol": self.symbols.type_names[s_dom] if s_dom >= 0 else None,
+                "complexity_score": float(complexity[file_id]),
+                "balance_type": str(balance[file_id])
+            }
+
+        return {
+            "file_count": len(files),
+            "emotion_histogram": self._named_counts(self.emotions.type_names, emotion_hist),
+            "intensity_histogram": self._named_counts(INTENSITIES + ["UNKNOWN"], intensity_hist),
+            "symbol_histogram": self._named_counts(self.symbols.type_names, symbol_hist),
+            "presence_histogram": self._named_counts(PRESENCES + ["UNKNOWN"], presence_hist),
+            "files": files
+        }
+
+    @staticmethod
+    def _first_by_priority(np, file_ids, type_codes, priority, n_files):
+        """Per file, the type code of the earliest row with the lowest priority (-1 if none)."""
+        result = np.full(n_files, -1, dtype=np.int64)
+        if not len(file_ids):
+            return result
+        rows = np.arange(len(file_ids))
+        order = np.lexsort((rows, priority, file_ids))
+        sorted_files = file_ids[order]
+        first = np.flatnonzero(np.r_[True, sorted_files[1:] != sorted_files[:-1]])
+        result[sorted_files[first]] = type_codes[order[first]]
+        return result
+
+    @staticmethod
+    def _named_counts(names: List[str], counts) -> Dict[str, int]:
+        return {name: int(count) for name, count in zip(names, counts) if count}
+
+    def similarity_matrix(self, filenames: Optional[List[str]] = None) -> Dict[str, Any]:
+        """compare_files similarity scores for every pair of files at once.
+
+        Uses distinct emotion and symbol types per file, as compare_files
+        does: 2 * shared types / (types in file A + types in file B) * 100.
+        """
+        import numpy as np
+
+        if filenames is None:
+            # Ids retired by updates keep their names until compaction
+            names = [name for i, name in enumerate(self._file_names) if self._alive[i]]
+        else:
+            names = [name for name in dict.fromkeys(filenames) if name in self._file_ids]
+        if not names:
+            return {"files": [], "matrix": []}
+
+        ids = np.array([self._file_ids[name] for name in names], dtype=np.int64)
+        lookup = np.full(len(self._file_names), -1, dtype=np.int64)
+        lookup[ids] = np.arange(len(ids))
+
+        def incidence(columns: _TagColumns):
+            matrix = np.zeros((len(ids), max(1, len(columns.type_names))), dtype=np.float64)
+            file_ids = np.frombuffer(columns.file_ids, dtype=np.int32)
+            rows = lookup[file_ids]
+            selected = rows >= 0
+            types = np.frombuffer(columns.types, dtype=np.int32)
+            matrix[rows[selected], types[selected]] = 1.0
+            return matrix
+
+        emotions = incidence(self.emotions)
+        symbols = incidence(self.symbols)
+        common = emotions @ emotions.T + symbols @ symbols.T
+        sizes = emotions.sum(axis=1) + symbols.sum(axis=1)
+        totals = sizes[:, None] + sizes[None, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            matrix = np.where(totals > 0, np.minimum(100.0, common * 2 / totals * 100), 0.0)
+
+        return {"files": names, "matrix": matrix.round(4).tolist()}
@@ -6,25 +6,44 @@ Registry, lifecycle, and versioning for CHAOS cognitive system.
 
 import os
 import time
-import json
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Union
 from .parser import ChaosParser
 from .analyzers import ChaosAnalyzers
-from .storage import ChaosStorage
+from .storage import ChaosStorage, OBJECTS_DIR
+from .cache import ChaosParseCache
+from .index import ChaosIndex
+from .graph import ChaosGraph
+from .columns import ChaosColumns
+from .similarity import ChaosSimilarityIndex
+from .registry import ChaosRegistryStore
+from .history import ChaosHistory
+from .batch import analyze_parsed, analyze_chunk, aggregate
 
 class ChaosEngine:
     """Central authority for CHAOS cognitive system."""
     
-    def __init__(self, chaos_dir: str = "chaos_files"):
+    def __init__(self, chaos_dir: str = "chaos_files", cache_max_bytes: int = 64 * 1024 * 1024,
+                 registry_flush_interval: float = 1.0):
         self.chaos_dir = chaos_dir
         self.parser = ChaosParser()
         self.analyzers = ChaosAnalyzers()
         self.storage = ChaosStorage(chaos_dir)
+        self.history = ChaosHistory(self.storage.objects, os.path.join(chaos_dir, OBJECTS_DIR, "history.json"))
+        self.cache = ChaosParseCache(cache_max_bytes)
+        self.index = ChaosIndex()
+        self.graph = ChaosGraph()
+        self.columns = ChaosColumns()
+        self.similarity = ChaosSimilarityIndex()
+        self._index_built = False
         self.hub = None  # Nerve hook
         
-        # Registry for tracking CHAOS files
+        # Registry for tracking CHAOS files; it lives under OBJECTS_DIR so
+        # its log and snapshot writes never show up as (or touch) user files
         self._registry: Dict[str, Dict[str, Any]] = {}
-        self._registry_file = os.path.join(chaos_dir, "registry.json")
+        self._registry_file = os.path.join(chaos_dir, OBJECTS_DIR, "registry.json")
+        self._migrate_registry_file(os.path.join(chaos_dir, "registry.json"))
+        self._registry_store = ChaosRegistryStore(self._registry_file, registry_flush_interval)
         
         # Ensure chaos directory exists
         os.makedirs(chaos_dir, exist_ok=True)
@@ -49,30 +68,118 @@ class ChaosEngine:
         elif event_type == "context.entry.added":
             # Track context entries for potential CHAOS integration
             print(f"[ChaosEngine] Context entry added: {payload.get('source')}")
-        elif event_type == "filesystem.deleted":
-            # Check if deleted file was a CHAOS file
+        elif event_type and event_type.startswith("filesystem."):
+            # Files changed behind our back must not be served from the parse cache
             path = payload.get("path")
-            if path and path.endswith(".chaos"):
+            if path and os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.chaos_dir):
+                filename = os.path.basename(path)
+                self.cache.invalidate(filename)
+                if self._index_built and filename in self._registry:
+                    self._reindex_file(filename)
+            if event_type == "filesystem.deleted" and path and path.endswith(".chaos"):
                 print(f"[ChaosEngine] CHAOS file deleted: {path}")
     
+    def _migrate_registry_file(self, legacy_file: str):
+        """Move a registry (and change log) kept in chaos_dir by older versions."""
+        if os.path.exists(self._registry_file) or os.path.exists(self._registry_file + ".log"):
+            return
+        try:
+            for suffix in ("", ".log"):
+                if os.path.exists(legacy_file + suffix):
+                    os.replace(legacy_file + suffix, self._registry_file + suffix)
+        except OSError as e:
+            print(f"[ChaosEngine] Failed to move legacy registry: {e}")
+    
     def _load_registry(self):
-        """Load CHAOS file registry."""
+        """Load CHAOS file registry, recovering changes from the change log."""
         try:
-            if os.path.exists(self._registry_file):
-                with open(self._registry_file, "r", encoding="utf-8") as f:
-                    self._registry = json.load(f)
+            self._registry = self._registry_store.load()
         except Exception as e:
             print(f"[ChaosEngine] Failed to load registry: {e}")
             self._registry = {}
     
-    def _save_registry(self):
-        """Save CHAOS file registry."""
+    def _save_registry(self, filename: str):
+        """Log a registry change; the snapshot is written debounced."""
         try:
-            with open(self._registry_file, "w", encoding="utf-8") as f:
-                json.dump(self._registry, f, indent=2)
+            self._registry_store.record(filename)
         except Exception as e:
             print(f"[ChaosEngine] Failed to save registry: {e}")
     
+    def flush_registry(self):
+        """Write the registry snapshot now instead of waiting for the flush window."""
+        self._registry_store.flush()
+    
+    def close(self):
+        """Flush and close the registry, backup and history stores.
+        
+        Their debounce timers are cancelled, so nothing is written into
+        chaos_dir after this returns.
+        """
+        self._registry_store.close()
+        self.storage.close()
+        self.history.close()
+    
+    def _file_stamp(self, filename: str) -> Optional[Tuple[int, int]]:
+        """Get the (mtime_ns, size) stamp used to key the parse cache."""
+        stat = self.storage.stat(filename)
+        if stat is None:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _cache_parsed(self, filename: str, content: str, parsed: Dict[str, Any]):
+        """Populate the parse cache and search indexes right after a write."""
+        stamp = self._file_stamp(filename)
+        if stamp is not None:
+            self.cache.put(filename, stamp, content, parsed)
+        if self._index_built:
+            self.index.add(filename, content, parsed)
+            self.graph.set_file(filename, parsed["emotive_layer"]["relationships"])
+            self.columns.set_file(filename, parsed)
+            self.similarity.add(filename, parsed)
+    
+    def _reindex_file(self, filename: str):
+        """Refresh a single file's index, graph and column entries from disk."""
+        loaded = self._load_parsed(filename)
+        if loaded:
+            self.index.add(filename, *loaded)
+            self.graph.set_file(filename, loaded[1]["emotive_layer"]["relationships"])
+            self.columns.set_file(filename, loaded[1])
+            self.similarity.add(filename, loaded[1])
+        else:
+            self.index.remove(filename)
+            self.graph.remove_file(filename)
+            self.columns.remove_file(filename)
+            self.similarity.remove(filename)
+    
+    def _ensure_index(self):
+        """Build the search indexes, relationship graph, tag columns and LSH index on first use."""
+        if self._index_built:
+            return
+        for filename in self._registry:
+            self._reindex_file(filename)
+        self._index_built = True
+    
+    def _load_parsed(self, filename: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Load and parse a CHAOS file, going through the parse cache."""
+        stamp = self._file_stamp(filename)
+        if stamp is None:
+            return None
+        
+        cached = self.cache.get(filename, stamp)
+        if cached:
+            return cached["content"], cached["parsed"]
+        
+        content = self.storage.load(filename)
+        if not content:
+            return None
+        
+        parsed = self.parser.parse(content)
+        if not parsed:
+            return None
+        
+        self.cache.put(filename, stamp, content, parsed)
+        return content, parsed
+    
     def create_file(self, filename: str, content: str, metadata: Optional[Dict] = None) -> bool:
         """Create a new CHAOS file."""
         if not filename or not content:
@@ -87,6 +194,9 @@ class ChaosEngine:
         success = self.storage.save(filename, content)
         if not success:
             return False
+        self._cache_parsed(filename, content, parsed)
+        self.history.remove(filename)
+        self.history.record(filename, 1, content)
         
         # Update registry
         self._registry[filename] = {
@@ -112,19 +222,16 @@ class ChaosEngine:
                 "metadata": metadata or {}
             })
         
-        self._save_registry()
+        self._save_registry(filename)
         return True
     
     def read_file(self, filename: str) -> Optional[Dict[str, Any]]:
         """Read and parse a CHAOS file."""
-        content = self.storage.load(filename)
-        if not content:
-            return None
-        
-        parsed = self.parser.parse(content)
-        if not parsed:
+        loaded = self._load_parsed(filename)
+        if not loaded:
             return None
         
+        content, parsed = loaded
         return {
             "filename": filename,
             "content": content,
@@ -145,15 +252,23 @@ class ChaosEngine:
         if not parsed:
             return False
         
+        registry_entry = self._registry[filename]
+        if filename not in self.history:
+            # File predates version history; start the chain at its current version
+            loaded = self._load_parsed(filename)
+            if loaded:
+                self.history.record(filename, registry_entry["version"], loaded[0])
+        
         # Store file
         success = self.storage.save(filename, content)
         if not success:
             return False
+        self._cache_parsed(filename, content, parsed)
         
         # Update registry
-        registry_entry = self._registry[filename]
         registry_entry["updated_at"] = time.time()
         registry_entry["version"] += 1
+        self.history.record(filename, registry_entry["version"], content)
         if metadata:
             registry_entry["metadata"].update(metadata)
         registry_entry["stats"] = {
@@ -173,7 +288,7 @@ class ChaosEngine:
                 "metadata": registry_entry["metadata"]
             })
         
-        self._save_registry()
+        self._save_registry(filename)
         return True
     
     def delete_file(self, filename: str) -> bool:
@@ -186,6 +301,12 @@ class ChaosEngine:
             return False
         
         del self._registry[filename]
+        self.cache.invalidate(filename)
+        self.index.remove(filename)
+        self.graph.remove_file(filename)
+        self.columns.remove_file(filename)
+        self.similarity.remove(filename)
+        self.history.remove(filename)
         
         # Emit CHAOS file deleted event
         if self.hub:
@@ -193,7 +314,7 @@ class ChaosEngine:
                 "filename": filename
             })
         
-        self._save_registry()
+        self._save_registry(filename)
         return True
     
     def analyze_file(self, filename: str) -> Optional[Dict[str, Any]]:
@@ -202,15 +323,9 @@ class ChaosEngine:
         if not file_data:
             return None
         
-        parsed = file_data["parsed"]
-        
         analysis = {
             "filename": filename,
-            "structured_core": parsed["structured_core"],
-            "emotion_analysis": self.analyzers.analyze_emotions(parsed["emotive_layer"]["emotions"]),
-            "symbol_analysis": self.analyzers.analyze_symbols(parsed["emotive_layer"]["symbols"]),
-            "relationship_analysis": self.analyzers.analyze_relationships(parsed["emotive_layer"]["relationships"]),
-            "chaosfield_analysis": self.analyzers.analyze_chaosfield(parsed["chaosfield_layer"]),
+            **analyze_parsed(self.analyzers, file_data["parsed"]),
             "registry": file_data["registry"]
         }
         
@@ -225,6 +340,64 @@ class ChaosEngine:
         
         return analysis
     
+    def analyze_files(self, filenames: Union[List[str], str] = "*", workers: Optional[int] = None,
+                      chunk_size: int = 64) -> Dict[str, Any]:
+        """Analyze many CHAOS files and aggregate corpus statistics.
+        
+        filenames is a list or "*" for every registered file. Work is split
+        into chunks of chunk_size files and run on a process pool with the
+        given number of workers; workers=0 (or a single chunk) runs inline.
+        Requested filenames that are not registered are listed in "missing".
+        """
+        missing = []
+        if filenames == "*":
+            names = list(self._registry)
+        else:
+            names = []
+            for name in dict.fromkeys(filenames):
+                (names if name in self._registry else missing).append(name)
+        
+        chunks = [names[i:i + chunk_size] for i in range(0, len(names), chunk_size)]
+        
+        if workers == 0 or len(chunks) <= 1:
+            chunk_results = [self._analyze_chunk_inline(chunk) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(analyze_chunk, self.chaos_dir, chunk) for chunk in chunks]
+                chunk_results = [future.result() for future in futures]
+        
+        files = {}
+        emotive_layers = []
+        for results in chunk_results:
+            for filename, analysis, emotive in results:
+                if "error" not in analysis:
+                    analysis = {"filename": filename, **analysis, "registry": self._registry.get(filename, {})}
+                    emotive_layers.append((filename, emotive))
+                files[filename] = analysis
+        
+        corpus = aggregate(emotive_layers)
+        
+        # Emit CHAOS corpus analyzed event
+        if self.hub:
+            self.hub.emit("chaos.corpus.analyzed", {
+                "file_count": corpus["file_count"],
+                "requested": len(names)
+            })
+        
+        return {"files": files, "corpus": corpus, "missing": missing}
+    
+    def _analyze_chunk_inline(self, filenames: List[str]) -> List[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+        """Analyze a chunk in-process, reusing the parse cache."""
+        results = []
+        for filename in filenames:
+            loaded = self._load_parsed(filename)
+            if not loaded:
+                results.append((filename, {"error": "File not found or unparsable"}, {}))
+                continue
+            parsed = loaded[1]
+            results.append((filename, analyze_parsed(self.analyzers, parsed), parsed["emotive_layer"]))
+        return results
+    
     def list_files(self) -> List[Dict[str, Any]]:
         """List all CHAOS files with registry info."""
         files = []
@@ -244,6 +417,10 @@ class ChaosEngine:
         """Get registry info for a specific file."""
         return self._registry.get(filename)
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get parse cache metrics."""
+        return self.cache.get_stats()
+    
     def create_emotion_tag(self, emotion_type: str, intensity: str) -> Optional[str]:
         """Create an emotion tag."""
         return self.parser.create_emotion_tag(emotion_type, intensity)
@@ -258,56 +435,134 @@ class ChaosEngine:
     
     def search_files(self, query: str, search_type: str = "content") -> List[Dict[str, Any]]:
         """Search CHAOS files."""
-        results = []
+        self._ensure_index()
+        query_lower = query.lower()
+        matches: Dict[str, Dict[str, Any]] = {}
         
-        for filename in self._registry:
-            file_data = self.read_file(filename)
-            if not file_data:
-                continue
-            
-            content = file_data["content"]
-            parsed = file_data["parsed"]
-            
-            match = False
-            match_details = {}
-            
-            if search_type == "content":
-                match = query.lower() in content.lower()
-                if match:
-                    match_details["content_matches"] = content.lower().count(query.lower())
-            
-            elif search_type == "emotions":
-                emotions = parsed["emotive_layer"]["emotions"]
-                for emotion in emotions:
-                    if query.lower() in emotion["type"].lower():
-                        match = True
-                        match_details.setdefault("emotion_matches", []).append(emotion)
-            
-            elif search_type == "symbols":
-                symbols = parsed["emotive_layer"]["symbols"]
-                for symbol in symbols:
-                    if query.lower() in symbol["type"].lower():
-                        match = True
-                        match_details.setdefault("symbol_matches", []).append(symbol)
-            
-            elif search_type == "relationships":
-                relationships = parsed["emotive_layer"]["relationships"]
-                for rel in relationships:
-                    if (query.lower() in rel["source"].lower() or 
-                        query.lower() in rel["target"].lower() or
-                        query.lower() in rel["type"].lower()):
-                        match = True
-                        match_details.setdefault("relationship_matches", []).append(rel)
-            
-            if match:
-                results.append({
-                    "filename": filename,
-                    "match_type": search_type,
-                    "match_details": match_details,
-                    "registry": self._registry[filename]
-                })
+        if search_type == "content":
+            candidates = self.index.content_candidates(query)
+            if candidates is None:
+                candidates = self._registry.keys()
+            for filename in candidates:
+                loaded = self._load_parsed(filename)
+                if not loaded:
+                    continue
+                count = loaded[0].lower().count(query_lower)
+                if count:
+                    matches[filename] = {"content_matches": count}
         
-        return results
+        elif search_type == "emotions":
+            for filename, tags in self.index.match_tags("emotion", query).items():
+                matches[filename] = {"emotion_matches": tags}
+        
+        elif search_type == "symbols":
+            for filename, tags in self.index.match_tags("symbol", query).items():
+                matches[filename] = {"symbol_matches": tags}
+        
+        elif search_type == "relationships":
+            # A relationship may match on several fields; report it once
+            seen = set()
+            for field in ("source", "target", "relationship"):
+                for filename, tags in self.index.match_tags(field, query).items():
+                    details = matches.setdefault(filename, {"relationship_matches": []})
+                    for rel in tags:
+                        if id(rel) not in seen:
+                            seen.add(id(rel))
+                            details["relationship_matches"].append(rel)
+        
+        return [
+            {
+                "filename": filename,
+                "match_type": search_type,
+                "match_details": matches[filename],
+                "registry": self._registry[filename]
+            }
+            for filename in self._registry if filename in matches
+        ]
+    
+    def get_relationship_neighbors(self, entity: str, direction: str = "out",
+                                   rel_type: Optional[str] = None) -> List[Dict[str, str]]:
+        """Direct neighbors of an entity in the corpus relationship graph."""
+        self._ensure_index()
+        return self.graph.neighbors(entity, direction, rel_type)
+    
+    def traverse_relationships(self, entity: str, k: int = 2, direction: str = "out",
+                               rel_type: Optional[str] = None) -> Dict[str, int]:
+        """Entities within k hops of an entity, with their hop distance."""
+        self._ensure_index()
+        return self.graph.k_hop(entity, k, direction, rel_type)
+    
+    def get_relationship_degree(self, entity: str, direction: str = "out",
+                                rel_type: Optional[str] = None) -> int:
+        """Number of distinct relationships at an entity."""
+        self._ensure_index()
+        return self.graph.degree(entity, direction, rel_type)
+    
+    def query_files(self, criteria: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Find files matching every criterion (exact, case-insensitive).
+        
+        Fields: emotion, symbol, source, target, relationship, token; e.g.
+        {"emotion": "JOY", "symbol": "FIRE"}.
+        """
+        self._ensure_index()
+        matched = self.index.query(criteria)
+        return [
+            {"filename": filename, "registry": self._registry[filename]}
+            for filename in self._registry if filename in matched
+        ]
+
+    def get_corpus_statistics(self) -> Dict[str, Any]:
+        """Corpus histograms and per-file emotion/symbol/composition stats.
+        
+        Computed in one vectorized pass over the tag columns; requires NumPy.
+        """
+        self._ensure_index()
+        try:
+            return self.columns.compute_statistics()
+        except ImportError:
+            return {"numpy_not_available": True}
+    
+    def similarity_matrix(self, filenames: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Pairwise compare_files similarity scores for many files at once."""
+        self._ensure_index()
+        try:
+            return self.columns.similarity_matrix(filenames)
+        except ImportError:
+            return {"numpy_not_available": True}
+
+    def find_similar(self, filename: str, k: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """Top-k files most similar to filename, from the MinHash/LSH index.
+        
+        similarity is the estimated Jaccard similarity of the files' emotion,
+        symbol, relationship and chaosfield token sets.
+        """
+        if filename not in self._registry:
+            return None
+        self._ensure_index()
+        return [
+            {**match, "registry": self._registry[match["filename"]]}
+            for match in self.similarity.find_similar(filename, k)
+            if match["filename"] in self._registry
+        ]
+
+    def list_versions(self, filename: str) -> List[Dict[str, Any]]:
+        """Stored versions of a CHAOS file, oldest first."""
+        return self.history.list_versions(filename)
+    
+    def get_version(self, filename: str, version: int) -> Optional[str]:
+        """Content of a CHAOS file as of a given version."""
+        return self.history.get_version(filename, version)
+    
+    def diff_versions(self, filename: str, version_a: int, version_b: int) -> Optional[str]:
+        """Unified diff between two versions of a CHAOS file."""
+        return self.history.diff_versions(filename, version_a, version_b)
+    
+    def prune_objects(self, grace_seconds: float = 60.0) -> Dict[str, Any]:
+        """Remove history and backup blobs no longer referenced (e.g. of deleted files)."""
+        keep = self.history.digests() | self.storage.backup_digests()
+        result = self.storage.objects.prune(keep, grace_seconds)
+        result.update(self.storage.objects.get_stats())
+        return result
 
 # Global CHAOS engine instance
 chaos_engine = ChaosEngine()
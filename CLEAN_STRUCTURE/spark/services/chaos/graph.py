@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - CHAOS Relationship Graph
+Corpus-wide relationship graph with CSR adjacency arrays.
+"""
+
+from array import array
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+DIRECTIONS = ("out", "in", "both")
+# The overlay is merged into the CSR once it holds more than this many
+# changed edges, or this fraction of the CSR's edges if that is larger
+OVERLAY_MERGE_EDGES = 1024
+OVERLAY_MERGE_FRACTION = 0.05
+
+class ChaosGraph:
+    """Relationship graph across every CHAOS file.
+
+    Entities and relationship types are interned to compact integer ids.
+    The CSR arrays (offsets/targets/types for both directions) are built in
+    one O(V + E) pass. After that, an edge that appears or disappears is
+    recorded in a per-node overlay of added and removed (neighbor, type)
+    pairs that queries read alongside the CSR; once the overlay grows past
+    OVERLAY_MERGE_EDGES / OVERLAY_MERGE_FRACTION it is merged by a rebuild,
+    which also reclaims the ids of entities and types no edge uses.
+    """
+
+    def __init__(self):
+        self._node_ids: Dict[str, int] = {}
+        self._node_names: List[str] = []
+        self._type_ids: Dict[str, int] = {}
+        self._type_names: List[str] = []
+
+        # (source_id, type_id, target_id) -> number of files/tags asserting it
+        self._edge_counts: Dict[Tuple[int, int, int], int] = {}
+        self._file_edges: Dict[str, List[Tuple[int, int, int]]] = {}
+
+        self._dirty = True
+        self._out: Tuple[array, array, array] = (array("i", [0]), array("i"), array("i"))
+        self._in: Tuple[array, array, array] = (array("i", [0]), array("i"), array("i"))
+        # Changes since the CSR was built, per direction as (added, removed):
+        # node -> {(neighbor, type), ...}
+        self._out_delta: Tuple[Dict[int, Set[Tuple[int, int]]], Dict[int, Set[Tuple[int, int]]]] = ({}, {})
+        self._in_delta: Tuple[Dict[int, Set[Tuple[int, int]]], Dict[int, Set[Tuple[int, int]]]] = ({}, {})
+        self._overlay_edges = 0
+
+    @staticmethod
+    def _intern(ids: Dict[str, int], names: List[str], name: str) -> int:
+        node_id = ids.get(name)
+        if node_id is None:
+            node_id = ids[name] = len(names)
+            names.append(name)
+        return node_id
+
+    def set_file(self, filename: str, relationships: List[Dict[str, str]]):
+        """Replace the edges contributed by one file."""
+        self.remove_file(filename)
+
+        edges = []
+        for rel in relationships:
+            edge = (
+                self._intern(self._node_ids, self._node_names, rel["source"]),
+                self._intern(self._type_ids, self._type_names, rel["type"]),
+                self._intern(self._node_ids, self._node_names, rel["target"])
+            )
+            count = self._edge_counts.get(edge, 0)
+            self._edge_counts[edge] = count + 1
+            if not count:
+                self._overlay(edge, True)
+            edges.append(edge)
+
+        if edges:
+            self._file_edges[filename] = edges
+
+    def remove_file(self, filename: str) -> bool:
+        """Drop the edges contributed by one file."""
+        edges = self._file_edges.pop(filename, None)
+        if not edges:
+            return False
+
+        for edge in edges:
+            count = self._edge_counts[edge] - 1
+            if count:
+                self._edge_counts[edge] = count
+            else:
+                del self._edge_counts[edge]
+                self._overlay(edge, False)
+        return True
+
+    def _overlay(self, edge: Tuple[int, int, int], present: bool):
+        """Record an edge appearing or disappearing since the CSR was built."""
+        if self._dirty:
+            return
+        source, rel_type, target = edge
+        for node, pair, (added, removed) in ((source, (target, rel_type), self._out_delta),
+                                             (target, (source, rel_type), self._in_delta)):
+            # An edge coming back cancels its removal, and vice versa
+            undo, record = (removed, added) if present else (added, removed)
+            pairs = undo.get(node)
+            if pairs and pair in pairs:
+                pairs.discard(pair)
+                if not pairs:
+                    del undo[node]
+                change = -1
+            else:
+                record.setdefault(node, set()).add(pair)
+                change = 1
+        self._overlay_edges += change
+
+        if self._overlay_edges > max(OVERLAY_MERGE_EDGES, len(self._out[1]) * OVERLAY_MERGE_FRACTION):
+            self._dirty = True
+
+    def _build_csr(self, edges: List[Tuple[int, int, int]], node_count: int) -> Tuple[array, array, array]:
+        """Counting-sort (node, neighbor, type) triples into CSR arrays."""
+        offsets = array("i", bytes(4 * (node_count + 1)))
+        for node, _, _ in edges:
+            offsets[node + 1] += 1
+        for i in range(node_count):
+            offsets[i + 1] += offsets[i]
+
+        cursor = array("i", offsets)
+        neighbors = array("i", bytes(4 * len(edges)))
+        types = array("i", bytes(4 * len(edges)))
+        for node, neighbor, rel_type in edges:
+            slot = cursor[node]
+            neighbors[slot] = neighbor
+            types[slot] = rel_type
+            cursor[node] = slot + 1
+        return offsets, neighbors, types
+
+    def _compact_ids(self):
+        """Drop interned entities and types that no edge refers to any more."""
+        live_nodes = set()
+        live_types = set()
+        for source, rel_type, target in self._edge_counts:
+            live_nodes.add(source)
+            live_nodes.add(target)
+            live_types.add(rel_type)
+        if len(live_nodes) == len(self._node_names) and len(live_types) == len(self._type_names):
+            return
+
+        def compact(names: List[str], live: Set[int]) -> Tuple[Dict[str, int], List[str], Dict[int, int]]:
+            remap = {}
+            kept = []
+            for old_id, name in enumerate(names):
+                if old_id in live:
+                    remap[old_id] = len(kept)
+                    kept.append(name)
+            return {name: new_id for new_id, name in enumerate(kept)}, kept, remap
+
+        self._node_ids, self._node_names, nodes = compact(self._node_names, live_nodes)
+        self._type_ids, self._type_names, types = compact(self._type_names, live_types)
+        remapped = {}
+        for edge, count in self._edge_counts.items():
+            remapped[edge] = (nodes[edge[0]], types[edge[1]], nodes[edge[2]])
+        self._edge_counts = {remapped[edge]: count for edge, count in self._edge_counts.items()}
+        self._file_edges = {
+            filename: [remapped[edge] for edge in edges]
+            for filename, edges in self._file_edges.items()
+        }
+
+    def _ensure_csr(self):
+        if not self._dirty:
+            return
+        self._compact_ids()
+        node_count = len(self._node_names)
+        edges = list(self._edge_counts)
+        self._out = self._build_csr([(s, d, t) for s, t, d in edges], node_count)
+        self._in = self._build_csr([(d, s, t) for s, t, d in edges], node_count)
+        self._out_delta = ({}, {})
+        self._in_delta = ({}, {})
+        self._overlay_edges = 0
+        self._dirty = False
+
+    def _adjacent(self, node: int, direction: str, type_id: Optional[int]):
+        """Yield (neighbor_id, type_id) pairs for a node."""
+        tables = []
+        if direction in ("out", "both"):
+            tables.append((self._out, self._out_delta))
+        if direction in ("in", "both"):
+            tables.append((self._in, self._in_delta))
+        for (offsets, neighbors, types), (added, removed) in tables:
+            if node + 1 < len(offsets):
+                gone = removed.get(node)
+                for slot in range(offsets[node], offsets[node + 1]):
+                    if type_id is None or types[slot] == type_id:
+                        if gone and (neighbors[slot], types[slot]) in gone:
+                            continue
+                        yield neighbors[slot], types[slot]
+            for neighbor, t in added.get(node, ()):
+                if type_id is None or t == type_id:
+                    yield neighbor, t
+
+    def _resolve(self, entity: str, direction: str, rel_type: Optional[str]) -> Optional[Tuple[int, Optional[int]]]:
+        """Map names to ids; None if the entity or type is unknown."""
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown direction: {direction}")
+        node = self._node_ids.get(entity)
+        if node is None:
+            return None
+        if rel_type is None:
+            return node, None
+        type_id = self._type_ids.get(rel_type)
+        if type_id is None:
+            return None
+        return node, type_id
+
+    def neighbors(self, entity: str, direction: str = "out", rel_type: Optional[str] = None) -> List[Dict[str, str]]:
+        """Direct neighbors of an entity, optionally filtered by relationship type."""
+        # Before resolving: a rebuild may renumber ids
+        self._ensure_csr()
+        resolved = self._resolve(entity, direction, rel_type)
+        if resolved is None:
+            return []
+        node, type_id = resolved
+        return [
+            {"entity": self._node_names[neighbor], "type": self._type_names[t]}
+            for neighbor, t in self._adjacent(node, direction, type_id)
+        ]
+
+    def degree(self, entity: str, direction: str = "out", rel_type: Optional[str] = None) -> int:
+        """Number of distinct edges at an entity."""
+        self._ensure_csr()
+        resolved = self._resolve(entity, direction, rel_type)
+        if resolved is None:
+            return 0
+        node, type_id = resolved
+        if type_id is None and direction != "both":
+            offsets = self._out[0] if direction == "out" else self._in[0]
+            added, removed = self._out_delta if direction == "out" else self._in_delta
+            stored = offsets[node + 1] - offsets[node] if node + 1 < len(offsets) else 0
+            return stored - len(removed.get(node, ())) + len(added.get(node, ()))
+        return sum(1 for _ in self._adjacent(node, direction, type_id))
+
+    def k_hop(self, entity: str, k: int = 2, direction: str = "out", rel_type: Optional[str] = None) -> Dict[str, int]:
+        """Entities reachable within k hops, mapped to their hop distance."""
+        self._ensure_csr()
+        resolved = self._resolve(entity, direction, rel_type)
+        if resolved is None:
+            return {}
+        start, type_id = resolved
+
+        distances = {start: 0}
+        frontier = [start]
+        for hop in range(1, k + 1):
+            next_frontier = []
+            for node in frontier:
+                for neighbor, _ in self._adjacent(node, direction, type_id):
+                    if neighbor not in distances:
+                        distances[neighbor] = hop
+                        next_frontier.append(neighbor)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        del distances[start]
+        return {self._node_names[node]: hop for node, hop in distances.items()}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Graph size summary."""
+        return {
+            "entities": len(self._node_names),
+            "relationship_types": len(self._type_names),
+            "edges": len(self._edge_counts),
+            "files": len(self._file_edges)
+        }
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - CHAOS History
+Delta-encoded version history for CHAOS files.
+
+Each version is a blob in the object store: either a full keyframe or a
+line-based delta against the previous version. A keyframe is written every
+KEYFRAME_INTERVAL versions (or when a delta would not be smaller), so any
+version is rebuilt from at most KEYFRAME_INTERVAL - 1 deltas.
+"""
+
+import difflib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set
+from .objects import ChaosObjectStore
+from .registry import ChaosRegistryStore
+
+KEYFRAME_INTERVAL = 16
+# Newest contents kept in memory to diff the next version against
+LATEST_CACHE_FILES = 64
+
+def make_delta(old_lines: List[str], new_lines: List[str]) -> List[list]:
+    """Line delta: ["c", i1, i2] copies old_lines[i1:i2], ["i", lines] inserts."""
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["c", i1, i2])
+        elif j2 > j1:
+            ops.append(["i", new_lines[j1:j2]])
+    return ops
+
+def apply_delta(old_lines: List[str], ops: List[list]) -> List[str]:
+    """Rebuild the new lines from the old lines and a delta."""
+    lines = []
+    for op in ops:
+        if op[0] == "c":
+            lines.extend(old_lines[op[1]:op[2]])
+        else:
+            lines.extend(op[1])
+    return lines
+
+class ChaosHistory:
+    """Per-file version chains of keyframe and delta blobs."""
+
+    def __init__(self, objects: ChaosObjectStore, index_path: str,
+                 keyframe_interval: int = KEYFRAME_INTERVAL,
+                 latest_cache_files: int = LATEST_CACHE_FILES):
+        self.objects = objects
+        self.keyframe_interval = keyframe_interval
+        self._store = ChaosRegistryStore(index_path)
+        # filename -> {"versions": [{"version", "kind", "digest", "created_at"}, ...]}
+        self._index = self._store.load()
+        # filename -> content of its newest version, least recently recorded
+        # first; a miss rebuilds it from the chain
+        self._latest: "OrderedDict[str, str]" = OrderedDict()
+        self.latest_cache_files = latest_cache_files
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self._index
+
+    def record(self, filename: str, version: int, content: str) -> bool:
+        """Append a version.
+
+        Deltas are taken against the previous version as the chain rebuilds
+        it, not against whatever is on disk, which may have been edited or
+        restored outside the engine.
+        """
+        entry = self._index.get(filename)
+        versions = entry["versions"] if entry else []
+
+        kind = "key"
+        blob = content
+        if versions and len(versions) % self.keyframe_interval:
+            previous = self._latest.get(filename)
+            if previous is None:
+                previous = self.get_version(filename, versions[-1]["version"])
+            if previous is not None:
+                ops = make_delta(previous.splitlines(keepends=True), content.splitlines(keepends=True))
+                delta = json.dumps(ops, separators=(",", ":"), ensure_ascii=False)
+                if len(delta) < len(content):
+                    kind = "delta"
+                    blob = delta
+
+        digest = self.objects.put(blob)
+        if digest is None:
+            return False
+
+        versions.append({"version": version, "kind": kind, "digest": digest, "created_at": time.time()})
+        self._index[filename] = {"versions": versions}
+        self._latest[filename] = content
+        self._latest.move_to_end(filename)
+        while len(self._latest) > self.latest_cache_files:
+            self._latest.popitem(last=False)
+        self._store.record(filename)
+        return True
+
+    def close(self):
+        """Write the index snapshot and release its change log."""
+        self._store.close()
+
+    def remove(self, filename: str) -> bool:
+        """Forget a file's history (its blobs stay until ChaosObjectStore.prune)."""
+        self._latest.pop(filename, None)
+        if self._index.pop(filename, None) is None:
+            return False
+        self._store.record(filename)
+        return True
+
+    def digests(self) -> Set[str]:
+        """Every blob digest referenced by a version chain."""
+        return {v["digest"] for entry in self._index.values() for v in entry["versions"]}
+
+    def list_versions(self, filename: str) -> List[Dict[str, Any]]:
+        """Version records for a file, oldest first."""
+        entry = self._index.get(filename)
+        return list(entry["versions"]) if entry else []
+
+    def get_version(self, filename: str, version: int) -> Optional[str]:
+        """Rebuild a version from its nearest preceding keyframe."""
+        versions = self._index.get(filename, {}).get("versions", [])
+        position = next((i for i, v in enumerate(versions) if v["version"] == version), None)
+        if position is None:
+            return None
+
+        start = position
+        while versions[start]["kind"] != "key":
+            start -= 1
+
+        content = self.objects.get(versions[start]["digest"])
+        if content is None:
+            return None
+        lines = content.splitlines(keepends=True)
+        for record in versions[start + 1:position + 1]:
+            delta = self.objects.get(record["digest"])
+            if delta is None:
+                return None
+            lines = apply_delta(lines, json.loads(delta))
+        return "".join(lines)
+
+    def diff_versions(self, filename: str, version_a: int, version_b: int) -> Optional[str]:
+        """Unified diff from version_a to version_b."""
+        content_a = self.get_version(filename, version_a)
+        content_b = self.get_version(filename, version_b)
+        if content_a is None or content_b is None:
+            return None
+        return "".join(difflib.unified_diff(
+            content_a.splitlines(keepends=True),
+            content_b.splitlines(keepends=True),
+            fromfile=f"{filename}@{version_a}",
+            tofile=f"{filename}@{version_b}"
+        ))
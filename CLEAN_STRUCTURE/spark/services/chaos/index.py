@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - CHAOS Index
+Secondary indexes over parsed CHAOS files for search lookups.
+"""
+
+import re
+from typing import Dict, Any, Iterable, List, Optional, Set
+
+_TOKEN_RE = re.compile(r"\w+")
+# Length of the substrings indexing the token vocabulary for partial words
+GRAM = 3
+
+# Compound query fields and the posting tables they map to
+QUERY_FIELDS = {
+    "emotion": "emotions",
+    "symbol": "symbols",
+    "source": "rel_sources",
+    "target": "rel_targets",
+    "relationship": "rel_types",
+    "token": "tokens"
+}
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+def grams(token: str) -> Set[str]:
+    """Distinct GRAM-character substrings of a token."""
+    return {token[i:i + GRAM] for i in range(len(token) - GRAM + 1)}
+
+class ChaosIndex:
+    """Inverted indexes from CHAOS tags and content tokens to filenames.
+
+    Tag postings keep the matching tag dicts per file so search results can
+    report match details without re-reading the file.
+    """
+
+    def __init__(self):
+        # key (lowercase) -> filename -> [tag dicts]
+        self.emotions: Dict[str, Dict[str, List[Dict]]] = {}
+        self.symbols: Dict[str, Dict[str, List[Dict]]] = {}
+        self.rel_sources: Dict[str, Dict[str, List[Dict]]] = {}
+        self.rel_targets: Dict[str, Dict[str, List[Dict]]] = {}
+        self.rel_types: Dict[str, Dict[str, List[Dict]]] = {}
+        # token -> filenames
+        self.tokens: Dict[str, Set[str]] = {}
+        # GRAM-character substring -> tokens containing it
+        self._token_grams: Dict[str, Set[str]] = {}
+
+        # filename -> keys it contributed, for removal
+        self._forward: Dict[str, Dict[str, Set[str]]] = {}
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self._forward
+
+    @staticmethod
+    def _post(table: Dict[str, Dict[str, List[Dict]]], key: str, filename: str, tag: Dict) -> str:
+        key = key.lower()
+        table.setdefault(key, {}).setdefault(filename, []).append(tag)
+        return key
+
+    def add(self, filename: str, content: str, parsed: Dict[str, Any]):
+        """Index a parsed file, replacing any previous entry for it."""
+        self.remove(filename)
+
+        emotive = parsed.get("emotive_layer", {})
+        forward = {name: set() for name in QUERY_FIELDS.values()}
+
+        for emotion in emotive.get("emotions", []):
+            forward["emotions"].add(self._post(self.emotions, emotion["type"], filename, emotion))
+        for symbol in emotive.get("symbols", []):
+            forward["symbols"].add(self._post(self.symbols, symbol["type"], filename, symbol))
+        for rel in emotive.get("relationships", []):
+            forward["rel_sources"].add(self._post(self.rel_sources, rel["source"], filename, rel))
+            forward["rel_targets"].add(self._post(self.rel_targets, rel["target"], filename, rel))
+            forward["rel_types"].add(self._post(self.rel_types, rel["type"], filename, rel))
+
+        for token in set(tokenize(content)):
+            files = self.tokens.get(token)
+            if files is None:
+                files = self.tokens[token] = set()
+                for gram in grams(token):
+                    self._token_grams.setdefault(gram, set()).add(token)
+            files.add(filename)
+            forward["tokens"].add(token)
+
+        self._forward[filename] = forward
+
+    def remove(self, filename: str) -> bool:
+        """Drop a file from every index."""
+        forward = self._forward.pop(filename, None)
+        if forward is None:
+            return False
+
+        for name, keys in forward.items():
+            table = getattr(self, name)
+            for key in keys:
+                postings = table.get(key)
+                if postings is None:
+                    continue
+                if isinstance(postings, set):
+                    postings.discard(filename)
+                else:
+                    postings.pop(filename, None)
+                if not postings:
+                    del table[key]
+                    if name == "tokens":
+                        self._drop_grams(key)
+        return True
+
+    def _drop_grams(self, token: str):
+        for gram in grams(token):
+            tokens = self._token_grams.get(gram)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._token_grams[gram]
+
+    def _tokens_containing(self, word: str) -> Iterable[str]:
+        """Vocabulary tokens that may contain word (all of them for short words)."""
+        if len(word) < GRAM:
+            return self.tokens.keys()
+        gram_sets = []
+        for gram in grams(word):
+            tokens = self._token_grams.get(gram)
+            if not tokens:
+                return ()
+            gram_sets.append(tokens)
+        gram_sets.sort(key=len)
+        tokens = set(gram_sets[0])
+        for other in gram_sets[1:]:
+            tokens &= other
+            if not tokens:
+                break
+        return tokens
+
+    def match_tags(self, field: str, query: str) -> Dict[str, List[Dict]]:
+        """Find files whose tag keys contain query as a substring.
+
+        Only the (small) key vocabulary is scanned, never the files.
+        """
+        table = getattr(self, QUERY_FIELDS[field])
+        query = query.lower()
+        matches: Dict[str, List[Dict]] = {}
+        for key, postings in table.items():
+            if query in key:
+                for filename, tags in postings.items():
+                    matches.setdefault(filename, []).extend(tags)
+        return matches
+
+    def content_candidates(self, query: str) -> Optional[Set[str]]:
+        """Files that can contain query as a substring, or None if unknown.
+
+        A word run with a non-word character on both sides in the query is a
+        whole token wherever the query occurs, so it is one postings lookup.
+        Only the first and last runs can be cut off by the query's ends;
+        those match token suffixes / prefixes, found through the trigram
+        index over the vocabulary (a scan for words under GRAM characters).
+        Callers still verify against the content.
+        """
+        text = query.lower()
+        exact: List[str] = []
+        partial: List[tuple] = []
+        for match in _TOKEN_RE.finditer(text):
+            bounded_left = match.start() > 0
+            bounded_right = match.end() < len(text)
+            if bounded_left and bounded_right:
+                exact.append(match.group())
+            else:
+                partial.append((match.group(), bounded_left, bounded_right))
+        if not exact and not partial:
+            return None
+
+        candidates: Optional[Set[str]] = None
+        for word in set(exact):
+            files = self.tokens.get(word, set())
+            candidates = set(files) if candidates is None else candidates & files
+            if not candidates:
+                return set()
+
+        for word, bounded_left, bounded_right in partial:
+            files: Set[str] = set()
+            for token in self._tokens_containing(word):
+                if bounded_left:
+                    found = token.startswith(word)
+                elif bounded_right:
+                    found = token.endswith(word)
+                else:
+                    found = word in token
+                if found:
+                    files |= self.tokens[token]
+            candidates = files if candidates is None else candidates & files
+            if not candidates:
+                break
+        return candidates
+
+    def lookup(self, field: str, value: str) -> Set[str]:
+        """Exact (case-insensitive) lookup of files for one field value."""
+        if field not in QUERY_FIELDS:
+            raise ValueError(f"Unknown query field: {field}")
+        postings = getattr(self, QUERY_FIELDS[field]).get(value.lower())
+        if not postings:
+            return set()
+        return set(postings)
+
+    def query(self, criteria: Dict[str, str]) -> Set[str]:
+        """AND together exact lookups, starting from the rarest field."""
+        if not criteria:
+            return set(self._forward)
+
+        sets = sorted((self.lookup(field, value) for field, value in criteria.items()), key=len)
+        result = sets[0]
+        for files in sets[1:]:
+            if not result:
+                break
+            result = result & files
+        return result
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - CHAOS Object Store
+Content-addressed blob storage for CHAOS file versions.
+"""
+
+import hashlib
+import os
+import time
+import zlib
+from typing import Dict, Any, Iterable, Optional
+
+# One-byte blob headers
+_RAW = b"r"
+_ZLIB = b"z"
+
+class ChaosObjectStore:
+    """Blobs named by the SHA-256 of their content.
+
+    Blobs live at ``<root>/<first 2 hex>/<remaining hex>`` and are written
+    once: storing content that already exists only refreshes its mtime, so
+    identical versions share one blob. Blobs nothing points at any more are
+    removed by prune().
+    """
+
+    def __init__(self, root: str, compress: bool = True):
+        self.root = root
+        self.compress = compress
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def digest(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def put(self, content: str) -> Optional[str]:
+        """Store content and return its digest."""
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            try:
+                # Keeps a blob that is being re-referenced out of a concurrent prune
+                os.utime(path)
+                return digest
+            except OSError:
+                pass
+
+        try:
+            blob = _ZLIB + zlib.compress(data) if self.compress else _RAW + data
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+            return digest
+        except Exception as e:
+            print(f"[ChaosObjectStore] Failed to store blob {digest}: {e}")
+            return None
+
+    def get(self, digest: str) -> Optional[str]:
+        """Load the content stored under a digest."""
+        try:
+            with open(self._path(digest), "rb") as f:
+                blob = f.read()
+        except OSError:
+            return None
+
+        header, data = blob[:1], blob[1:]
+        if header == _ZLIB:
+            data = zlib.decompress(data)
+        return data.decode("utf-8")
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Blob count and on-disk size."""
+        count = 0
+        size = 0
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for blob in os.scandir(shard.path):
+                if blob.name.endswith(".tmp"):
+                    continue
+                count += 1
+                size += blob.stat().st_size
+        return {"blobs": count, "stored_bytes": size, "compressed": self.compress}
+
+    def prune(self, keep: Iterable[str], grace_seconds: float = 60.0) -> Dict[str, Any]:
+        """Remove blobs whose digest is not in keep.
+
+        Blobs written or re-stored within grace_seconds are left alone, so a
+        put() racing the caller's snapshot of keep is never undone.
+        """
+        keep = set(keep)
+        cutoff = time.time() - grace_seconds
+        removed = 0
+        freed = 0
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for blob in os.scandir(shard.path):
+                if blob.name.endswith(".tmp") or shard.name + blob.name in keep:
+                    continue
+                try:
+                    stat = blob.stat()
+                    if stat.st_mtime > cutoff:
+                        continue
+                    os.remove(blob.path)
+                except OSError:
+                    continue
+                removed += 1
+                freed += stat.st_size
+        return {"removed": removed, "freed_bytes": freed}
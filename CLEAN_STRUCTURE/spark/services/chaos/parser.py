@@ -4,7 +4,12 @@ EdenOS MCP Server Hub - CHAOS Parser
 Parses CHAOS file format into structured data.
 """
 
-from typing import Dict, Any, List, Optional
+import io
+from typing import Dict, Any, Iterable, List, Optional
+from . import tokenizer
+
+INTENSITIES = ("EXTREME", "HIGH", "MEDIUM", "LOW", "MINIMAL")
+PRESENCES = ("STRONG", "PRESENT", "WEAK")
 
 class ChaosParser:
     """Parses CHAOS file format into structured data."""
@@ -14,77 +19,23 @@ class ChaosParser:
         if not content:
             return None
         
-        lines = content.split('\n')
-        
-        result = {
-            "structured_core": {},
-            "emotive_layer": {
-                "emotions": [],
-                "symbols": [],
-                "relationships": []
-            },
-            "chaosfield_layer": ""
-        }
-        
-        current_section = "structured_core"
-        chaosfield_content = []
-        
-        for line in lines:
-            line = line.strip()
-            
-            if line.startswith("---EMOTIVE_LAYER---"):
-                current_section = "emotive_layer"
-            elif line.startswith("---CHAOSFIELD_LAYER---"):
-                current_section = "chaosfield_layer"
-            elif line.startswith("[EMOTION:"):
-                # Parse emotion tag: [EMOTION:joy:HIGH]
-                parts = line[1:-1].split(':')
-                if len(parts) >= 3:
-                    emotion_type = parts[1]
-                    intensity = parts[2]
-                    result["emotive_layer"]["emotions"].append({
-                        "type": emotion_type,
-                        "intensity": intensity
-                    })
-            elif line.startswith("[SYMBOL:"):
-                # Parse symbol tag: [SYMBOL:fire:STRONG]
-                parts = line[1:-1].split(':')
-                if len(parts) >= 3:
-                    symbol_type = parts[1]
-                    presence = parts[2]
-                    result["emotive_layer"]["symbols"].append({
-                        "type": symbol_type,
-                        "presence": presence
-                    })
-            elif line.startswith("[RELATIONSHIP:"):
-                # Parse relationship tag: [RELATIONSHIP:user:loves:eden]
-                parts = line[1:-1].split(':')
-                if len(parts) >= 4:
-                    source = parts[1]
-                    rel_type = parts[2]
-                    target = parts[3]
-                    result["emotive_layer"]["relationships"].append({
-                        "source": source,
-                        "type": rel_type,
-                        "target": target
-                    })
-            elif current_section == "chaosfield_layer":
-                chaosfield_content.append(line)
-                result["chaosfield_layer"] = "\n".join(chaosfield_content)
-            elif line.startswith('[') and ']:' in line and current_section == "structured_core":
-                key = line[1:line.index(']')]
-                value = line[line.index(']:') + 2:].strip()
-                result["structured_core"][key] = value
-        
-        return result
+        return self.parse_stream(io.StringIO(content))
+    
+    def parse_file(self, path: str, encoding: str = "utf-8") -> Optional[Dict[str, Any]]:
+        """Parse a CHAOS file from disk without loading it as a single string."""
+        with open(path, "r", encoding=encoding) as f:
+            return self.parse_stream(f)
+    
+    def parse_stream(self, stream: Iterable[str]) -> Dict[str, Any]:
+        """Parse a CHAOS document from a text stream or line iterator in one pass."""
+        return tokenizer.parse_document(stream)
     
     def create_emotion_tag(self, emotion_type: str, intensity: str) -> Optional[str]:
         """Create an emotion tag for a CHAOS file."""
         if not emotion_type or not intensity:
             return None
         
-        valid_intensities = ["EXTREME", "HIGH", "MEDIUM", "LOW", "MINIMAL"]
-        if intensity.upper() not in valid_intensities:
+        if intensity.upper() not in INTENSITIES:
             return None
         
         return f"[EMOTION:{emotion_type.upper()}:{intensity.upper()}]"
@@ -94,8 +45,7 @@ class ChaosParser:
         if not symbol_type or not presence:
             return None
         
-        valid_presences = ["STRONG", "PRESENT", "WEAK"]
-        if presence.upper() not in valid_presences:
+        if presence.upper() not in PRESENCES:
             return None
         
         return f"[SYMBOL:{symbol_type.upper()}:{presence.upper()}]"
@@ -112,9 +62,10 @@ class ChaosParser:
         if not tag.startswith('[') or not tag.endswith(']'):
             return None
         
-        content = tag[1:-1]
-        parts = content.split(':')
-        
+        return self._tag_from_parts(tag[1:-1].split(':'))
+    
+    def _tag_from_parts(self, parts: List[str]) -> Optional[Dict[str, Any]]:
+        """Build a tag description from its already-split fields."""
         if len(parts) < 2:
             return None
         
@@ -126,7 +77,7 @@ class ChaosParser:
                     "type": "EMOTION",
                     "emotion_type": parts[1],
                     "intensity": parts[2],
-                    "valid": parts[2].upper() in ["EXTREME", "HIGH", "MEDIUM", "LOW", "MINIMAL"]
+                    "valid": parts[2].upper() in INTENSITIES
                 }
         
         elif tag_type == "SYMBOL":
@@ -135,7 +86,7 @@ class ChaosParser:
                     "type": "SYMBOL",
                     "symbol_type": parts[1],
                     "presence": parts[2],
-                    "valid": parts[2].upper() in ["STRONG", "PRESENT", "WEAK"]
+                    "valid": parts[2].upper() in PRESENCES
                 }
         
         elif tag_type == "RELATIONSHIP":
@@ -153,15 +104,14 @@ class ChaosParser:
     def extract_tags(self, content: str) -> List[Dict[str, Any]]:
         """Extract all tags from CHAOS content."""
         tags = []
-        lines = content.split('\n')
         
-        for line in lines:
+        for line in tokenizer.iter_lines(io.StringIO(content)):
             line = line.strip()
-            if line.startswith('[') and ']' in line:
+            if line.startswith('['):
                 tag_end = line.find(']')
-                tag = line[:tag_end + 1]
-                parsed = self.validate_tag(tag)
-                if parsed:
-                    tags.append(parsed)
+                if tag_end != -1:
+                    parsed = self._tag_from_parts(line[1:tag_end].split(':'))
+                    if parsed:
+                        tags.append(parsed)
         
         return tags
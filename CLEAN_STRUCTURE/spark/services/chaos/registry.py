@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - CHAOS Registry Store
+Crash-safe, debounced persistence for the CHAOS file registry.
+
+Every mutation is appended to a change log (one JSON line per change) and
+fsynced before record() returns. The full registry snapshot is rewritten at
+most once per flush window, via a temp file and ``os.replace``, after which
+the log is truncated. Loading replays the log over the last snapshot, so a
+crash at any point loses nothing that reached the log.
+
+Each entry is serialized once, when its change is recorded, and snapshots
+are assembled from those serialized entries. The snapshot timer therefore
+never reads the live registry while the caller's thread mutates it.
+"""
+
+import atexit
+import json
+import os
+import threading
+from typing import Dict, Any, Optional
+
+class ChaosRegistryStore:
+    """Snapshot + append-only change log for a filename -> entry registry."""
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        self.path = path
+        self.log_path = path + ".log"
+        self.flush_interval = flush_interval
+
+        self._registry: Dict[str, Dict[str, Any]] = {}
+        # filename -> JSON of its entry as of its last record()
+        self._serialized: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._log = None
+        self._timer: Optional[threading.Timer] = None
+        self._pending = 0
+        self.stats = {"changes": 0, "snapshots": 0, "replayed": 0}
+
+        atexit.register(self.close)
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Load the snapshot, replay the change log over it and return the registry.
+
+        The returned dict is the live registry; report changes to it with
+        record().
+        """
+        with self._lock:
+            registry = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        registry = json.load(f)
+                except Exception as e:
+                    print(f"[ChaosRegistryStore] Failed to load snapshot: {e}")
+
+            replayed = 0
+            if os.path.exists(self.log_path):
+                with open(self.log_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            change = json.loads(line)
+                        except ValueError:
+                            # Torn write from a crash; it was never applied
+                            continue
+                        if change.get("entry") is None:
+                            registry.pop(change["filename"], None)
+                        else:
+                            registry[change["filename"]] = change["entry"]
+                        replayed += 1
+
+            self._registry = registry
+            self._serialized = {
+                filename: json.dumps(entry, separators=(",", ":"))
+                for filename, entry in registry.items()
+            }
+            self.stats["replayed"] = replayed
+            if replayed:
+                # Fold the recovered changes into a fresh snapshot
+                self._write_snapshot()
+            return registry
+
+    def record(self, filename: str):
+        """Log the current state of one registry entry and schedule a snapshot."""
+        entry = self._registry.get(filename)
+        serialized = None if entry is None else json.dumps(entry, separators=(",", ":"))
+        line = '{"filename":%s,"entry":%s}\n' % (json.dumps(filename), serialized or "null")
+        with self._lock:
+            if serialized is None:
+                self._serialized.pop(filename, None)
+            else:
+                self._serialized[filename] = serialized
+            if self._log is None:
+                self._log = open(self.log_path, "a+", encoding="utf-8")
+                if self._log.tell():
+                    # Terminate a torn last line so the next record stays parseable
+                    self._log.seek(self._log.tell() - 1)
+                    if self._log.read(1) != "\n":
+                        self._log.write("\n")
+            self._log.write(line)
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._pending += 1
+            self.stats["changes"] += 1
+
+            if self.flush_interval <= 0:
+                self._write_snapshot()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write a snapshot now if there are unsnapshotted changes."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending:
+                self._write_snapshot()
+
+    def _serialize(self) -> str:
+        # Called with the lock held
+        return "{" + ",".join(
+            f"{json.dumps(filename)}:{entry}" for filename, entry in self._serialized.items()
+        ) + "}"
+
+    def _write_snapshot(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            data = self._serialize()
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[ChaosRegistryStore] Failed to write snapshot: {e}")
+            return
+
+        # The snapshot now covers every logged change
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        open(self.log_path, "w").close()
+        self._pending = 0
+        self.stats["snapshots"] += 1
+
+    def close(self):
+        """Flush pending changes and release the log file."""
+        self.flush()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+        atexit.unregister(self.close)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Change, snapshot and recovery counters."""
+        with self._lock:
+            return {**self.stats, "pending": self._pending, "entries": len(self._registry)}
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - CHAOS Similarity
+MinHash signatures and an LSH index for nearest-neighbour file lookups.
+"""
+
+import hashlib
+import random
+from typing import Dict, Any, List, Set, Tuple
+from .index import tokenize
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Mersenne prime for the (a * x + b) mod p hash family
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Fixed seed so signatures are stable across processes
+_rng = random.Random(0x0C4A05)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+def features(parsed: Dict[str, Any]) -> Set[str]:
+    """Emotion, symbol, relationship and chaosfield token features of a file."""
+    emotive = parsed.get("emotive_layer", {})
+    result = set()
+    for emotion in emotive.get("emotions", []):
+        result.add("e:" + emotion["type"].lower())
+    for symbol in emotive.get("symbols", []):
+        result.add("s:" + symbol["type"].lower())
+    for rel in emotive.get("relationships", []):
+        result.add(f"r:{rel['source'].lower()}:{rel['type'].lower()}:{rel['target'].lower()}")
+    for token in tokenize(parsed.get("chaosfield_layer", "")):
+        result.add("t:" + token)
+    return result
+
+def minhash(feature_set: Set[str]) -> Tuple[int, ...]:
+    """MinHash signature of a feature set (NUM_PERM slots)."""
+    if not feature_set:
+        return (_MAX_HASH,) * NUM_PERM
+    hashes = [
+        int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest(), "little")
+        for feature in feature_set
+    ]
+    return tuple(
+        min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH
+        for a, b in _PERMUTATIONS
+    )
+
+class ChaosSimilarityIndex:
+    """LSH buckets over MinHash signatures.
+
+    Signatures are split into BANDS bands of ROWS slots; files sharing any
+    band land in the same bucket and become candidates, which are then
+    ranked by estimated Jaccard similarity (fraction of equal slots).
+    """
+
+    def __init__(self):
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        # (band number, band slots) -> filenames
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self._signatures
+
+    @staticmethod
+    def _bands(signature: Tuple[int, ...]):
+        for band in range(BANDS):
+            yield band, signature[band * ROWS:(band + 1) * ROWS]
+
+    def add(self, filename: str, parsed: Dict[str, Any]):
+        """Index a parsed file, replacing any previous entry for it."""
+        self.remove(filename)
+        feature_set = features(parsed)
+        signature = minhash(feature_set)
+        self._signatures[filename] = signature
+        if not feature_set:
+            # Featureless files would all collide; keep them out of the buckets
+            return
+        for key in self._bands(signature):
+            self._buckets.setdefault(key, set()).add(filename)
+
+    def remove(self, filename: str) -> bool:
+        """Drop a file from the LSH buckets."""
+        signature = self._signatures.pop(filename, None)
+        if signature is None:
+            return False
+        for key in self._bands(signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(filename)
+                if not bucket:
+                    del self._buckets[key]
+        return True
+
+    @staticmethod
+    def estimate(sig1: Tuple[int, ...], sig2: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(1 for x, y in zip(sig1, sig2) if x == y) / NUM_PERM
+
+    def find_similar(self, filename: str, k: int = 10) -> List[Dict[str, Any]]:
+        """Top-k LSH candidates for a file, most similar first."""
+        signature = self._signatures.get(filename)
+        if signature is None:
+            return []
+
+        candidates = set()
+        for key in self._bands(signature):
+            candidates.update(self._buckets.get(key, ()))
+        candidates.discard(filename)
+
+        scored = [(self.estimate(signature, self._signatures[other]), other) for other in candidates]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [{"filename": other, "similarity": score} for score, other in scored[:k]]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index size summary."""
+        return {
+            "files": len(self._signatures),
+            "buckets": len(self._buckets),
+            "num_perm": NUM_PERM,
+            "bands": BANDS
+        }
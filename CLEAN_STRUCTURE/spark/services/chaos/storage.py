@@ -5,26 +5,123 @@ Handles file I/O operations for CHAOS files.
 """
 
 import os
-from typing import Dict, Any, List, Optional
+import time
+from collections import Counter
+from typing import Dict, Any, List, Optional, Set
+from .objects import ChaosObjectStore
+from .registry import ChaosRegistryStore
+
+OBJECTS_DIR = ".objects"
 
 class ChaosStorage:
     """Handles file I/O operations for CHAOS files."""
     
-    def __init__(self, chaos_dir: str = "chaos_files"):
+    def __init__(self, chaos_dir: str = "chaos_files", compress: bool = True):
         self.chaos_dir = chaos_dir
         os.makedirs(chaos_dir, exist_ok=True)
+        
+        # Backups are pointers into a content-addressed object store
+        objects_dir = os.path.join(chaos_dir, OBJECTS_DIR)
+        self.objects = ChaosObjectStore(objects_dir, compress)
+        versions_file = os.path.join(objects_dir, "versions.json")
+        migrate = not os.path.exists(versions_file)
+        self._versions_store = ChaosRegistryStore(versions_file)
+        # filename -> {"backups": [{"suffix", "digest", "size", "created_at"}, ...]}
+        self._versions = self._versions_store.load()
+        if migrate:
+            self._migrate_legacy_backups()
+        
+        # Listing cache: filename -> size, valid while the directory mtime matches
+        self._listing: Optional[Dict[str, int]] = None
+        self._listing_mtime_ns = None
+        self._sorted_files: Optional[List[str]] = None
+        self._total_size = 0
+        self._ext_counts: Counter = Counter()
+        self._ext_sizes: Counter = Counter()
+    
+    def _dir_mtime_ns(self) -> Optional[int]:
+        try:
+            return os.stat(self.chaos_dir).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _rescan(self):
+        """Rebuild the listing and counters in a single os.scandir pass."""
+        mtime_ns = self._dir_mtime_ns()
+        self._listing = {}
+        self._total_size = 0
+        self._ext_counts = Counter()
+        self._ext_sizes = Counter()
+        self._sorted_files = None
+        with os.scandir(self.chaos_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    size = entry.stat().st_size
+                except OSError:
+                    continue
+                self._count_file(entry.name, size, 1)
+        self._listing_mtime_ns = mtime_ns
+    
+    def _count_file(self, filename: str, size: int, sign: int):
+        ext = os.path.splitext(filename)[1].lower()
+        if sign > 0:
+            self._listing[filename] = size
+        else:
+            del self._listing[filename]
+        self._total_size += sign * size
+        self._ext_counts[ext] += sign
+        self._ext_sizes[ext] += sign * size
+        if not self._ext_counts[ext]:
+            del self._ext_counts[ext]
+            del self._ext_sizes[ext]
+    
+    def _ensure_listing(self):
+        """Rescan only if the directory changed behind our back."""
+        if self._listing is None or self._dir_mtime_ns() != self._listing_mtime_ns:
+            self._rescan()
+    
+    def _track_write(self, filename: str, write):
+        """Run a write/remove of one file, keeping the listing counters current."""
+        tracked = (
+            self._listing is not None
+            and os.path.dirname(filename) == ""
+            and not filename.startswith('.')
+            and self._dir_mtime_ns() == self._listing_mtime_ns
+        )
+        write()
+        if not tracked:
+            self._listing = None
+            return
+        
+        if filename in self._listing:
+            self._count_file(filename, self._listing[filename], -1)
+        else:
+            self._sorted_files = None
+        stat = self.stat(filename)
+        if stat is not None:
+            self._count_file(filename, stat.st_size, 1)
+        else:
+            self._sorted_files = None
+        self._listing_mtime_ns = self._dir_mtime_ns()
     
     def save(self, filename: str, content: str) -> bool:
         """Save CHAOS file to disk."""
         if not filename or not content:
             return False
         
-        try:
-            filepath = os.path.join(self.chaos_dir, filename)
-            with open(filepath, "w", encoding="utf-8") as f:
+        def write():
+            with open(os.path.join(self.chaos_dir, filename), "w", encoding="utf-8") as f:
                 f.write(content)
+        
+        try:
+            self._track_write(filename, write)
             return True
         except Exception as e:
+            self._listing = None
             print(f"[ChaosStorage] Failed to save {filename}: {e}")
             return False
     
@@ -48,12 +145,16 @@ class ChaosStorage:
         if not filename:
             return False
         
-        try:
+        def remove():
             filepath = os.path.join(self.chaos_dir, filename)
             if os.path.exists(filepath):
                 os.remove(filepath)
+        
+        try:
+            self._track_write(filename, remove)
             return True
         except Exception as e:
+            self._listing = None
             print(f"[ChaosStorage] Failed to delete {filename}: {e}")
             return False
     
@@ -65,15 +166,23 @@ class ChaosStorage:
         filepath = os.path.join(self.chaos_dir, filename)
         return os.path.exists(filepath)
     
+    def stat(self, filename: str) -> Optional[os.stat_result]:
+        """Stat a CHAOS file, or None if it does not exist."""
+        if not filename:
+            return None
+        
+        try:
+            return os.stat(os.path.join(self.chaos_dir, filename))
+        except OSError:
+            return None
+    
     def list_files(self) -> List[str]:
         """List all CHAOS files."""
         try:
-            files = []
-            for filename in os.listdir(self.chaos_dir):
-                filepath = os.path.join(self.chaos_dir, filename)
-                if os.path.isfile(filepath) and not filename.startswith('.'):
-                    files.append(filename)
-            return sorted(files)
+            self._ensure_listing()
+            if self._sorted_files is None:
+                self._sorted_files = sorted(self._listing)
+            return list(self._sorted_files)
         except Exception as e:
             print(f"[ChaosStorage] Failed to list files: {e}")
             return []
@@ -100,6 +209,42 @@ class ChaosStorage:
             print(f"[ChaosStorage] Failed to get file info for {filename}: {e}")
             return None
     
+    def _add_backup(self, filename: str, suffix: str, content: str) -> bool:
+        """Point a backup suffix at the blob holding content."""
+        digest = self.objects.put(content)
+        if digest is None:
+            return False
+        
+        entry = self._versions.setdefault(filename, {"backups": []})
+        entry["backups"] = [b for b in entry["backups"] if b["suffix"] != suffix]
+        entry["backups"].append({
+            "suffix": suffix,
+            "digest": digest,
+            "size": len(content.encode("utf-8")),
+            "created_at": time.time()
+        })
+        self._versions_store.record(filename)
+        return True
+    
+    def _migrate_legacy_backups(self):
+        """Move <name>.backup.<suffix> copies from older versions into the object store."""
+        try:
+            for entry in os.scandir(self.chaos_dir):
+                if not entry.is_file() or ".backup." not in entry.name:
+                    continue
+                filename, suffix = entry.name.rsplit(".backup.", 1)
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    content = f.read()
+                if self._add_backup(filename, suffix, content):
+                    os.remove(entry.path)
+            self._versions_store.flush()
+        except Exception as e:
+            print(f"[ChaosStorage] Failed to migrate legacy backups: {e}")
+    
+    def close(self):
+        """Write the backup index snapshot and release its change log."""
+        self._versions_store.close()
+    
     def backup_file(self, filename: str, backup_suffix: str = None) -> bool:
         """Create a backup of a CHAOS file."""
         if not filename:
@@ -109,20 +254,26 @@ class ChaosStorage:
         if not content:
             return False
         
-        import time
         if backup_suffix is None:
             backup_suffix = str(int(time.time()))
         
-        backup_filename = f"{filename}.backup.{backup_suffix}"
-        return self.save(backup_filename, content)
+        return self._add_backup(filename, backup_suffix, content)
+    
+    def _find_backup(self, filename: str, backup_suffix: str) -> Optional[Dict[str, Any]]:
+        for backup in self._versions.get(filename, {}).get("backups", []):
+            if backup["suffix"] == backup_suffix:
+                return backup
+        return None
     
     def restore_file(self, filename: str, backup_suffix: str) -> bool:
         """Restore a CHAOS file from backup."""
         if not filename or not backup_suffix:
             return False
         
-        backup_filename = f"{filename}.backup.{backup_suffix}"
-        content = self.load(backup_filename)
+        backup = self._find_backup(filename, backup_suffix)
+        if backup is None:
+            return False
+        content = self.objects.get(backup["digest"])
         if not content:
             return False
         
@@ -133,18 +284,20 @@ class ChaosStorage:
         if not filename:
             return []
         
-        try:
-            backup_prefix = f"{filename}.backup."
-            backups = []
-            
-            for existing_file in os.listdir(self.chaos_dir):
-                if existing_file.startswith(backup_prefix):
-                    backups.append(existing_file)
-            
-            return sorted(backups, reverse=True)  # Most recent first
-        except Exception as e:
-            print(f"[ChaosStorage] Failed to list backups for {filename}: {e}")
-            return []
+        backups = [
+            f"{filename}.backup.{backup['suffix']}"
+            for backup in self._versions.get(filename, {}).get("backups", [])
+        ]
+        return sorted(backups, reverse=True)  # Most recent first
+    
+    def backup_digests(self) -> Set[str]:
+        """Every blob digest referenced by a backup."""
+        return {b["digest"] for entry in self._versions.values() for b in entry["backups"]}
+    
+    def get_backup_info(self, filename: str) -> List[Dict[str, Any]]:
+        """Backup records (suffix, digest, size, created_at) for a CHAOS file, most recent first."""
+        backups = self._versions.get(filename, {}).get("backups", [])
+        return sorted(backups, key=lambda b: b["suffix"], reverse=True)
     
     def export_file(self, filename: str, export_path: str) -> bool:
         """Export CHAOS file to external location."""
@@ -185,17 +338,13 @@ class ChaosStorage:
         """Get storage statistics."""
         try:
             files = self.list_files()
-            total_size = 0
-            file_count = len(files)
-            
-            for filename in files:
-                info = self.get_file_info(filename)
-                if info:
-                    total_size += info["size"]
-            
             return {
-                "file_count": file_count,
-                "total_size": total_size,
+                "file_count": len(files),
+                "total_size": self._total_size,
+                "extensions": {
+                    ext or "(none)": {"count": count, "size": self._ext_sizes[ext]}
+                    for ext, count in sorted(self._ext_counts.items())
+                },
                 "storage_dir": self.chaos_dir,
                 "files": files
             }
@@ -204,6 +353,7 @@ class ChaosStorage:
             return {
                 "file_count": 0,
                 "total_size": 0,
+                "extensions": {},
                 "storage_dir": self.chaos_dir,
                 "files": []
             }
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - CHAOS Tokenizer
+Single-pass streaming tokenizer and parser for the CHAOS file format.
+
+This module is the one CHAOS parser shared by the spark CHAOS engine, the
+hub monolith and the chaos tools, so it must stay dependency-free and
+importable on its own.
+
+Both chaosfield syntaxes are accepted: a ``---CHAOSFIELD_LAYER---`` marker
+that runs to the end of the document, and, in documents without section
+markers, a ``{ ... }`` block opened by a line starting with ``{`` and
+closed by a line starting with ``}``.
+"""
+
+import io
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Tuple, Union
+
+# Token kinds
+EMOTION = "EMOTION"
+SYMBOL = "SYMBOL"
+RELATIONSHIP = "RELATIONSHIP"
+CORE = "CORE"
+SECTION = "SECTION"
+CHAOSFIELD = "CHAOSFIELD"
+
+# Section markers
+EMOTIVE_MARKER = "---EMOTIVE_LAYER---"
+CHAOSFIELD_MARKER = "---CHAOSFIELD_LAYER---"
+
+class ChaosToken(NamedTuple):
+    """A typed event emitted by the tokenizer.
+
+    ``fields`` holds the tag fields (type/intensity, source/type/target, or
+    key/value) for tags, the section name for SECTION tokens and the stripped
+    line for CHAOSFIELD chunks.
+    """
+    kind: str
+    fields: Tuple[str, ...]
+    line_no: int
+
+def iter_lines(stream: Iterable[str]) -> Iterator[str]:
+    """Yield lines with the same boundaries as ``content.split('\\n')``.
+
+    Accepts any line iterator (an open file, ``io.StringIO``, a list of
+    lines) so large documents never have to be held as one list.
+    """
+    ended_with_newline = True
+    for raw in stream:
+        ended_with_newline = raw.endswith("\n")
+        yield raw[:-1] if ended_with_newline else raw
+    if ended_with_newline:
+        yield ""
+
+def tokenize(stream: Iterable[str]) -> Iterator[ChaosToken]:
+    """Tokenize a CHAOS document in one linear pass.
+
+    Tag lines are recognised by prefix and split exactly once. Tags are
+    honoured in every section, core ``[key]: value`` lines only before the
+    first section marker or brace block, and any other chaosfield line
+    becomes a chunk.
+
+    Brace blocks are only chaosfield syntax in documents without section
+    markers; in a marker document a line starting with ``{`` is ordinary
+    text, as it always was. Lines from the first brace line on are held
+    back until a marker or the end of the document settles which syntax
+    the document uses, so a marker-free brace document is buffered from
+    its first ``{`` while marker documents stream as before.
+    """
+    state = {"section": "structured_core", "in_block": False}
+    held = []
+
+    for line_no, line in enumerate(iter_lines(stream), 1):
+        line = line.strip()
+        if held is None:
+            yield from _scan_line(line, line_no, state, False)
+        elif line.startswith(EMOTIVE_MARKER) or line.startswith(CHAOSFIELD_MARKER):
+            # A marker document: replay anything held back as plain lines
+            for held_no, held_line in held:
+                yield from _scan_line(held_line, held_no, state, False)
+            held = None
+            yield from _scan_line(line, line_no, state, False)
+        elif held or line.startswith("{"):
+            held.append((line_no, line))
+        else:
+            yield from _scan_line(line, line_no, state, False)
+
+    # No marker turned up: held lines use brace syntax
+    for held_no, held_line in held or ():
+        yield from _scan_line(held_line, held_no, state, True)
+
+def _scan_line(line: str, line_no: int, state: Dict[str, Any], braces: bool) -> Iterator[ChaosToken]:
+    """Tokens for one stripped line, advancing the section state."""
+    section = state["section"]
+
+    if state["in_block"] and line.startswith("}"):
+        state["in_block"] = False
+        state["section"] = "emotive_layer"
+        yield ChaosToken(SECTION, ("emotive_layer",), line_no)
+    elif braces and line.startswith("{") and section != "chaosfield_layer":
+        # Brace-delimited chaosfield; text on the opening line is kept
+        body = line[1:]
+        closed = body.endswith("}")
+        if closed:
+            body = body[:-1]
+        yield ChaosToken(SECTION, ("chaosfield_layer",), line_no)
+        if body.strip():
+            yield ChaosToken(CHAOSFIELD, (body.strip(),), line_no)
+        if closed:
+            state["section"] = "emotive_layer"
+            yield ChaosToken(SECTION, ("emotive_layer",), line_no)
+        else:
+            state["section"] = "chaosfield_layer"
+            state["in_block"] = True
+    elif line.startswith(EMOTIVE_MARKER):
+        state["section"] = "emotive_layer"
+        yield ChaosToken(SECTION, ("emotive_layer",), line_no)
+    elif line.startswith(CHAOSFIELD_MARKER):
+        state["section"] = "chaosfield_layer"
+        yield ChaosToken(SECTION, ("chaosfield_layer",), line_no)
+    elif line.startswith("[EMOTION:"):
+        # [EMOTION:joy:HIGH]
+        parts = line[1:-1].split(":")
+        if len(parts) >= 3:
+            yield ChaosToken(EMOTION, (parts[1], parts[2]), line_no)
+    elif line.startswith("[SYMBOL:"):
+        # [SYMBOL:fire:STRONG]
+        parts = line[1:-1].split(":")
+        if len(parts) >= 3:
+            yield ChaosToken(SYMBOL, (parts[1], parts[2]), line_no)
+    elif line.startswith("[RELATIONSHIP:"):
+        # [RELATIONSHIP:user:loves:eden]
+        parts = line[1:-1].split(":")
+        if len(parts) >= 4:
+            yield ChaosToken(RELATIONSHIP, (parts[1], parts[2], parts[3]), line_no)
+    elif section == "chaosfield_layer":
+        yield ChaosToken(CHAOSFIELD, (line,), line_no)
+    elif section == "structured_core" and line.startswith("["):
+        key_end = line.find("]:")
+        if key_end != -1:
+            key = line[1:line.index("]")]
+            yield ChaosToken(CORE, (key, line[key_end + 2:].strip()), line_no)
+
+def parse_document(source: Union[str, Iterable[str]]) -> Dict[str, Any]:
+    """Parse a CHAOS document (a string or a line iterator) into structured data."""
+    if isinstance(source, str):
+        source = io.StringIO(source)
+
+    emotions = []
+    symbols = []
+    relationships = []
+    structured_core = {}
+    chaosfield_content = []
+
+    for kind, fields, _ in tokenize(source):
+        if kind == CHAOSFIELD:
+            chaosfield_content.append(fields[0])
+        elif kind == EMOTION:
+            emotions.append({"type": fields[0], "intensity": fields[1]})
+        elif kind == SYMBOL:
+            symbols.append({"type": fields[0], "presence": fields[1]})
+        elif kind == RELATIONSHIP:
+            relationships.append({"source": fields[0], "type": fields[1], "target": fields[2]})
+        elif kind == CORE:
+            structured_core[fields[0]] = fields[1]
+
+    return {
+        "structured_core": structured_core,
+        "emotive_layer": {
+            "emotions": emotions,
+            "symbols": symbols,
+            "relationships": relationships
+        },
+        "chaosfield_layer": "\n".join(chaosfield_content)
+    }
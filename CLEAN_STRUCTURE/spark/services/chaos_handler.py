@@ -28,6 +28,10 @@ def analyze_chaos_file(filename: str):
     """Analyze a CHAOS file."""
     return chaos_engine.analyze_file(filename)
 
+def analyze_chaos_files(filenames="*", workers: int = None):
+    """Analyze many CHAOS files with corpus aggregates."""
+    return chaos_engine.analyze_files(filenames, workers)
+
 def list_chaos_files():
     """List all CHAOS files with registry info."""
     return chaos_engine.list_files()
@@ -51,3 +55,39 @@ def create_relationship_tag(source: str, relationship_type: str, target: str):
 def search_chaos_files(query: str, search_type: str = "content"):
     """Search CHAOS files."""
     return chaos_engine.search_files(query, search_type)
+
+def query_chaos_files(criteria: dict):
+    """Find CHAOS files matching every criterion."""
+    return chaos_engine.query_files(criteria)
+
+def get_relationship_neighbors(entity: str, direction: str = "out", rel_type: str = None):
+    """Direct neighbors of an entity across all CHAOS files."""
+    return chaos_engine.get_relationship_neighbors(entity, direction, rel_type)
+
+def traverse_relationships(entity: str, k: int = 2, direction: str = "out", rel_type: str = None):
+    """Entities within k hops of an entity across all CHAOS files."""
+    return chaos_engine.traverse_relationships(entity, k, direction, rel_type)
+
+def get_chaos_corpus_statistics():
+    """Vectorized emotion/symbol statistics over every CHAOS file."""
+    return chaos_engine.get_corpus_statistics()
+
+def chaos_similarity_matrix(filenames: list = None):
+    """Pairwise similarity scores for CHAOS files (all files if none given)."""
+    return chaos_engine.similarity_matrix(filenames)
+
+def find_similar_chaos_files(filename: str, k: int = 10):
+    """Top-k CHAOS files most similar to a given file."""
+    return chaos_engine.find_similar(filename, k)
+
+def get_chaos_file_version(filename: str, version: int):
+    """Content of a CHAOS file as of a given version."""
+    return chaos_engine.get_version(filename, version)
+
+def diff_chaos_file_versions(filename: str, version_a: int, version_b: int):
+    """Unified diff between two versions of a CHAOS file."""
+    return chaos_engine.diff_versions(filename, version_a, version_b)
+
+def prune_chaos_objects():
+    """Remove stored versions and backups no CHAOS file refers to any more."""
+    return chaos_engine.prune_objects()
@@ -7,8 +7,14 @@ Manages context window memory system with persistence and merging.
 import json
 import os
 import time
-from typing import Dict, Any, List, Optional
-from collections import deque
+from typing import Dict, Any, List, Optional, Set
+from collections import deque, Counter
+
+# Rough characters-per-token ratio used by the approximate tokenizer
+CHARS_PER_TOKEN = 4
+# Omitted spans are described by the headlines of their first few entries
+HEADLINE_CHARS = 80
+SPAN_HEADLINES = 3
 
 class ContextEngine:
     """Manages context window memory system."""
@@ -29,6 +35,15 @@ class ContextEngine:
             "window_size": max_window_size
         }
         
+        # Per-entry token estimates (keyed by object identity, since stored ids
+        # are not guaranteed unique) and running aggregates for budgeted retrieval
+        self._token_counts: Dict[int, int] = {}
+        # One-line headline per entry (same keys), computed when it is added
+        self._headlines: Dict[int, str] = {}
+        self._total_tokens = 0
+        self._source_counts: Counter = Counter()
+        self._type_counts: Counter = Counter()
+        
         # Load existing context
         self._load_context()
     
@@ -79,6 +94,74 @@ class ContextEngine:
         except Exception as e:
             print(f"[ContextEngine] Failed to load context: {e}")
             self._window = deque(maxlen=self.max_window_size)
+        
+        self._reindex()
+    
+    @staticmethod
+    def _entry_text(context_entry: Dict[str, Any]) -> str:
+        """Render an entry as the text an LLM client would see."""
+        entry = context_entry.get("entry", {})
+        entry_type = entry.get("type")
+        
+        if entry_type == "text":
+            return str(entry.get("content", ""))
+        if entry_type == "query_response":
+            return f"Q: {entry.get('query', '')}\nA: {entry.get('response', '')}"
+        if entry_type == "event":
+            return f"{entry.get('event_type', '')}: {json.dumps(entry.get('details', {}))}"
+        return json.dumps(entry)
+    
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Approximate token count (about four characters per token)."""
+        return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+    
+    def _entry_tokens(self, context_entry: Dict[str, Any]) -> int:
+        """Get the cached token estimate for an entry."""
+        key = id(context_entry)
+        tokens = self._token_counts.get(key)
+        if tokens is None:
+            tokens = self.estimate_tokens(self._entry_text(context_entry))
+            self._token_counts[key] = tokens
+        return tokens
+    
+    def _entry_headline(self, context_entry: Dict[str, Any]) -> str:
+        """Get the cached one-line headline for an entry."""
+        key = id(context_entry)
+        headline = self._headlines.get(key)
+        if headline is None:
+            entry = context_entry.get("entry", {})
+            if entry.get("type") == "event":
+                headline = str(entry.get("event_type", ""))
+            else:
+                text = self._entry_text(context_entry).strip()
+                headline = text.split("\n", 1)[0]
+            if len(headline) > HEADLINE_CHARS:
+                headline = headline[:HEADLINE_CHARS - 3] + "..."
+            self._headlines[key] = headline
+        return headline
+    
+    def _index_entry(self, context_entry: Dict[str, Any], sign: int = 1):
+        """Add (sign=1) or remove (sign=-1) an entry from the running aggregates."""
+        tokens = self._entry_tokens(context_entry)
+        self._total_tokens += sign * tokens
+        self._source_counts[context_entry.get("source", "unknown")] += sign
+        self._type_counts[context_entry.get("entry", {}).get("type", "unknown")] += sign
+        if sign > 0:
+            self._entry_headline(context_entry)
+        else:
+            self._token_counts.pop(id(context_entry), None)
+            self._headlines.pop(id(context_entry), None)
+    
+    def _reindex(self):
+        """Rebuild the running aggregates after a bulk change to the window."""
+        self._token_counts = {}
+        self._headlines = {}
+        self._total_tokens = 0
+        self._source_counts = Counter()
+        self._type_counts = Counter()
+        for context_entry in self._window:
+            self._index_entry(context_entry)
     
     def _save_context(self) -> bool:
         """Save context to file."""
@@ -114,7 +197,12 @@ class ContextEngine:
             "entry": entry
         }
         
+        # The deque drops its oldest entry when full; keep the aggregates in step
+        if len(self._window) == self._window.maxlen:
+            self._index_entry(self._window[0], -1)
+        
         self._window.append(context_entry)
+        self._index_entry(context_entry)
         self._metadata["updated_at"] = time.time()
         
         # Emit context entry added event
@@ -242,6 +330,7 @@ class ContextEngine:
     def clear_window(self) -> bool:
         """Clear the context window."""
         self._window.clear()
+        self._reindex()
         self._metadata["updated_at"] = time.time()
         
         return self._save_context()
@@ -253,6 +342,7 @@ class ContextEngine:
         
         old_window = list(self._window)
         self._window = deque(old_window[-new_size:], maxlen=new_size)
+        self._reindex()
         self.max_window_size = new_size
         self._metadata["window_size"] = new_size
         self._metadata["updated_at"] = time.time()
@@ -316,6 +406,7 @@ class ContextEngine:
                     if entry.get("id") not in existing_ids:
                         self._window.append(entry)
             
+            self._reindex()
             self._metadata["updated_at"] = time.time()
             return self._save_context()
             
@@ -323,6 +414,105 @@ class ContextEngine:
             print(f"[ContextEngine] Failed to import context: {e}")
             return False
     
+    def get_context_for_budget(self, max_tokens: int, strategy: str = "recent",
+                               query: Optional[str] = None) -> Dict[str, Any]:
+        """Pack entries into an approximate token budget.
+        
+        "recent" takes the newest entries that fit; "relevant" ranks entries by
+        how many query terms they contain (newest first on ties). Entries are
+        returned oldest first, followed by a summary of everything left out:
+        totals by source and type, and each contiguous span of omitted
+        entries with its time range, size and the headlines of its first
+        entries.
+        """
+        if strategy not in ("recent", "relevant"):
+            raise ValueError(f"Unknown budget strategy: {strategy}")
+        
+        if strategy == "relevant" and query:
+            # Relevance needs a full scan; rank (score, position) pairs
+            terms = set(query.lower().split())
+            scored = []
+            for position, context_entry in enumerate(self._window):
+                text = self._entry_text(context_entry).lower()
+                score = sum(1 for term in terms if term in text)
+                if score:
+                    scored.append((score, position, context_entry))
+            scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+            candidates = [(position, context_entry) for _, position, context_entry in scored]
+        else:
+            # Walk newest to oldest without materializing the window
+            last = len(self._window) - 1
+            candidates = ((last - offset, context_entry)
+                          for offset, context_entry in enumerate(reversed(self._window)))
+        
+        selected = []
+        tokens_used = 0
+        for position, context_entry in candidates:
+            tokens = self._entry_tokens(context_entry)
+            if tokens_used + tokens > max_tokens:
+                # Recency packing keeps a contiguous tail; stop at the first miss
+                if strategy == "recent":
+                    break
+                continue
+            selected.append((position, context_entry))
+            tokens_used += tokens
+        
+        selected.sort(key=lambda item: item[0])
+        entries = [context_entry for _, context_entry in selected]
+        
+        return {
+            "entries": entries,
+            "count": len(entries),
+            "tokens_used": tokens_used,
+            "max_tokens": max_tokens,
+            "strategy": strategy,
+            "omitted": self._summarize_omitted(entries, tokens_used)
+        }
+    
+    def _summarize_omitted(self, included: List[Dict[str, Any]], included_tokens: int) -> Dict[str, Any]:
+        """Summarize entries left out of a budgeted window from the running aggregates."""
+        omitted_count = len(self._window) - len(included)
+        if omitted_count <= 0:
+            return {"count": 0}
+        
+        sources = self._source_counts.copy()
+        types = self._type_counts.copy()
+        for context_entry in included:
+            sources[context_entry.get("source", "unknown")] -= 1
+            types[context_entry.get("entry", {}).get("type", "unknown")] -= 1
+        
+        return {
+            "count": omitted_count,
+            "tokens": self._total_tokens - included_tokens,
+            "sources": {k: v for k, v in sources.items() if v > 0},
+            "types": {k: v for k, v in types.items() if v > 0},
+            "spans": self._omitted_spans({id(context_entry) for context_entry in included})
+        }
+    
+    def _omitted_spans(self, included_ids: Set[int]) -> List[Dict[str, Any]]:
+        """Describe each run of consecutive omitted entries from the cached headlines."""
+        spans = []
+        run: List[Dict[str, Any]] = []
+        for context_entry in list(self._window) + [None]:
+            if context_entry is not None and id(context_entry) not in included_ids:
+                run.append(context_entry)
+                continue
+            if not run:
+                continue
+            headlines = [self._entry_headline(e) for e in run[:SPAN_HEADLINES]]
+            summary = "; ".join(headlines)
+            if len(run) > SPAN_HEADLINES:
+                summary += f" (+{len(run) - SPAN_HEADLINES} more)"
+            spans.append({
+                "from": run[0].get("timestamp"),
+                "to": run[-1].get("timestamp"),
+                "count": len(run),
+                "tokens": sum(self._entry_tokens(e) for e in run),
+                "summary": summary
+            })
+            run = []
+        return spans
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Get detailed statistics about the context window."""
         if not self._window:
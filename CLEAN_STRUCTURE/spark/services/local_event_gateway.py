@@ -4,7 +4,8 @@ Local Event Gateway (LEG)
 Bridges Eden's internal event bus <-> external local agents via WebSocket.
 
 - Subscribes to hub.event_bus "system_event" and broadcasts to all connected clients.
-- Accepts messages from agents and re-emits into Eden via hub.emit(...).
+- Accepts messages from agents and re-emits into Eden via hub.emit(...),
+  subject to the agent's "intent" rate limit in AgentTrustEngine.
 - Local-only by default (127.0.0.1).
 """
 
@@ -20,6 +21,8 @@ except ImportError as e:
         "Install with: pip install websockets\n"
     ) from e
 
+from agent_trust_engine import agent_trust_engine
+
 
 class LocalEventGateway:
     def __init__(self, host: str = "127.0.0.1", port: int = 8765):
@@ -153,9 +156,19 @@ class LocalEventGateway:
             }))
             return
 
+        # Throttle before anything reaches the event bus; rejections are
+        # answered without emitting or logging
+        agent_id = agent.get("id") if isinstance(agent, dict) else None
+        retry_after = agent_trust_engine.check_rate_limit(str(agent_id or ""), "intent")
+        if retry_after:
+            await websocket.send(json.dumps({
+                "type": "gateway.rate_limited",
+                "payload": {"rejected": event_type, "retry_after": round(retry_after, 3)}
+            }))
+            return
+
         # Re-emit into Eden
         if self.hub:
-            # You can enforce policy here later (or inside AgentTrust/Permissions)
             self.hub.emit(event_type, {
                 **payload,
                 "_agent": agent
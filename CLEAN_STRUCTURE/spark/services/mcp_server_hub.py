@@ -5,14 +5,19 @@ Pure router that registers tools and delegates to engines.
 No state, no direct file operations, no business logic.
 """
 
+import asyncio
+import functools
 import json
 from hub_core import server, register, event_bus, emit
 from permissions_engine import permissions_engine
 from context_engine import context_engine
 from chaos_handler import (
     create_chaos_file, read_chaos_file, update_chaos_file, delete_chaos_file,
-    analyze_chaos_file, list_chaos_files,
-    create_emotion_tag, create_symbol_tag, create_relationship_tag
+    analyze_chaos_file, analyze_chaos_files, list_chaos_files,
+    create_emotion_tag, create_symbol_tag, create_relationship_tag,
+    get_relationship_neighbors, traverse_relationships,
+    get_chaos_corpus_statistics, chaos_similarity_matrix, find_similar_chaos_files,
+    get_chaos_file_version, diff_chaos_file_versions, prune_chaos_objects
 )
 from permission_manager import (
     is_path_allowed, add_allowed_path, remove_allowed_path,
@@ -20,7 +25,7 @@ from permission_manager import (
 )
 from filesystem_engine import filesystem_engine
 from media_engine import media_engine
-from agent_trust_engine import agent_trust_engine
+from agent_trust_engine import agent_trust_engine, TrustLevel
 from utility_engine import utility_engine
 from chaos.engine import ChaosEngine
 from backbone_adapter import backbone_adapter
@@ -56,9 +61,33 @@ for engine in [
 ]:
     engine.on_boot(hub)
 
+# MCP tool calls carry no agent identity, so they are rate limited as one
+# local client at TRUSTED limits unless that id is registered with a level.
+# Tools that work through many files per call share the "batch" class so
+# they cannot drain the buckets of the interactive tools next to them, and
+# administrative tools (gateway start, limiter stats) are not limited.
+TOOL_CLIENT_ID = "mcp-client"
+
+def rate_limited(resource_class: str):
+    """Answer a tool call with a cheap error once its resource class bucket is empty."""
+    def decorate(tool):
+        @functools.wraps(tool)
+        async def limited(*args, **kwargs):
+            retry_after = agent_trust_engine.check_rate_limit(TOOL_CLIENT_ID, resource_class, TrustLevel.TRUSTED)
+            if retry_after:
+                return json.dumps({"status": "error", "message": "Rate limit exceeded.", "retry_after": round(retry_after, 3)})
+            return await tool(*args, **kwargs)
+        return limited
+    return decorate
+
+async def run_blocking(func, *args):
+    """Run a long blocking call on the default executor so the event loop keeps serving."""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
 # ==================== CHAOS FILE TOOLS ====================
 
 @server.tool()
+@rate_limited("chaos")
 async def create_chaos_file_tool(filename: str, content: str, metadata: str = None) -> str:
     """Create a new CHAOS file."""
     try:
@@ -74,6 +103,7 @@ async def create_chaos_file_tool(filename: str, content: str, metadata: str = No
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("chaos")
 async def read_chaos_file_tool(filename: str) -> str:
     """Read a CHAOS file."""
     try:
@@ -87,6 +117,7 @@ async def read_chaos_file_tool(filename: str) -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("chaos")
 async def update_chaos_file_tool(filename: str, content: str, metadata: str = None) -> str:
     """Update an existing CHAOS file."""
     try:
@@ -102,6 +133,7 @@ async def update_chaos_file_tool(filename: str, content: str, metadata: str = No
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("chaos")
 async def delete_chaos_file_tool(filename: str) -> str:
     """Delete a CHAOS file."""
     try:
@@ -116,6 +148,7 @@ async def delete_chaos_file_tool(filename: str) -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("chaos")
 async def analyze_chaos_file_tool(filename: str) -> str:
     """Analyze a CHAOS file."""
     try:
@@ -129,6 +162,19 @@ async def analyze_chaos_file_tool(filename: str) -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("batch")
+async def analyze_chaos_files_tool(filenames: str = "*", workers: int = None) -> str:
+    """Analyze many CHAOS files at once and return corpus aggregates."""
+    try:
+        targets = filenames if filenames == "*" else json.loads(filenames)
+        result = await run_blocking(analyze_chaos_files, targets, workers)
+        audit_event("chaos_files_analyzed", {"count": len(result["files"])})
+        return json.dumps(result, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+@rate_limited("chaos")
 async def list_chaos_files_tool() -> str:
     """List all CHAOS files."""
     try:
@@ -138,6 +184,7 @@ async def list_chaos_files_tool() -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("chaos")
 async def create_emotion_tag_tool(emotion_type: str, intensity: str) -> str:
     """Create an emotion tag for a CHAOS file."""
     try:
@@ -150,6 +197,7 @@ async def create_emotion_tag_tool(emotion_type: str, intensity: str) -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("chaos")
 async def create_symbol_tag_tool(symbol_type: str, presence: str) -> str:
     """Create a symbol tag for a CHAOS file."""
     try:
@@ -162,6 +210,7 @@ async def create_symbol_tag_tool(symbol_type: str, presence: str) -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("chaos")
 async def create_relationship_tag_tool(source: str, relationship_type: str, target: str) -> str:
     """Create a relationship tag for a CHAOS file."""
     try:
@@ -173,9 +222,94 @@ async def create_relationship_tag_tool(source: str, relationship_type: str, targ
     except Exception as e:
         return json.dumps({"status": "error", "message": str(e)})
 
+@server.tool()
+@rate_limited("chaos")
+async def chaos_relationship_neighbors_tool(entity: str, direction: str = "out", rel_type: str = None) -> str:
+    """Get the direct relationship neighbors of an entity across all CHAOS files."""
+    try:
+        neighbors = get_relationship_neighbors(entity, direction, rel_type)
+        return json.dumps({"entity": entity, "neighbors": neighbors, "count": len(neighbors)}, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+@rate_limited("chaos")
+async def chaos_relationship_traverse_tool(entity: str, k: int = 2, direction: str = "out", rel_type: str = None) -> str:
+    """Get entities within k relationship hops of an entity across all CHAOS files."""
+    try:
+        reachable = traverse_relationships(entity, k, direction, rel_type)
+        return json.dumps({"entity": entity, "k": k, "reachable": reachable}, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+@rate_limited("chaos")
+async def chaos_corpus_statistics_tool() -> str:
+    """Get emotion/symbol histograms and per-file intensity, dominance and composition for all CHAOS files."""
+    try:
+        return json.dumps(get_chaos_corpus_statistics(), ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+@rate_limited("batch")
+async def chaos_similarity_matrix_tool(filenames: list = None) -> str:
+    """Get pairwise similarity scores between CHAOS files (all files if none given)."""
+    try:
+        return json.dumps(chaos_similarity_matrix(filenames), ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+@rate_limited("chaos")
+async def find_similar_chaos_files_tool(filename: str, k: int = 10) -> str:
+    """Find the k CHAOS files most similar to a given file."""
+    try:
+        matches = find_similar_chaos_files(filename, k)
+        if matches is None:
+            return json.dumps({"status": "error", "message": f"CHAOS file '{filename}' not found."})
+        return json.dumps({"filename": filename, "similar": matches}, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+@rate_limited("chaos")
+async def get_chaos_file_version_tool(filename: str, version: int) -> str:
+    """Get the content of a CHAOS file as of a given version."""
+    try:
+        content = get_chaos_file_version(filename, version)
+        if content is None:
+            return json.dumps({"status": "error", "message": f"Version {version} of '{filename}' not found."})
+        return json.dumps({"filename": filename, "version": version, "content": content}, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+@rate_limited("chaos")
+async def diff_chaos_file_versions_tool(filename: str, version_a: int, version_b: int) -> str:
+    """Get a unified diff between two versions of a CHAOS file."""
+    try:
+        diff = diff_chaos_file_versions(filename, version_a, version_b)
+        if diff is None:
+            return json.dumps({"status": "error", "message": f"Versions of '{filename}' not found."})
+        return json.dumps({"filename": filename, "from": version_a, "to": version_b, "diff": diff}, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+@rate_limited("batch")
+async def prune_chaos_objects_tool() -> str:
+    """Remove stored versions and backups of deleted CHAOS files."""
+    try:
+        result = await run_blocking(prune_chaos_objects)
+        return json.dumps({"status": "success", **result})
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
 # ==================== PERMISSION TOOLS ====================
 
 @server.tool()
+@rate_limited("permissions")
 async def add_allowed_path_tool(path: str) -> str:
     """Add a path to the allowed paths list."""
     try:
@@ -188,6 +322,7 @@ async def add_allowed_path_tool(path: str) -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("permissions")
 async def remove_allowed_path_tool(path: str) -> str:
     """Remove a path from the allowed paths list."""
     try:
@@ -200,6 +335,7 @@ async def remove_allowed_path_tool(path: str) -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("permissions")
 async def list_allowed_paths_tool() -> str:
     """List all allowed paths."""
     try:
@@ -209,6 +345,7 @@ async def list_allowed_paths_tool() -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("permissions")
 async def check_path_allowed_tool(path: str, operation: str = "read") -> str:
     """Check if a path is allowed for operations."""
     try:
@@ -220,6 +357,7 @@ async def check_path_allowed_tool(path: str, operation: str = "read") -> str:
 # ==================== FILESYSTEM TOOLS ====================
 
 @server.tool()
+@rate_limited("filesystem")
 async def read_file_tool(path: str) -> str:
     """Read file contents."""
     try:
@@ -233,6 +371,7 @@ async def read_file_tool(path: str) -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("filesystem")
 async def write_file_tool(path: str, content: str, encoding: str = "utf-8") -> str:
     """Write file contents."""
     try:
@@ -246,6 +385,7 @@ async def write_file_tool(path: str, content: str, encoding: str = "utf-8") -> s
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("filesystem")
 async def delete_file_tool(path: str) -> str:
     """Delete a file."""
     try:
@@ -259,6 +399,7 @@ async def delete_file_tool(path: str) -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("filesystem")
 async def list_directory_tool(path: str) -> str:
     """List directory contents."""
     try:
@@ -270,6 +411,7 @@ async def list_directory_tool(path: str) -> str:
 # ==================== MEDIA TOOLS ====================
 
 @server.tool()
+@rate_limited("media")
 async def register_media_tool(file_path: str, tags: str = None, description: str = None) -> str:
     """Register a media file."""
     try:
@@ -284,6 +426,32 @@ async def register_media_tool(file_path: str, tags: str = None, description: str
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("batch")
+async def register_media_batch_tool(file_paths: list, tags: str = None, description: str = None) -> str:
+    """Register many media files in one transaction."""
+    try:
+        tags_list = json.loads(tags) if tags else []
+        result = await run_blocking(media_engine.register_media_batch, file_paths, tags_list, description)
+        audit_event("media_batch_registered", {"registered": result["registered"], "failed": len(result["failed"])})
+        return json.dumps(result, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+@rate_limited("batch")
+async def ingest_media_directory_tool(root: str, tags: str = None, description: str = None) -> str:
+    """Register every media file under a directory through the parallel ingestion pipeline."""
+    try:
+        tags_list = json.loads(tags) if tags else []
+        result = await run_blocking(media_engine.ingest_directory, root, tags_list, description)
+        if result.get("status") == "success":
+            audit_event("media_directory_ingested", {"root": root, "registered": result["registered"]})
+        return json.dumps(result, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+@rate_limited("media")
 async def get_media_info_tool(media_id: str) -> str:
     """Get media information."""
     try:
@@ -296,6 +464,41 @@ async def get_media_info_tool(media_id: str) -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("media")
+async def analyze_media_tool(media_id: str, deep: bool = True) -> str:
+    """Re-analyze registered media; deep runs the full PIL/mutagen/ffmpeg probes."""
+    try:
+        metadata = media_engine.analyze_media(media_id, deep)
+        if metadata is None:
+            return json.dumps({"status": "error", "message": f"Failed to analyze media '{media_id}'."})
+        return json.dumps({"media_id": media_id, "metadata": metadata}, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+@rate_limited("batch")
+async def hash_media_images_tool(media_ids: list = None) -> str:
+    """Compute perceptual hashes for registered images that have none (all images by default)."""
+    try:
+        result = await run_blocking(media_engine.hash_images, media_ids)
+        return json.dumps(result, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+@rate_limited("media")
+async def find_near_duplicate_media_tool(media_id: str, max_hamming: int = 8) -> str:
+    """Find images perceptually similar to a registered image (among images already hashed)."""
+    try:
+        matches = media_engine.find_near_duplicates(media_id, max_hamming)
+        if matches is None:
+            return json.dumps({"status": "error", "message": f"Media '{media_id}' not found or has no perceptual hash."})
+        return json.dumps({"media_id": media_id, "matches": matches, "count": len(matches)}, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+@rate_limited("media")
 async def list_media_tool() -> str:
     """List all registered media."""
     try:
@@ -307,11 +510,11 @@ async def list_media_tool() -> str:
 # ==================== AGENT TRUST TOOLS ====================
 
 @server.tool()
+@rate_limited("agents")
 async def register_agent_tool(agent_info: str, initial_trust: str = "unknown") -> str:
     """Register a new agent."""
     try:
         agent_dict = json.loads(agent_info)
-        from agent_trust_engine import TrustLevel
         trust_level = TrustLevel(initial_trust.upper())
         
         agent_id = agent_trust_engine.register_agent(agent_dict, trust_level)
@@ -321,10 +524,10 @@ async def register_agent_tool(agent_info: str, initial_trust: str = "unknown") -
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("agents")
 async def set_agent_trust_tool(agent_id: str, trust_level: str, reason: str = None) -> str:
     """Set trust level for an agent."""
     try:
-        from agent_trust_engine import TrustLevel
         level = TrustLevel(trust_level.upper())
         
         success = agent_trust_engine.set_trust_level(agent_id, level, reason)
@@ -337,6 +540,7 @@ async def set_agent_trust_tool(agent_id: str, trust_level: str, reason: str = No
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("agents")
 async def get_agent_trust_tool(agent_id: str) -> str:
     """Get trust level for an agent."""
     try:
@@ -348,9 +552,30 @@ async def get_agent_trust_tool(agent_id: str) -> str:
     except Exception as e:
         return json.dumps({"status": "error", "message": str(e)})
 
+@server.tool()
+@rate_limited("agents")
+async def get_access_decision_stats_tool() -> str:
+    """Get hit-rate counters for the permission and agent trust decision caches."""
+    try:
+        return json.dumps({
+            "permissions": permissions_engine.get_decision_cache_stats(),
+            "agent_trust": agent_trust_engine.get_decision_cache_stats()
+        })
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+async def get_rate_limit_stats_tool() -> str:
+    """Get allowed/rejected counters from the agent rate limiter."""
+    try:
+        return json.dumps(agent_trust_engine.get_rate_limit_stats())
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
 # ==================== UTILITY TOOLS ====================
 
 @server.tool()
+@rate_limited("utility")
 async def calculate_checksum_tool(file_path: str, algorithm: str = "sha256") -> str:
     """Calculate file checksum."""
     try:
@@ -363,6 +588,7 @@ async def calculate_checksum_tool(file_path: str, algorithm: str = "sha256") ->
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("utility")
 async def create_archive_tool(source_path: str, archive_path: str, format: str = "zip") -> str:
     """Create archive from directory."""
     try:
@@ -376,6 +602,7 @@ async def create_archive_tool(source_path: str, archive_path: str, format: str =
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("utility")
 async def git_status_tool(path: str = ".") -> str:
     """Get git repository status."""
     try:
@@ -387,6 +614,7 @@ async def git_status_tool(path: str = ".") -> str:
 # ==================== CONTEXT TOOLS ====================
 
 @server.tool()
+@rate_limited("context")
 async def add_context_text_tool(text: str, source: str = "user") -> str:
     """Add text to context window."""
     try:
@@ -399,6 +627,7 @@ async def add_context_text_tool(text: str, source: str = "user") -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("context")
 async def get_context_window_tool(limit: int = 50) -> str:
     """Get context window entries."""
     try:
@@ -408,6 +637,17 @@ async def get_context_window_tool(limit: int = 50) -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("context")
+async def get_context_for_budget_tool(max_tokens: int, strategy: str = "recent", query: str = None) -> str:
+    """Get context window entries packed into a token budget."""
+    try:
+        result = context_engine.get_context_for_budget(max_tokens, strategy, query)
+        return json.dumps(result, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+@server.tool()
+@rate_limited("context")
 async def search_context_tool(query: str, limit: int = 10) -> str:
     """Search context window."""
     try:
@@ -417,6 +657,7 @@ async def search_context_tool(query: str, limit: int = 10) -> str:
         return json.dumps({"status": "error", "message": str(e)})
 
 @server.tool()
+@rate_limited("context")
 async def clear_context_tool() -> str:
     """Clear context window."""
     try:
@@ -437,8 +678,6 @@ async def start_event_gateway_tool() -> str:
 
 def main():
     """Main entry point for the MCP server hub."""
-    import asyncio
-    
     # Emit system started event
     emit("system.started", {
         "server": "eden-mcp-server-hub",
@@ -460,6 +699,8 @@ def main():
         print("\nShutting down EdenOS MCP Server Hub...")
         emit("system.stopped", {"server": "eden-mcp-server-hub"})
         audit_event("server_stopped", {"server": "eden-mcp-server-hub"})
+    finally:
+        chaos_engine.close()
 
 if __name__ == "__main__":
     main()
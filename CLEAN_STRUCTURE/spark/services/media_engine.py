@@ -8,22 +8,50 @@ import os
 import json
 import time
 import hashlib
-import mimetypes
+import queue
+import threading
 from typing import Dict, Any, List, Optional
+from media_store import MediaStore
+from media_ingest import MediaIngestPipeline
+from media_index import MediaIndex, intersect_all
+from media_phash import parse_hash
+from media_probe import analyze_metadata, image_dhash_metadata
+
+# Most written files registered in one transaction by the event worker
+WRITTEN_BATCH_SIZE = 256
 
 class MediaEngine:
     """Manages media registry with metadata analysis and tagging."""
     
-    def __init__(self, media_dir: str = "media_files", registry_file: str = "media_registry.json"):
+    def __init__(self, media_dir: str = "media_files", registry_file: str = "media_registry.json",
+                 deep_analysis: bool = False):
         self.media_dir = media_dir
         self.registry_file = registry_file
         self.hub = None  # Nerve hook
         
+        # Registration reads headers and text samples only; deep analysis
+        # (full PIL/mutagen/ffmpeg probes, whole text files) runs when this
+        # is set or analyze_media() asks for it
+        self.deep_analysis = deep_analysis
+        
+        # Records persist one row each in SQLite; registry_file is the legacy
+        # JSON registry, imported when the database is first created
+        self.store = MediaStore(os.path.splitext(registry_file)[0] + ".db")
+        
         # Ensure media directory exists
         os.makedirs(media_dir, exist_ok=True)
         
-        # Media registry
+        # Media registry, plus tag/mime/token indexes and counters over it.
+        # The ingest persist thread and the filesystem event worker write
+        # them off the caller's thread, so every access holds _lock
         self._registry: Dict[str, Dict[str, Any]] = {}
+        self._index = MediaIndex()
+        self._lock = threading.RLock()
+        
+        # Paths from filesystem.written events, registered in batches by a
+        # background worker instead of on the event bus thread
+        self._written = queue.Queue()
+        self._written_worker: Optional[threading.Thread] = None
         self._load_registry()
     
     def on_boot(self, hub):
@@ -43,10 +71,32 @@ class MediaEngine:
             # Check if written file is media and auto-register
             path = payload.get("path")
             if path and self._is_media_file(path):
-                self.register_media(path)
+                self._queue_written(path)
         elif event_type == "chaos.tag.created":
             print(f"[MediaEngine] CHAOS tag created: {payload}")
     
+    def _queue_written(self, path: str):
+        """Hand a written file to the background registration worker."""
+        self._written.put(path)
+        with self._lock:
+            if self._written_worker is None or not self._written_worker.is_alive():
+                self._written_worker = threading.Thread(target=self._register_written, daemon=True)
+                self._written_worker.start()
+    
+    def _register_written(self):
+        """Register queued written files, batching whatever has piled up."""
+        while True:
+            paths = [self._written.get()]
+            while len(paths) < WRITTEN_BATCH_SIZE:
+                try:
+                    paths.append(self._written.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.register_media_batch(list(dict.fromkeys(paths)))
+            except Exception as e:
+                print(f"[MediaEngine] Failed to register written files: {e}")
+    
     def _is_media_file(self, path: str) -> bool:
         """Check if file is a media file."""
         media_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', 
@@ -56,24 +106,38 @@ class MediaEngine:
         return os.path.splitext(path)[1].lower() in media_extensions
     
     def _load_registry(self):
-        """Load media registry from file."""
+        """Load media registry from the store, importing the legacy JSON on first run."""
         try:
-            if os.path.exists(self.registry_file):
-                with open(self.registry_file, "r", encoding="utf-8") as f:
-                    self._registry = json.load(f)
+            created = not self.store.exists()
+            self._registry = self.store.load()
+            self._index.rebuild(self._registry)
+            if created and os.path.exists(self.registry_file):
+                self.import_json_registry(self.registry_file)
         except Exception as e:
             print(f"[MediaEngine] Failed to load registry: {e}")
             self._registry = {}
+            self._index.rebuild(self._registry)
     
-    def _save_registry(self) -> bool:
-        """Save media registry to file."""
-        try:
-            with open(self.registry_file, "w", encoding="utf-8") as f:
-                json.dump(self._registry, f, indent=2)
-            return True
-        except Exception as e:
-            print(f"[MediaEngine] Failed to save registry: {e}")
-            return False
+    def _save_media(self, media_id: str) -> bool:
+        """Re-index and persist one registry record."""
+        with self._lock:
+            self._index.add(media_id, self._registry[media_id])
+            return self.store.upsert(self._registry[media_id])
+    
+    def import_json_registry(self, json_path: str) -> int:
+        """Import a JSON registry (legacy media_registry.json or an export) into the store.
+        
+        Returns the number of records imported, or -1 on failure.
+        """
+        with self._lock:
+            imported = self.store.import_json(json_path)
+            if imported is None:
+                return -1
+            self._registry.update(imported)
+            for media_id, record in imported.items():
+                self._index.add(media_id, record)
+            print(f"[MediaEngine] Imported {len(imported)} records from {json_path}")
+            return len(imported)
     
     def _calculate_file_hash(self, file_path: str) -> str:
         """Calculate SHA-256 hash of file."""
@@ -86,173 +150,72 @@ class MediaEngine:
         except Exception:
             return ""
     
-    def _analyze_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Analyze file metadata."""
-        try:
-            stat = os.stat(file_path)
-            mime_type, _ = mimetypes.guess_type(file_path)
-            
-            metadata = {
-                "size": stat.st_size,
-                "created": stat.st_ctime,
-                "modified": stat.st_mtime,
-                "mime_type": mime_type,
-                "extension": os.path.splitext(file_path)[1].lower(),
-                "filename": os.path.basename(file_path),
-                "path": file_path
-            }
-            
-            # Additional analysis based on file type
-            if mime_type:
-                if mime_type.startswith("image/"):
-                    metadata.update(self._analyze_image_metadata(file_path))
-                elif mime_type.startswith("audio/"):
-                    metadata.update(self._analyze_audio_metadata(file_path))
-                elif mime_type.startswith("video/"):
-                    metadata.update(self._analyze_video_metadata(file_path))
-                elif mime_type.startswith("text/"):
-                    metadata.update(self._analyze_text_metadata(file_path))
-            
-            return metadata
-            
-        except Exception as e:
-            return {"error": str(e)}
+    def _analyze_metadata(self, file_path: str, deep: bool = None) -> Dict[str, Any]:
+        """Analyze file metadata (deep analysis if deep, else the engine default)."""
+        return analyze_metadata(file_path, self.deep_analysis if deep is None else deep)
     
-    def _analyze_image_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Analyze image metadata."""
-        metadata = {"type": "image"}
-        
-        try:
-            # Try to get basic image info
-            from PIL import Image
-            
-            with Image.open(file_path) as img:
-                metadata.update({
-                    "width": img.width,
-                    "height": img.height,
-                    "format": img.format,
-                    "mode": img.mode
-                })
-                
-                # Calculate aspect ratio
-                if img.height > 0:
-                    metadata["aspect_ratio"] = img.width / img.height
-                
-        except ImportError:
-            metadata["pil_not_available"] = True
-        except Exception as e:
-            metadata["image_analysis_error"] = str(e)
-        
-        return metadata
-    
-    def _analyze_audio_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Analyze audio metadata."""
-        metadata = {"type": "audio"}
-        
-        try:
-            # Try to get audio info using mutagen
-            from mutagen import File
-            
-            audio_file = File(file_path)
-            if audio_file is not None:
-                metadata.update({
-                    "duration": getattr(audio_file.info, 'length', None),
-                    "bitrate": getattr(audio_file.info, 'bitrate', None),
-                    "channels": getattr(audio_file.info, 'channels', None),
-                    "sample_rate": getattr(audio_file.info, 'sample_rate', None)
-                })
-                
-                # Extract tags
-                if hasattr(audio_file, 'tags') and audio_file.tags:
-                    tags = {}
-                    for key, value in audio_file.tags.items():
-                        if isinstance(value, list) and value:
-                            tags[key] = str(value[0])
-                        else:
-                            tags[key] = str(value)
-                    metadata["tags"] = tags
-        
-        except ImportError:
-            metadata["mutagen_not_available"] = True
-        except Exception as e:
-            metadata["audio_analysis_error"] = str(e)
+    def _build_entry(self, file_path: str, tags: List[str] = None, description: str = None,
+                     file_hash: str = None, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Registry entry for a file, hashing and analyzing it unless given."""
+        if file_hash is None:
+            file_hash = self._calculate_file_hash(file_path)
+        if metadata is None:
+            metadata = self._analyze_metadata(file_path)
         
-        return metadata
+        registry_id = file_hash or os.path.basename(file_path)
+        now = time.time()
+        return {
+            "id": registry_id,
+            "file_path": file_path,
+            "metadata": metadata,
+            "tags": list(tags or []),
+            "description": description or "",
+            "registered_at": now,
+            "updated_at": now
+        }
     
-    def _analyze_video_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Analyze video metadata."""
-        metadata = {"type": "video"}
-        
-        try:
-            # Try to get video info using ffmpeg-python
-            import ffmpeg
-            
-            probe = ffmpeg.probe(file_path)
-            video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
-            audio_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'audio'), None)
-            
-            if video_stream:
-                metadata.update({
-                    "width": int(video_stream.get('width', 0)),
-                    "height": int(video_stream.get('height', 0)),
-                    "duration": float(video_stream.get('duration', 0)),
-                    "fps": eval(video_stream.get('r_frame_rate', '0/1')),
-                    "codec": video_stream.get('codec_name'),
-                    "bitrate": int(video_stream.get('bit_rate', 0))
-                })
-                
-                if metadata["height"] > 0:
-                    metadata["aspect_ratio"] = metadata["width"] / metadata["height"]
-            
-            if audio_stream:
-                metadata.update({
-                    "audio_codec": audio_stream.get('codec_name'),
-                    "audio_bitrate": int(audio_stream.get('bit_rate', 0)),
-                    "sample_rate": int(audio_stream.get('sample_rate', 0)),
-                    "channels": int(audio_stream.get('channels', 0))
-                })
-        
-        except ImportError:
-            metadata["ffmpeg_not_available"] = True
-        except Exception as e:
-            metadata["video_analysis_error"] = str(e)
+    def _merge_entry(self, entry: Dict[str, Any], file_path: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of entry updated for another sighting of its content at file_path.
         
-        return metadata
+        Records are keyed by content hash, so byte-identical files share one
+        record. It keeps the first file_path; other paths are listed under
+        duplicate_paths with the size and mtime they were seen with.
+        """
+        entry = dict(entry)
+        if entry["file_path"] == file_path:
+            entry["metadata"] = metadata
+        else:
+            entry["duplicate_paths"] = {
+                **entry.get("duplicate_paths", {}),
+                file_path: [metadata.get("size"), metadata.get("modified")]
+            }
+        entry["updated_at"] = time.time()
+        return entry
     
-    def _analyze_text_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Analyze text metadata."""
-        metadata = {"type": "text"}
+    def _commit_entries(self, entries: List[Dict[str, Any]], new_ids=None) -> bool:
+        """Write entries in one transaction, then publish them.
         
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-            
-            metadata.update({
-                "character_count": len(content),
-                "word_count": len(content.split()),
-                "line_count": len(content.splitlines()),
-                "encoding": "utf-8"
-            })
-            
-            # Language detection (simple heuristic)
-            if content:
-                # Simple character frequency analysis for language detection
-                chinese_chars = len([c for c in content if '\u4e00' <= c <= '\u9fff'])
-                japanese_chars = len([c for c in content if '\u3040' <= c <= '\u309f' or '\u30a0' <= c <= '\u30ff'])
-                korean_chars = len([c for c in content if '\uac00' <= c <= '\ud7af'])
-                
-                total_chars = len(content)
-                if total_chars > 0:
-                    metadata["language_hints"] = {
-                        "chinese_ratio": chinese_chars / total_chars,
-                        "japanese_ratio": japanese_chars / total_chars,
-                        "korean_ratio": korean_chars / total_chars
-                    }
-        
-        except Exception as e:
-            metadata["text_analysis_error"] = str(e)
+        media.registered is emitted for every entry, or only for the ids in
+        new_ids when given.
+        """
+        with self._lock:
+            if not self.store.upsert_many(entries):
+                return False
+            
+            for entry in entries:
+                self._registry[entry["id"]] = entry
+                self._index.add(entry["id"], entry)
         
-        return metadata
+        for entry in entries:
+            # Emit media registered event
+            if self.hub and (new_ids is None or entry["id"] in new_ids):
+                self.hub.emit("media.registered", {
+                    "media_id": entry["id"],
+                    "file_path": entry["file_path"],
+                    "mime_type": entry["metadata"].get("mime_type"),
+                    "tags": entry["tags"]
+                })
+        return True
     
     def register_media(self, file_path: str, tags: List[str] = None, description: str = None) -> bool:
         """Register a media file in the registry."""
@@ -260,108 +223,140 @@ class MediaEngine:
             return False
         
         try:
-            # Calculate file hash
-            file_hash = self._calculate_file_hash(file_path)
-            
-            # Analyze metadata
-            metadata = self._analyze_metadata(file_path)
-            
-            # Create registry entry
-            registry_id = file_hash or os.path.basename(file_path)
-            self._registry[registry_id] = {
-                "id": registry_id,
-                "file_path": file_path,
-                "metadata": metadata,
-                "tags": tags or [],
-                "description": description or "",
-                "registered_at": time.time(),
-                "updated_at": time.time()
-            }
-            
-            # Emit media registered event
-            if self.hub:
-                self.hub.emit("media.registered", {
-                    "media_id": registry_id,
-                    "file_path": file_path,
-                    "mime_type": metadata.get("mime_type"),
-                    "tags": tags or []
-                })
-            
-            return self._save_registry()
+            return self._commit_entries([self._build_entry(file_path, tags, description)])
             
         except Exception as e:
             print(f"[MediaEngine] Failed to register {file_path}: {e}")
             return False
     
+    def register_media_batch(self, paths: List[str], tags: List[str] = None, description: str = None) -> Dict[str, Any]:
+        """Register many media files, committing them in a single transaction."""
+        entries = []
+        failed = []
+        
+        for file_path in paths:
+            if not os.path.exists(file_path):
+                failed.append(file_path)
+                continue
+            try:
+                entries.append(self._build_entry(file_path, tags, description))
+            except Exception as e:
+                print(f"[MediaEngine] Failed to register {file_path}: {e}")
+                failed.append(file_path)
+        
+        if not self._commit_entries(entries):
+            return {"registered": 0, "failed": list(paths), "media_ids": []}
+        
+        return {
+            "registered": len(entries),
+            "failed": failed,
+            "media_ids": [entry["id"] for entry in entries]
+        }
+    
+    def analyze_media(self, media_id: str, deep: bool = True) -> Optional[Dict[str, Any]]:
+        """Re-run metadata analysis for registered media (deep by default) and store it.
+        
+        Header-only analysis (the registration default) never decodes
+        images, so it records no perceptual hash; deep analysis computes
+        one, as does hash_images() for images registered header-only.
+        """
+        media_data = self.get_media_info(media_id)
+        if media_data is None or not os.path.exists(media_data["file_path"]):
+            return None
+        
+        # Analysis can be slow; only the update holds the lock
+        metadata = self._analyze_metadata(media_data["file_path"], deep)
+        with self._lock:
+            media_data = self._registry.get(media_id)
+            if media_data is None:
+                return None
+            media_data["metadata"] = metadata
+            media_data["updated_at"] = time.time()
+            if not self._save_media(media_id):
+                return None
+            return media_data["metadata"]
+    
+    def ingest_directory(self, root: str, tags: List[str] = None, description: str = None,
+                         hash_workers: int = 4, probe_workers: int = None) -> Dict[str, Any]:
+        """Register every media file under root through the parallel ingestion pipeline.
+        
+        Re-running skips files already registered unchanged, so an
+        interrupted ingest resumes. Returns counts and per-stage throughput.
+        """
+        pipeline = MediaIngestPipeline(self, hash_workers=hash_workers, probe_workers=probe_workers)
+        return pipeline.ingest(root, tags, description)
+    
     def get_media_info(self, media_id: str) -> Optional[Dict[str, Any]]:
         """Get media information by ID."""
-        return self._registry.get(media_id)
+        with self._lock:
+            return self._registry.get(media_id)
     
     def update_media_tags(self, media_id: str, tags: List[str]) -> bool:
         """Update media tags."""
-        if media_id not in self._registry:
-            return False
-        
-        self._registry[media_id]["tags"] = tags
-        self._registry[media_id]["updated_at"] = time.time()
-        
-        return self._save_registry()
+        with self._lock:
+            if media_id not in self._registry:
+                return False
+            
+            self._registry[media_id]["tags"] = tags
+            self._registry[media_id]["updated_at"] = time.time()
+            
+            return self._save_media(media_id)
     
     def add_media_tag(self, media_id: str, tag: str) -> bool:
         """Add a tag to media."""
-        if media_id not in self._registry:
-            return False
-        
-        tags = self._registry[media_id]["tags"]
-        if tag not in tags:
-            tags.append(tag)
-            self._registry[media_id]["updated_at"] = time.time()
-            return self._save_registry()
-        
-        return True
+        with self._lock:
+            if media_id not in self._registry:
+                return False
+            
+            tags = self._registry[media_id]["tags"]
+            if tag not in tags:
+                tags.append(tag)
+                self._registry[media_id]["updated_at"] = time.time()
+                return self._save_media(media_id)
+            
+            return True
     
     def remove_media_tag(self, media_id: str, tag: str) -> bool:
         """Remove a tag from media."""
-        if media_id not in self._registry:
+        with self._lock:
+            if media_id not in self._registry:
+                return False
+            
+            tags = self._registry[media_id]["tags"]
+            if tag in tags:
+                tags.remove(tag)
+                self._registry[media_id]["updated_at"] = time.time()
+                return self._save_media(media_id)
+            
             return False
-        
-        tags = self._registry[media_id]["tags"]
-        if tag in tags:
-            tags.remove(tag)
-            self._registry[media_id]["updated_at"] = time.time()
-            return self._save_registry()
-        
-        return False
     
     def search_media(self, query: str = None, tags: List[str] = None, mime_type: str = None, limit: int = 50) -> List[Dict[str, Any]]:
         """Search media registry."""
-        results = []
-        
-        for media_id, media_data in self._registry.items():
-            match = True
-            
-            # Search by query in filename and description
-            if query:
-                query_lower = query.lower()
-                filename = media_data.get("metadata", {}).get("filename", "").lower()
-                description = media_data.get("description", "").lower()
+        with self._lock:
+            # Narrow to candidates through the indexes, rarest postings first
+            postings = []
+            if tags:
+                postings.append(self._index.match_tags(tags))
+            if mime_type:
+                postings.append(self._index.match_mime(mime_type))
+            query_lower = query.lower() if query else None
+            if query_lower:
+                candidates = self._index.match_text(query_lower)
+                if candidates is not None:
+                    postings.append(candidates)
+            docs = intersect_all(postings) if postings else self._index.all_docs()
+            
+            results = []
+            for media_id in self._index.ids(docs):
+                media_data = self._registry[media_id]
+                
+                # Token postings over-approximate substring matches; check them
+                if query_lower:
+                    filename = media_data.get("metadata", {}).get("filename", "").lower()
+                    description = media_data.get("description", "").lower()
+                    if query_lower not in filename and query_lower not in description:
+                        continue
                 
-                if query_lower not in filename and query_lower not in description:
-                    match = False
-            
-            # Filter by tags
-            if tags and match:
-                media_tags = set(media_data.get("tags", []))
-                if not set(tags).issubset(media_tags):
-                    match = False
-            
-            # Filter by mime type
-            if mime_type and match:
-                media_mime = media_data.get("metadata", {}).get("mime_type", "")
-                if mime_type not in media_mime:
-                    match = False
-            
-            if match:
                 results.append({
                     "id": media_id,
                     **media_data
@@ -369,134 +364,171 @@ class MediaEngine:
                 
                 if len(results) >= limit:
                     break
-        
-        return results
+            
+            return results
     
     def list_all_media(self, limit: int = 100) -> List[Dict[str, Any]]:
         """List all registered media."""
-        results = []
-        
-        for media_id, media_data in self._registry.items():
-            results.append({
-                "id": media_id,
-                **media_data
-            })
+        with self._lock:
+            results = []
             
-            if len(results) >= limit:
-                break
-        
-        # Sort by registration date (most recent first)
-        return sorted(results, key=lambda x: x.get("registered_at", 0), reverse=True)
+            for media_id, media_data in self._registry.items():
+                results.append({
+                    "id": media_id,
+                    **media_data
+                })
+                
+                if len(results) >= limit:
+                    break
+            
+            # Sort by registration date (most recent first)
+            return sorted(results, key=lambda x: x.get("registered_at", 0), reverse=True)
     
     def get_media_by_tags(self, tags: List[str], match_all: bool = True) -> List[Dict[str, Any]]:
         """Get media by tags."""
-        results = []
+        with self._lock:
+            return [
+                {"id": media_id, **self._registry[media_id]}
+                for media_id in self._index.ids(self._index.match_tags(tags, match_all))
+            ]
+    
+    def hash_images(self, media_ids: List[str] = None) -> Dict[str, Any]:
+        """Compute perceptual hashes for registered images that have none.
         
-        for media_id, media_data in self._registry.items():
-            media_tags = set(media_data.get("tags", []))
-            search_tags = set(tags)
-            
-            if match_all:
-                if search_tags.issubset(media_tags):
-                    results.append({
-                        "id": media_id,
-                        **media_data
-                    })
-            else:
-                if media_tags.intersection(search_tags):
-                    results.append({
-                        "id": media_id,
-                        **media_data
-                    })
+        Covers media_ids, or every registered image. Decoding happens
+        outside the lock; each hash is stored as it is computed.
+        """
+        with self._lock:
+            ids = list(self._registry) if media_ids is None else [m for m in media_ids if m in self._registry]
+            pending = [
+                (media_id, self._registry[media_id]["file_path"]) for media_id in ids
+                if self._registry[media_id].get("metadata", {}).get("type") == "image"
+                and "dhash" not in self._registry[media_id].get("metadata", {})
+            ]
         
-        return results
+        hashed = 0
+        failed = []
+        for media_id, file_path in pending:
+            result = image_dhash_metadata(file_path)
+            if "dhash" not in result:
+                failed.append({"id": media_id, **result})
+                continue
+            with self._lock:
+                media_data = self._registry.get(media_id)
+                if media_data is None:
+                    continue
+                media_data.setdefault("metadata", {})["dhash"] = result["dhash"]
+                media_data["updated_at"] = time.time()
+                if self._save_media(media_id):
+                    hashed += 1
+        return {"hashed": hashed, "failed": failed}
+    
+    def find_near_duplicates(self, media_id: str, max_hamming: int = 8) -> Optional[List[Dict[str, Any]]]:
+        """Images whose perceptual hash is within max_hamming bits of media_id's, nearest first.
+        
+        Only images that have been hashed (by deep analysis or hash_images)
+        can be found; media_id itself is hashed on demand if needed.
+        Returns None if the media is unknown or cannot be hashed.
+        """
+        if self.get_media_info(media_id) is None:
+            return None
+        self.hash_images([media_id])
+        
+        with self._lock:
+            media_data = self._registry.get(media_id)
+            if media_data is None:
+                return None
+            dhash = parse_hash(media_data.get("metadata", {}).get("dhash"))
+            if dhash is None:
+                return None
+            
+            results = []
+            for distance, other_id in self._index.phash.search(dhash, max_hamming):
+                if other_id == media_id:
+                    continue
+                other = self._registry[other_id]
+                results.append({
+                    "id": other_id,
+                    "distance": distance,
+                    "file_path": other.get("file_path"),
+                    "filename": other.get("metadata", {}).get("filename")
+                })
+            return results
     
     def delete_media(self, media_id: str, delete_file: bool = False) -> bool:
         """Delete media from registry."""
-        if media_id not in self._registry:
-            return False
-        
-        try:
-            if delete_file:
-                file_path = self._registry[media_id]["file_path"]
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-            
-            del self._registry[media_id]
-            return self._save_registry()
-            
-        except Exception as e:
-            print(f"[MediaEngine] Failed to delete media {media_id}: {e}")
-            return False
+        with self._lock:
+            if media_id not in self._registry:
+                return False
+            
+            try:
+                if delete_file:
+                    file_path = self._registry[media_id]["file_path"]
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+                
+                del self._registry[media_id]
+                self._index.remove(media_id)
+                return self.store.delete(media_id)
+                
+            except Exception as e:
+                print(f"[MediaEngine] Failed to delete media {media_id}: {e}")
+                return False
     
     def get_registry_stats(self) -> Dict[str, Any]:
         """Get registry statistics."""
-        if not self._registry:
-            return {"total_media": 0}
-        
-        stats = {
-            "total_media": len(self._registry),
-            "mime_types": {},
-            "tags": {},
-            "total_size": 0,
-            "file_types": {}
-        }
-        
-        for media_data in self._registry.values():
-            # Count mime types
-            mime_type = media_data.get("metadata", {}).get("mime_type", "unknown")
-            stats["mime_types"][mime_type] = stats["mime_types"].get(mime_type, 0) + 1
+        with self._lock:
+            if not self._registry:
+                return {"total_media": 0}
             
-            # Count file types
-            file_type = media_data.get("metadata", {}).get("type", "unknown")
-            stats["file_types"][file_type] = stats["file_types"].get(file_type, 0) + 1
-            
-            # Count tags
-            for tag in media_data.get("tags", []):
-                stats["tags"][tag] = stats["tags"].get(tag, 0) + 1
-            
-            # Sum sizes
-            size = media_data.get("metadata", {}).get("size", 0)
-            stats["total_size"] += size
-        
-        return stats
+            # Counters are maintained by the index on every change
+            return self._index.get_stats()
     
     def export_registry(self, export_path: str) -> bool:
         """Export media registry to file."""
-        try:
-            export_data = {
-                "registry": self._registry,
-                "exported_at": time.time(),
-                "stats": self.get_registry_stats()
-            }
-            
-            with open(export_path, "w", encoding="utf-8") as f:
-                json.dump(export_data, f, indent=2)
-            
-            return True
-            
-        except Exception as e:
-            print(f"[MediaEngine] Failed to export registry: {e}")
-            return False
+        with self._lock:
+            try:
+                export_data = {
+                    "registry": self._registry,
+                    "exported_at": time.time(),
+                    "stats": self.get_registry_stats()
+                }
+                
+                with open(export_path, "w", encoding="utf-8") as f:
+                    json.dump(export_data, f, indent=2)
+                
+                return True
+                
+            except Exception as e:
+                print(f"[MediaEngine] Failed to export registry: {e}")
+                return False
     
     def import_registry(self, import_path: str, merge_strategy: str = "merge") -> bool:
         """Import media registry from file."""
-        try:
-            with open(import_path, "r", encoding="utf-8") as f:
-                import_data = json.load(f)
-            
-            imported_registry = import_data.get("registry", {})
-            
-            if merge_strategy == "replace":
-                self._registry = imported_registry
-            elif merge_strategy == "merge":
-                self._registry.update(imported_registry)
-            
-            return self._save_registry()
-            
-        except Exception as e:
-            print(f"[MediaEngine] Failed to import registry: {e}")
-            return False
+        with self._lock:
+            try:
+                with open(import_path, "r", encoding="utf-8") as f:
+                    import_data = json.load(f)
+                
+                imported_registry = import_data.get("registry", {})
+                
+                if merge_strategy == "replace":
+                    if not self.store.replace_all(imported_registry):
+                        return False
+                    self._registry = imported_registry
+                    self._index.rebuild(imported_registry)
+                elif merge_strategy == "merge":
+                    if not self.store.upsert_many({**record, "id": media_id} for media_id, record in imported_registry.items()):
+                        return False
+                    self._registry.update(imported_registry)
+                    for media_id, record in imported_registry.items():
+                        self._index.add(media_id, record)
+                
+                return True
+                
+            except Exception as e:
+                print(f"[MediaEngine] Failed to import registry: {e}")
+                return False
 
 # Global media engine instance
 media_engine = MediaEngine()
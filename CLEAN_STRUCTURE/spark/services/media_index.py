@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - Media Index
+Inverted indexes and running counters over the media registry.
+
+Every media id gets a small integer in registration order, and each index
+maps a term to a sorted list of those integers (a postings list):
+
+- tags: tag -> ids
+- mime_major / mime_full: "image" / "image/png" -> ids
+- tokens: lowercase alphanumeric runs of filename and description -> ids,
+  with a trigram index over the token vocabulary for partial words
+- phash: multi-index hash table of image dHashes for near-duplicate lookups
+
+Because postings are sorted in registration order, query results come
+back in the same order a scan of the registry would give. Conjunctive
+queries intersect postings starting from the rarest term.
+"""
+
+import re
+from bisect import bisect_left, insort
+from typing import Dict, Any, List, Optional, Iterable
+from media_phash import MultiIndexHash, parse_hash
+
+_TOKEN = re.compile(r"[^\W_]+")
+# Length of the substrings indexing the token vocabulary for partial words
+GRAM = 3
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric runs of text."""
+    return _TOKEN.findall(text.lower()) if text else []
+
+def grams(token: str) -> set:
+    """Distinct GRAM-character substrings of a token."""
+    return {token[i:i + GRAM] for i in range(len(token) - GRAM + 1)}
+
+def intersect(a: List[int], b: List[int]) -> List[int]:
+    """Intersection of two sorted lists, bisecting through the longer one."""
+    if len(a) > len(b):
+        a, b = b, a
+    result = []
+    lo = 0
+    end = len(b)
+    for value in a:
+        lo = bisect_left(b, value, lo)
+        if lo == end:
+            break
+        if b[lo] == value:
+            result.append(value)
+    return result
+
+def intersect_all(postings: List[List[int]]) -> List[int]:
+    """Intersection of sorted lists, rarest first so the running result stays small."""
+    if not postings:
+        return []
+    postings = sorted(postings, key=len)
+    result = postings[0]
+    for other in postings[1:]:
+        if not result:
+            break
+        result = intersect(result, other)
+    return list(result)
+
+def union_all(postings: Iterable[List[int]]) -> List[int]:
+    """Union of sorted lists, sorted."""
+    merged = set()
+    for posting in postings:
+        merged.update(posting)
+    return sorted(merged)
+
+class MediaIndex:
+    """Tag, mime and token postings plus registry counters."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._keys: List[Optional[str]] = []
+        # doc -> (tags, mime type, tokens, stat fields) it was indexed under
+        self._terms: Dict[int, tuple] = {}
+        self.tags: Dict[str, List[int]] = {}
+        self.mime_major: Dict[str, List[int]] = {}
+        self.mime_full: Dict[str, List[int]] = {}
+        self.tokens: Dict[str, List[int]] = {}
+        self._token_grams: Dict[str, set] = {}
+        self.phash = MultiIndexHash()
+
+        self.total_size = 0
+        self.mime_type_counts: Dict[Any, int] = {}
+        self.file_type_counts: Dict[Any, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def rebuild(self, registry: Dict[str, Dict[str, Any]]):
+        """Index a whole registry from scratch."""
+        self.__init__()
+        for media_id, record in registry.items():
+            self.add(media_id, record)
+
+    @staticmethod
+    def _add_posting(index: Dict[str, List[int]], term: str, doc: int):
+        posting = index.get(term)
+        if posting is None:
+            index[term] = [doc]
+        elif posting[-1] < doc:
+            posting.append(doc)
+        else:
+            insort(posting, doc)
+
+    @staticmethod
+    def _remove_posting(index: Dict[str, List[int]], term: str, doc: int):
+        posting = index.get(term)
+        if posting is None:
+            return
+        position = bisect_left(posting, doc)
+        if position < len(posting) and posting[position] == doc:
+            del posting[position]
+            if not posting:
+                del index[term]
+
+    @staticmethod
+    def _count(counter: Dict[Any, int], key, delta: int):
+        count = counter.get(key, 0) + delta
+        if count:
+            counter[key] = count
+        else:
+            counter.pop(key, None)
+
+    def add(self, media_id: str, record: Dict[str, Any]):
+        """Index a record, replacing whatever was indexed for media_id."""
+        doc = self._ids.get(media_id)
+        if doc is None:
+            doc = self._ids[media_id] = len(self._keys)
+            self._keys.append(media_id)
+        else:
+            self._unindex(doc)
+
+        metadata = record.get("metadata", {})
+        tags = tuple(dict.fromkeys(record.get("tags", [])))
+        mime_type = metadata.get("mime_type") or ""
+        tokens = tuple(set(tokenize(metadata.get("filename", "")) + tokenize(record.get("description", ""))))
+        # Same keys get_registry_stats has always reported
+        mime_stat = metadata.get("mime_type", "unknown")
+        type_stat = metadata.get("type", "unknown")
+        size = metadata.get("size", 0)
+        dhash = parse_hash(metadata.get("dhash"))
+
+        for tag in tags:
+            self._add_posting(self.tags, tag, doc)
+        if mime_type:
+            self._add_posting(self.mime_major, mime_type.split("/", 1)[0], doc)
+            self._add_posting(self.mime_full, mime_type, doc)
+        for token in tokens:
+            if token not in self.tokens:
+                for gram in grams(token):
+                    self._token_grams.setdefault(gram, set()).add(token)
+            self._add_posting(self.tokens, token, doc)
+        if dhash is not None:
+            self.phash.add(dhash, media_id)
+
+        self._count(self.mime_type_counts, mime_stat, 1)
+        self._count(self.file_type_counts, type_stat, 1)
+        self.total_size += size
+        self._terms[doc] = (tags, mime_type, tokens, mime_stat, type_stat, size, dhash)
+
+    def remove(self, media_id: str):
+        """Drop a record from the index."""
+        doc = self._ids.pop(media_id, None)
+        if doc is None:
+            return
+        self._unindex(doc)
+        self._keys[doc] = None
+
+    def _unindex(self, doc: int):
+        terms = self._terms.pop(doc, None)
+        if terms is None:
+            return
+        tags, mime_type, tokens, mime_stat, type_stat, size, dhash = terms
+        for tag in tags:
+            self._remove_posting(self.tags, tag, doc)
+        if mime_type:
+            self._remove_posting(self.mime_major, mime_type.split("/", 1)[0], doc)
+            self._remove_posting(self.mime_full, mime_type, doc)
+        for token in tokens:
+            self._remove_posting(self.tokens, token, doc)
+            if token not in self.tokens:
+                self._drop_grams(token)
+        if dhash is not None:
+            self.phash.remove(dhash, self._keys[doc])
+        self._count(self.mime_type_counts, mime_stat, -1)
+        self._count(self.file_type_counts, type_stat, -1)
+        self.total_size -= size
+
+    def ids(self, docs: Iterable[int]) -> List[str]:
+        """Media ids for postings entries."""
+        keys = self._keys
+        return [keys[doc] for doc in docs]
+
+    def all_docs(self) -> List[int]:
+        return sorted(self._terms)
+
+    def match_tags(self, tags: List[str], match_all: bool = True) -> List[int]:
+        """Docs carrying all (or any) of tags."""
+        if match_all:
+            if not tags:
+                return self.all_docs()
+            postings = []
+            for tag in set(tags):
+                posting = self.tags.get(tag)
+                if posting is None:
+                    return []
+                postings.append(posting)
+            return intersect_all(postings)
+        return union_all(self.tags[tag] for tag in set(tags) if tag in self.tags)
+
+    def match_mime(self, mime_type: str) -> List[int]:
+        """Docs whose mime type contains mime_type.
+
+        The containment test runs over the distinct mime types only; a
+        single matching type, or a major type matching nothing else, is
+        one postings list.
+        """
+        full_types = [full for full in self.mime_full if mime_type in full]
+        if len(full_types) == 1:
+            return list(self.mime_full[full_types[0]])
+        major = self.mime_major.get(mime_type)
+        if major is not None and all(full.split("/", 1)[0] == mime_type for full in full_types):
+            return list(major)
+        return union_all(self.mime_full[full] for full in full_types)
+
+    def _drop_grams(self, token: str):
+        for gram in grams(token):
+            tokens = self._token_grams.get(gram)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._token_grams[gram]
+
+    def _tokens_containing(self, word: str) -> Iterable[str]:
+        """Vocabulary tokens that may contain word (all of them for short words)."""
+        if len(word) < GRAM:
+            return self.tokens.keys()
+        gram_sets = []
+        for gram in grams(word):
+            tokens = self._token_grams.get(gram)
+            if not tokens:
+                return ()
+            gram_sets.append(tokens)
+        gram_sets.sort(key=len)
+        tokens = set(gram_sets[0])
+        for other in gram_sets[1:]:
+            tokens &= other
+            if not tokens:
+                break
+        return tokens
+
+    def match_text(self, query: str) -> Optional[List[int]]:
+        """Candidate docs whose filename or description may contain query.
+
+        An alphanumeric run with a separator on both sides in the query is a
+        whole token wherever the query occurs, so it is one postings lookup.
+        Only the first and last runs can be cut off by the query's ends;
+        they match token suffixes / prefixes found through the trigram
+        index. This is a superset of the true matches; callers verify.
+        Returns None when the query has no alphanumeric characters.
+        """
+        text = query.lower()
+        postings = []
+        partial = []
+        for match in _TOKEN.finditer(text):
+            word = match.group()
+            bounded_left = match.start() > 0
+            bounded_right = match.end() < len(text)
+            if bounded_left and bounded_right:
+                posting = self.tokens.get(word)
+                if posting is None:
+                    return []
+                postings.append(posting)
+            else:
+                partial.append((word, bounded_left, bounded_right))
+        if not postings and not partial:
+            return None
+
+        for word, bounded_left, bounded_right in partial:
+            matches = []
+            for token in self._tokens_containing(word):
+                if bounded_left:
+                    found = token.startswith(word)
+                elif bounded_right:
+                    found = token.endswith(word)
+                else:
+                    found = word in token
+                if found:
+                    matches.append(self.tokens[token])
+            if not matches:
+                return []
+            postings.append(matches[0] if len(matches) == 1 else union_all(matches))
+        return intersect_all(postings)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters in get_registry_stats form."""
+        return {
+            "total_media": len(self._terms),
+            "mime_types": dict(self.mime_type_counts),
+            "tags": {tag: len(posting) for tag, posting in self.tags.items()},
+            "total_size": self.total_size,
+            "file_types": dict(self.file_type_counts)
+        }
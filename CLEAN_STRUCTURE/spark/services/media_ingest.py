@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - Media Ingestion Pipeline
+Parallel bulk registration of a directory tree into the MediaEngine.
+
+Stages run concurrently, connected by bounded queues:
+
+    discover -> stat -> hash -> probe -> persist
+
+discover walks the tree, stat drops files already registered with the same
+size and mtime (which is what makes a re-run resume where the last one
+stopped), hash runs on a thread pool, probe sends chunks of files to a
+process pool for the metadata analyzers, and persist commits entries in
+batched transactions. Each stage reports items handled and throughput.
+
+A stage that fails still drains its input and passes the end-of-stream
+marker on, so an error never leaves a neighbour blocked on a full queue;
+the files it could not handle are reported as failed.
+"""
+
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional
+from media_probe import analyze_metadata
+
+HASH_CHUNK_SIZE = 1 << 20
+PROBE_CHUNK = 32
+_DONE = object()
+
+def probe_files(paths: List[str], deep: bool = False) -> List[Dict[str, Any]]:
+    """Run the metadata analyzers over a chunk of files (process pool entry point)."""
+    return [analyze_metadata(path, deep) for path in paths]
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file, read in large chunks (hashlib releases the GIL)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class _StageStats:
+    """Item and timing counters for one stage."""
+
+    def __init__(self):
+        self.items = 0
+        self.busy = 0.0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, items: int, busy: float):
+        with self._lock:
+            self.items += items
+            self.busy += busy
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        return {
+            "items": self.items,
+            "busy_seconds": round(self.busy, 4),
+            "elapsed_seconds": round(elapsed, 4),
+            "items_per_second": round(self.items / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+class MediaIngestPipeline:
+    """Registers every media file under a directory root through staged workers."""
+
+    def __init__(self, engine, hash_workers: int = 4, probe_workers: int = None,
+                 queue_size: int = 256, batch_size: int = 256):
+        self.engine = engine
+        self.hash_workers = max(1, hash_workers)
+        self.probe_workers = probe_workers if probe_workers is not None else min(4, os.cpu_count() or 1)
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+
+    def ingest(self, root: str, tags: List[str] = None, description: str = None) -> Dict[str, Any]:
+        """Ingest root; files already registered unchanged are skipped, so re-runs resume."""
+        if not os.path.isdir(root):
+            return {"status": "error", "message": f"Not a directory: {root}"}
+
+        started = time.perf_counter()
+        stages = {name: _StageStats() for name in ("discover", "stat", "hash", "probe", "persist")}
+        to_stat = queue.Queue(self.queue_size)
+        to_hash = queue.Queue(self.queue_size)
+        to_probe = queue.Queue(self.queue_size)
+        to_persist = queue.Queue(self.queue_size)
+        failed: List[str] = []
+        skipped = [0]
+
+        # path -> (size, mtime) of what is registered now, including paths
+        # whose content is registered under another path's record
+        known = {}
+        with self.engine._lock:
+            records = list(self.engine._registry.values())
+        for record in records:
+            metadata = record.get("metadata", {})
+            known[record.get("file_path")] = (metadata.get("size"), metadata.get("modified"))
+            for path, (size, mtime) in record.get("duplicate_paths", {}).items():
+                known[path] = (size, mtime)
+
+        def finish(name):
+            stages[name].finished = time.perf_counter()
+
+        def discover():
+            try:
+                for dirpath, dirnames, filenames in os.walk(root):
+                    t = time.perf_counter()
+                    paths = [os.path.join(dirpath, name) for name in filenames
+                             if self.engine._is_media_file(name)]
+                    stages["discover"].add(len(paths), time.perf_counter() - t)
+                    for path in paths:
+                        to_stat.put(path)
+            except Exception as e:
+                print(f"[MediaIngestPipeline] Discovery failed under {root}: {e}")
+            finally:
+                to_stat.put(_DONE)
+                finish("discover")
+
+        def stat():
+            try:
+                while True:
+                    path = to_stat.get()
+                    if path is _DONE:
+                        break
+                    t = time.perf_counter()
+                    try:
+                        st = os.stat(path)
+                    except Exception:
+                        failed.append(path)
+                        continue
+                    unchanged = known.get(path) == (st.st_size, st.st_mtime)
+                    stages["stat"].add(1, time.perf_counter() - t)
+                    if unchanged:
+                        skipped[0] += 1
+                    else:
+                        to_hash.put(path)
+            finally:
+                for _ in range(self.hash_workers):
+                    to_hash.put(_DONE)
+                finish("stat")
+
+        def hasher():
+            try:
+                while True:
+                    path = to_hash.get()
+                    if path is _DONE:
+                        break
+                    t = time.perf_counter()
+                    try:
+                        digest = hash_file(path)
+                    except Exception:
+                        failed.append(path)
+                        continue
+                    stages["hash"].add(1, time.perf_counter() - t)
+                    to_probe.put((path, digest))
+            finally:
+                to_probe.put(_DONE)
+
+        # Created (and its workers started) before any stage thread exists,
+        # so forked workers never inherit a lock held by another thread
+        pool = self._probe_pool()
+
+        def probe():
+            executor = pool
+            deep = self.engine.deep_analysis
+            in_flight = deque()
+            max_in_flight = max(2, self.probe_workers * 2)
+
+            def submit(chunk):
+                # A worker that died takes the process pool with it; the
+                # rest of the run probes on threads
+                nonlocal executor
+                paths = [path for path, _ in chunk]
+                try:
+                    future = executor.submit(probe_files, paths, deep)
+                except BrokenProcessPool as e:
+                    print(f"[MediaIngestPipeline] Process pool broken, probing on threads: {e}")
+                    executor.shutdown(wait=False)
+                    executor = ThreadPoolExecutor(max_workers=max(1, self.probe_workers))
+                    future = executor.submit(probe_files, paths, deep)
+                in_flight.append((chunk, time.perf_counter(), future))
+
+            def collect():
+                chunk, submitted, future = in_flight.popleft()
+                try:
+                    results = future.result()
+                except Exception as e:
+                    print(f"[MediaIngestPipeline] Probe failed: {e}")
+                    failed.extend(path for path, _ in chunk)
+                    return
+                stages["probe"].add(len(chunk), time.perf_counter() - submitted)
+                for (path, digest), metadata in zip(chunk, results):
+                    to_persist.put((path, digest, metadata))
+
+            remaining = self.hash_workers
+            try:
+                while remaining:
+                    item = to_probe.get()
+                    chunk = []
+                    while True:
+                        if item is _DONE:
+                            remaining -= 1
+                        else:
+                            chunk.append(item)
+                        if len(chunk) >= PROBE_CHUNK or not remaining:
+                            break
+                        try:
+                            item = to_probe.get_nowait()
+                        except queue.Empty:
+                            break
+                    if chunk:
+                        try:
+                            submit(chunk)
+                        except Exception as e:
+                            print(f"[MediaIngestPipeline] Probe submit failed: {e}")
+                            failed.extend(path for path, _ in chunk)
+                    while len(in_flight) >= max_in_flight:
+                        collect()
+                while in_flight:
+                    collect()
+            except Exception as e:
+                print(f"[MediaIngestPipeline] Probe stage failed: {e}")
+            finally:
+                # Drain so no hasher stays blocked on a full to_probe
+                while in_flight:
+                    failed.extend(path for path, _ in in_flight.popleft()[0])
+                while remaining:
+                    item = to_probe.get()
+                    if item is _DONE:
+                        remaining -= 1
+                    else:
+                        failed.append(item[0])
+                executor.shutdown()
+                to_persist.put(_DONE)
+                finish("probe")
+
+        registered = [0]
+        duplicates = [0]
+
+        def persist():
+            # id -> entry and the paths it covers, in arrival order
+            batch: Dict[str, Dict[str, Any]] = {}
+            paths: Dict[str, List[str]] = {}
+            new_ids = set()
+
+            def commit():
+                t = time.perf_counter()
+                try:
+                    committed = self.engine._commit_entries(list(batch.values()), new_ids)
+                except Exception as e:
+                    print(f"[MediaIngestPipeline] Commit failed: {e}")
+                    committed = False
+                if committed:
+                    registered[0] += len(new_ids)
+                    stages["persist"].add(sum(map(len, paths.values())), time.perf_counter() - t)
+                else:
+                    for batch_paths in paths.values():
+                        failed.extend(batch_paths)
+                batch.clear()
+                paths.clear()
+                new_ids.clear()
+
+            while True:
+                item = to_persist.get()
+                if item is _DONE:
+                    break
+                path, digest, metadata = item
+                try:
+                    existing = batch.get(digest) or self.engine.get_media_info(digest)
+                    if existing is None:
+                        entry = self.engine._build_entry(path, tags, description, digest, metadata)
+                        new_ids.add(entry["id"])
+                    else:
+                        # Same content as a registered file: one record, no new id
+                        entry = self.engine._merge_entry(existing, path, metadata)
+                        if entry["file_path"] != path:
+                            duplicates[0] += 1
+                except Exception as e:
+                    print(f"[MediaIngestPipeline] Could not build entry for {path}: {e}")
+                    failed.append(path)
+                    continue
+                batch[entry["id"]] = entry
+                paths.setdefault(entry["id"], []).append(path)
+                if len(batch) >= self.batch_size:
+                    commit()
+            if batch:
+                commit()
+            finish("persist")
+
+        threads = [threading.Thread(target=discover, daemon=True),
+                   threading.Thread(target=stat, daemon=True),
+                   threading.Thread(target=probe, daemon=True),
+                   threading.Thread(target=persist, daemon=True)]
+        hashers = [threading.Thread(target=hasher, daemon=True) for _ in range(self.hash_workers)]
+        for thread in threads + hashers:
+            thread.start()
+        for thread in hashers:
+            thread.join()
+        finish("hash")
+        for thread in threads:
+            thread.join()
+
+        return {
+            "status": "success",
+            "root": root,
+            "registered": registered[0],
+            "duplicates": duplicates[0],
+            "skipped": skipped[0],
+            "failed": failed,
+            "elapsed_seconds": round(time.perf_counter() - started, 4),
+            "stages": {name: stats.report() for name, stats in stages.items()}
+        }
+
+    def _probe_pool(self):
+        """Warmed-up process pool for the analyzers, or threads where processes are unavailable."""
+        if self.probe_workers > 0:
+            try:
+                pool = ProcessPoolExecutor(max_workers=self.probe_workers)
+                futures = [pool.submit(os.getpid) for _ in range(self.probe_workers)]
+                for future in futures:
+                    future.result()
+                return pool
+            except (OSError, NotImplementedError) as e:
+                print(f"[MediaIngestPipeline] Process pool unavailable, probing on threads: {e}")
+        return ThreadPoolExecutor(max_workers=max(1, self.probe_workers))
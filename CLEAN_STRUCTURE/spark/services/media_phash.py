@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - Media Perceptual Hashing
+64-bit difference hashes (dHash) for images and a multi-index hash table
+over them.
+
+dHash shrinks an image to 9x8 grayscale and records, for each of the 64
+horizontally adjacent pixel pairs, whether brightness increases. Resized,
+recompressed or lightly edited copies of an image land within a few bits
+of each other, so near-duplicates are hashes at a small Hamming distance.
+
+Near-duplicate queries go through MultiIndexHash, which only looks at
+hashes sharing a nearly identical 16-bit substring with the query instead
+of comparing against every stored hash.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+HASH_WIDTH = 9
+HASH_HEIGHT = 8
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits."""
+    return bin(a ^ b).count("1")
+
+def dhash_pixels(pixels: Sequence[int], width: int = HASH_WIDTH, height: int = HASH_HEIGHT) -> int:
+    """dHash of a row-major grayscale grid of width x height pixels."""
+    value = 0
+    for y in range(height):
+        row = y * width
+        for x in range(width - 1):
+            value = (value << 1) | (pixels[row + x] < pixels[row + x + 1])
+    return value
+
+def image_dhash(img) -> int:
+    """dHash of a PIL image.
+
+    For a not yet loaded JPEG, draft() has the decoder scale down by up to
+    8x while decoding, so only a small grayscale image is ever decoded.
+    Other formats ignore the request and decode in full.
+    """
+    from PIL import Image
+
+    img.draft("L", (HASH_WIDTH * 8, HASH_HEIGHT * 8))
+    small = img.convert("L").resize((HASH_WIDTH, HASH_HEIGHT), Image.BILINEAR)
+    return dhash_pixels(list(small.getdata()))
+
+def format_hash(value: int) -> str:
+    return f"{value:016x}"
+
+def parse_hash(text: str) -> Optional[int]:
+    try:
+        return int(text, 16)
+    except (TypeError, ValueError):
+        return None
+
+def _chunk_masks(bits: int, radius: int) -> List[int]:
+    """Every bits-wide xor mask with at most radius bits set."""
+    masks = [0]
+    for _ in range(radius):
+        masks = sorted(set(masks) | {mask | (1 << bit) for mask in masks for bit in range(bits)})
+    return masks
+
+class MultiIndexHash:
+    """Multi-index hash table of 64-bit hashes, each carrying the media ids that have it.
+
+    Hashes are split into CHUNKS substrings of CHUNK_BITS bits with one
+    table per substring. If two hashes are within r bits, by pigeonhole
+    at least one substring is within r // CHUNKS bits, so a query only
+    probes substrings that close to its own and verifies what it finds.
+    """
+
+    CHUNKS = 4
+    CHUNK_BITS = 16
+
+    def __init__(self):
+        self._ids: Dict[int, List[str]] = {}
+        self._tables: List[Dict[int, set]] = [{} for _ in range(self.CHUNKS)]
+        self._masks: Dict[int, List[int]] = {}
+        self._live = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def _chunks(self, value: int) -> List[int]:
+        chunk_mask = (1 << self.CHUNK_BITS) - 1
+        return [(value >> (i * self.CHUNK_BITS)) & chunk_mask for i in range(self.CHUNKS)]
+
+    def add(self, value: int, media_id: str):
+        media_ids = self._ids.get(value)
+        if media_ids is None:
+            media_ids = self._ids[value] = []
+            for table, chunk in zip(self._tables, self._chunks(value)):
+                table.setdefault(chunk, set()).add(value)
+        if media_id not in media_ids:
+            media_ids.append(media_id)
+            self._live += 1
+
+    def remove(self, value: int, media_id: str):
+        media_ids = self._ids.get(value)
+        if media_ids is None or media_id not in media_ids:
+            return
+        media_ids.remove(media_id)
+        self._live -= 1
+        if not media_ids:
+            del self._ids[value]
+            for table, chunk in zip(self._tables, self._chunks(value)):
+                bucket = table[chunk]
+                bucket.discard(value)
+                if not bucket:
+                    del table[chunk]
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, str]]:
+        """(distance, media_id) for every hash within max_distance, nearest first."""
+        radius = max(0, max_distance) // self.CHUNKS
+        masks = self._masks.get(radius)
+        if masks is None:
+            masks = self._masks[radius] = _chunk_masks(self.CHUNK_BITS, radius)
+
+        candidates = set()
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            for mask in masks:
+                bucket = table.get(chunk ^ mask)
+                if bucket:
+                    candidates.update(bucket)
+
+        results = []
+        for candidate in candidates:
+            distance = hamming(value, candidate)
+            if distance <= max_distance:
+                results.extend((distance, media_id) for media_id in self._ids[candidate])
+        results.sort()
+        return results
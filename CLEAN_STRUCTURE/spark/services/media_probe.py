@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - Media Probes
+Cheap metadata probes that read file headers instead of decoding media.
+
+- Images: PNG, GIF and WebP dimensions from the first bytes; JPEG by
+  walking segment headers to the first frame header.
+- Audio: WAV fmt/data chunks and the FLAC STREAMINFO block.
+- Text: counts and CJK language hints from the first TEXT_SAMPLE_BYTES,
+  classified in one regex pass and scaled up for larger files.
+
+Each probe returns None when the file is not a format it understands, so
+callers can fall back to PIL, mutagen or a full read.
+
+analyze_metadata ties the probes and those fallbacks together. It keeps no
+state, so ingestion workers can call it without building a MediaEngine.
+"""
+
+import codecs
+import mimetypes
+import os
+import re
+import struct
+from typing import Dict, Any, Optional
+from media_phash import image_dhash, format_hash
+
+TEXT_SAMPLE_BYTES = 64 * 1024
+
+# JPEG start-of-frame markers (not DHT 0xC4, JPG 0xC8 or DAC 0xCC)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Markers without a length field
+_JPEG_STANDALONE = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8, 0xD9}
+# Stop walking segments after this many
+_MAX_SEGMENTS = 512
+
+_CJK = re.compile("([\u4e00-\u9fff])|([\u3040-\u30ff])|([\uac00-\ud7af])")
+
+def _image(fmt: str, width: int, height: int) -> Dict[str, Any]:
+    metadata = {"width": width, "height": height, "format": fmt}
+    if height > 0:
+        metadata["aspect_ratio"] = width / height
+    return metadata
+
+def _jpeg_size(f) -> Optional[tuple]:
+    f.seek(2)
+    for _ in range(_MAX_SEGMENTS):
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in _JPEG_STANDALONE:
+            if marker == 0xD9:
+                return None
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if marker in _JPEG_SOF:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+    return None
+
+def probe_image_header(file_path: str) -> Optional[Dict[str, Any]]:
+    """Format and dimensions of a PNG, GIF, WebP or JPEG image from its header."""
+    with open(file_path, "rb") as f:
+        head = f.read(32)
+
+        if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+            width, height = struct.unpack(">II", head[16:24])
+            return _image("PNG", width, height)
+
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            width, height = struct.unpack("<HH", head[6:10])
+            return _image("GIF", width, height)
+
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            chunk = head[12:16]
+            if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a" and len(head) >= 30:
+                width, height = struct.unpack("<HH", head[26:30])
+                return _image("WEBP", width & 0x3FFF, height & 0x3FFF)
+            if chunk == b"VP8L" and head[20:21] == b"\x2f" and len(head) >= 25:
+                bits = struct.unpack("<I", head[21:25])[0]
+                return _image("WEBP", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+            if chunk == b"VP8X" and len(head) >= 30:
+                width = int.from_bytes(head[24:27], "little") + 1
+                height = int.from_bytes(head[27:30], "little") + 1
+                return _image("WEBP", width, height)
+            return None
+
+        if head[:2] == b"\xff\xd8":
+            size = _jpeg_size(f)
+            if size:
+                return _image("JPEG", *size)
+    return None
+
+def _wav_info(f, file_size: int) -> Optional[Dict[str, Any]]:
+    fmt = None
+    data_size = None
+    position = 12
+    while position + 8 <= file_size and (fmt is None or data_size is None):
+        f.seek(position)
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        chunk_id, chunk_size = header[:4], struct.unpack("<I", header[4:])[0]
+        if chunk_id == b"fmt ":
+            fmt = f.read(16)
+            if len(fmt) < 16:
+                return None
+        elif chunk_id == b"data":
+            data_size = min(chunk_size, file_size - position - 8)
+        position += 8 + chunk_size + (chunk_size & 1)
+
+    if fmt is None:
+        return None
+    _, channels, sample_rate, byte_rate, _, bits = struct.unpack("<HHIIHH", fmt)
+    info = {
+        "format": "WAV",
+        "channels": channels,
+        "sample_rate": sample_rate,
+        "bits_per_sample": bits,
+        "bitrate": byte_rate * 8
+    }
+    if data_size is not None and byte_rate:
+        info["duration"] = data_size / byte_rate
+    return info
+
+def _flac_info(f, file_size: int, offset: int) -> Optional[Dict[str, Any]]:
+    f.seek(offset + 4)
+    header = f.read(4)
+    if len(header) < 4 or header[0] & 0x7F != 0:
+        return None
+    streaminfo = f.read(34)
+    if len(streaminfo) < 34:
+        return None
+    packed = int.from_bytes(streaminfo[10:18], "big")
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    bits = ((packed >> 36) & 0x1F) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    info = {
+        "format": "FLAC",
+        "channels": channels,
+        "sample_rate": sample_rate,
+        "bits_per_sample": bits
+    }
+    if sample_rate and total_samples:
+        duration = total_samples / sample_rate
+        info["duration"] = duration
+        info["bitrate"] = int(file_size * 8 / duration)
+    return info
+
+def probe_audio_header(file_path: str) -> Optional[Dict[str, Any]]:
+    """Channels, sample rate, bit depth, bitrate and duration of a WAV or FLAC file."""
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        head = f.read(12)
+        if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+            return _wav_info(f, file_size)
+
+        # FLAC may sit behind an ID3v2 tag
+        offset = 0
+        if head[:3] == b"ID3" and len(head) >= 10:
+            offset = 10 + ((head[6] & 0x7F) << 21 | (head[7] & 0x7F) << 14 | (head[8] & 0x7F) << 7 | (head[9] & 0x7F))
+            f.seek(offset)
+            head = f.read(4)
+        if head[:4] == b"fLaC":
+            return _flac_info(f, file_size, offset)
+    return None
+
+def analyze_text_sample(file_path: str, sample_bytes: Optional[int] = TEXT_SAMPLE_BYTES) -> Dict[str, Any]:
+    """Text counts and CJK hints from the start of a UTF-8 file (all of it if sample_bytes is None).
+
+    Files larger than sample_bytes get counts scaled from the sample and
+    "sampled": True. Raises UnicodeDecodeError for non-UTF-8 content.
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        raw = f.read(-1 if sample_bytes is None else sample_bytes)
+    sampled = file_size > len(raw)
+
+    # A sample may end inside a multi-byte character; leave it pending.
+    # Newlines are translated as a text-mode read would
+    content = codecs.getincrementaldecoder("utf-8")().decode(raw, final=not sampled)
+    content = content.replace("\r\n", "\n").replace("\r", "\n")
+    scale = file_size / len(raw) if sampled and raw else 1.0
+
+    metadata = {
+        "character_count": round(len(content) * scale),
+        "word_count": round(len(content.split()) * scale),
+        "line_count": round(len(content.splitlines()) * scale),
+        "encoding": "utf-8"
+    }
+    if sampled:
+        metadata["sampled"] = True
+        metadata["sample_bytes"] = len(raw)
+
+    if content:
+        counts = [0, 0, 0, 0]
+        for match in _CJK.finditer(content):
+            counts[match.lastindex] += 1
+        total_chars = len(content)
+        metadata["language_hints"] = {
+            "chinese_ratio": counts[1] / total_chars,
+            "japanese_ratio": counts[2] / total_chars,
+            "korean_ratio": counts[3] / total_chars
+        }
+    return metadata
+
+def analyze_metadata(file_path: str, deep: bool = False) -> Dict[str, Any]:
+    """Analyze file metadata (header-only unless deep)."""
+    try:
+        stat = os.stat(file_path)
+        mime_type, _ = mimetypes.guess_type(file_path)
+        
+        metadata = {
+            "size": stat.st_size,
+            "created": stat.st_ctime,
+            "modified": stat.st_mtime,
+            "mime_type": mime_type,
+            "extension": os.path.splitext(file_path)[1].lower(),
+            "filename": os.path.basename(file_path),
+            "path": file_path,
+            "analysis": "deep" if deep else "header"
+        }
+        
+        # Additional analysis based on file type
+        if mime_type:
+            if mime_type.startswith("image/"):
+                metadata.update(analyze_image_metadata(file_path, deep))
+            elif mime_type.startswith("audio/"):
+                metadata.update(analyze_audio_metadata(file_path, deep))
+            elif mime_type.startswith("video/"):
+                metadata.update(analyze_video_metadata(file_path, deep))
+            elif mime_type.startswith("text/"):
+                metadata.update(analyze_text_metadata(file_path, deep))
+        
+        return metadata
+        
+    except Exception as e:
+        return {"error": str(e)}
+
+def image_dhash_metadata(file_path: str) -> Dict[str, Any]:
+    """Perceptual hash of an image (needs PIL to decode it)."""
+    try:
+        from PIL import Image
+        
+        with Image.open(file_path) as img:
+            return {"dhash": format_hash(image_dhash(img))}
+    except ImportError:
+        return {"pil_not_available": True}
+    except Exception as e:
+        return {"dhash_error": str(e)}
+
+def analyze_image_metadata(file_path: str, deep: bool = False) -> Dict[str, Any]:
+    """Analyze image metadata."""
+    metadata = {"type": "image"}
+    
+    # Header-only analysis never opens PIL: PNG/JPEG/GIF/WebP dimensions
+    # come from the header, other formats get none until a deep pass, and
+    # the perceptual hash is left to deep analysis or MediaEngine.hash_images
+    if not deep:
+        try:
+            header = probe_image_header(file_path)
+        except Exception as e:
+            header = None
+            metadata["header_probe_error"] = str(e)
+        if header:
+            metadata.update(header)
+        return metadata
+    
+    try:
+        # Try to get basic image info
+        from PIL import Image
+        
+        with Image.open(file_path) as img:
+            metadata.update({
+                "width": img.width,
+                "height": img.height,
+                "format": img.format,
+                "mode": img.mode
+            })
+            
+            # Calculate aspect ratio
+            if img.height > 0:
+                metadata["aspect_ratio"] = img.width / img.height
+            
+            # Perceptual hash for near-duplicate detection
+            try:
+                metadata["dhash"] = format_hash(image_dhash(img))
+            except Exception as e:
+                metadata["dhash_error"] = str(e)
+            
+    except ImportError:
+        metadata["pil_not_available"] = True
+    except Exception as e:
+        metadata["image_analysis_error"] = str(e)
+    
+    return metadata
+
+def analyze_audio_metadata(file_path: str, deep: bool = False) -> Dict[str, Any]:
+    """Analyze audio metadata."""
+    metadata = {"type": "audio"}
+    
+    # WAV and FLAC headers carry everything mutagen would report but tags
+    if not deep:
+        try:
+            header = probe_audio_header(file_path)
+        except Exception as e:
+            header = None
+            metadata["header_probe_error"] = str(e)
+        if header:
+            metadata.update(header)
+            return metadata
+    
+    try:
+        # Try to get audio info using mutagen
+        from mutagen import File
+        
+        audio_file = File(file_path)
+        if audio_file is not None:
+            metadata.update({
+                "duration": getattr(audio_file.info, 'length', None),
+                "bitrate": getattr(audio_file.info, 'bitrate', None),
+                "channels": getattr(audio_file.info, 'channels', None),
+                "sample_rate": getattr(audio_file.info, 'sample_rate', None)
+            })
+            
+            # Extract tags
+            if hasattr(audio_file, 'tags') and audio_file.tags:
+                tags = {}
+                for key, value in audio_file.tags.items():
+                    if isinstance(value, list) and value:
+                        tags[key] = str(value[0])
+                    else:
+                        tags[key] = str(value)
+                metadata["tags"] = tags
+    
+    except ImportError:
+        metadata["mutagen_not_available"] = True
+    except Exception as e:
+        metadata["audio_analysis_error"] = str(e)
+    
+    return metadata
+
+def analyze_video_metadata(file_path: str, deep: bool = False) -> Dict[str, Any]:
+    """Analyze video metadata."""
+    metadata = {"type": "video"}
+    
+    # Probing shells out to ffmpeg, so it only runs for deep analysis
+    if not deep:
+        return metadata
+    
+    try:
+        # Try to get video info using ffmpeg-python
+        import ffmpeg
+        
+        probe = ffmpeg.probe(file_path)
+        video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
+        audio_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'audio'), None)
+        
+        if video_stream:
+            metadata.update({
+                "width": int(video_stream.get('width', 0)),
+                "height": int(video_stream.get('height', 0)),
+                "duration": float(video_stream.get('duration', 0)),
+                "fps": eval(video_stream.get('r_frame_rate', '0/1')),
+                "codec": video_stream.get('codec_name'),
+                "bitrate": int(video_stream.get('bit_rate', 0))
+            })
+            
+            if metadata["height"] > 0:
+                metadata["aspect_ratio"] = metadata["width"] / metadata["height"]
+        
+        if audio_stream:
+            metadata.update({
+                "audio_codec": audio_stream.get('codec_name'),
+                "audio_bitrate": int(audio_stream.get('bit_rate', 0)),
+                "sample_rate": int(audio_stream.get('sample_rate', 0)),
+                "channels": int(audio_stream.get('channels', 0))
+            })
+    
+    except ImportError:
+        metadata["ffmpeg_not_available"] = True
+    except Exception as e:
+        metadata["video_analysis_error"] = str(e)
+    
+    return metadata
+
+def analyze_text_metadata(file_path: str, deep: bool = False) -> Dict[str, Any]:
+    """Analyze text metadata (the first TEXT_SAMPLE_BYTES unless deep)."""
+    metadata = {"type": "text"}
+    
+    try:
+        metadata.update(analyze_text_sample(file_path, None if deep else TEXT_SAMPLE_BYTES))
+    except Exception as e:
+        metadata["text_analysis_error"] = str(e)
+    
+    return metadata
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - Media Store
+SQLite persistence for the media registry.
+
+Each registry record is one row (id, JSON record), so registering, tagging
+or deleting a media item is a single-row upsert or delete instead of a
+rewrite of the whole registry. Batches are written in one transaction.
+The database runs in WAL mode; a legacy ``media_registry.json`` is imported
+the first time the database is created.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Any, Iterable, Optional
+
+class MediaStore:
+    """Media registry records in a single SQLite table."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS media (id TEXT PRIMARY KEY, record TEXT NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _row(record: Dict[str, Any]) -> tuple:
+        return record["id"], json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str)
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """All records keyed by id."""
+        registry = {}
+        with self._lock:
+            for media_id, record in self._connect().execute("SELECT id, record FROM media"):
+                try:
+                    registry[media_id] = json.loads(record)
+                except ValueError as e:
+                    print(f"[MediaStore] Skipping unreadable record {media_id}: {e}")
+        return registry
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM media").fetchone()[0]
+
+    def upsert_many(self, records: Iterable[Dict[str, Any]]) -> bool:
+        """Insert or replace records in one transaction."""
+        rows = [self._row(record) for record in records]
+        if not rows:
+            return True
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN")
+                conn.executemany("INSERT OR REPLACE INTO media (id, record) VALUES (?, ?)", rows)
+                conn.execute("COMMIT")
+                return True
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                print(f"[MediaStore] Failed to write {len(rows)} records: {e}")
+                return False
+
+    def upsert(self, record: Dict[str, Any]) -> bool:
+        """Insert or replace one record."""
+        return self.upsert_many([record])
+
+    def delete(self, media_id: str) -> bool:
+        """Delete one record."""
+        with self._lock:
+            try:
+                self._connect().execute("DELETE FROM media WHERE id = ?", (media_id,))
+                return True
+            except Exception as e:
+                print(f"[MediaStore] Failed to delete {media_id}: {e}")
+                return False
+
+    def replace_all(self, registry: Dict[str, Dict[str, Any]]) -> bool:
+        """Replace every record with registry, atomically."""
+        rows = [self._row({**record, "id": media_id}) for media_id, record in registry.items()]
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN")
+                conn.execute("DELETE FROM media")
+                conn.executemany("INSERT INTO media (id, record) VALUES (?, ?)", rows)
+                conn.execute("COMMIT")
+                return True
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                print(f"[MediaStore] Failed to replace registry: {e}")
+                return False
+
+    def import_json(self, json_path: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Upsert every record from a JSON registry (plain or export format); returns them."""
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[MediaStore] Failed to read {json_path}: {e}")
+            return None
+
+        if isinstance(data.get("registry"), dict):
+            data = data["registry"]
+        registry = {media_id: {**record, "id": media_id}
+                    for media_id, record in data.items() if isinstance(record, dict)}
+        if not self.upsert_many(registry.values()):
+            return None
+        return registry
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.db_path)
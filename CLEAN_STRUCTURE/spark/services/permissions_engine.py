@@ -4,19 +4,21 @@ EdenOS MCP Server Hub - Permissions Engine
 Single authoritative source for all permission, audit, and access control logic.
 """
 
-import json
 import os
 import time
 import uuid
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List
+from permissions_store import PermissionsStore
+
+# Memoized decisions are dropped wholesale past this many entries
+DECISION_CACHE_SIZE = 65536
+_MISS = object()
 
 class PermissionsEngine:
     """Single authority for permissions, audit, and access control."""
     
     def __init__(self, permissions_file: str = "permissions.json"):
         self.permissions_file = permissions_file
-        self._cache: Optional[Dict[str, Any]] = None
-        self._cache_timestamp = 0
         self.hub = None  # Nerve hook
         
         # Exclusion zones for file operations
@@ -25,6 +27,16 @@ class PermissionsEngine:
             r"C:\Program Files", 
             r"C:\Program Files (x86)",
         ]
+        
+        # In-memory permissions document, persisted through a write-ahead log
+        self._store = PermissionsStore(permissions_file, self._default_permissions)
+        
+        # Decision cache, valid for one policy generation
+        self.policy_generation = 0
+        self._decisions: Dict[tuple, bool] = {}
+        self._decisions_generation = 0
+        self._decision_hits = 0
+        self._decision_misses = 0
     
     def _make_id(self) -> str:
         """Generate unique ID."""
@@ -42,81 +54,86 @@ class PermissionsEngine:
         
         # React to relevant events
         if event_type == "agent.trust.changed":
-            self._audit("trust_change_reacted", {"agent": payload.get("agent_id"), "level": payload.get("level")})
+            self.audit("trust_change_reacted", {"agent": payload.get("agent_id"), "level": payload.get("level")})
         elif event_type == "filesystem.deleted":
-            self._audit("file_deletion_noted", {"path": payload.get("path")})
+            self.audit("file_deletion_noted", {"path": payload.get("path")})
         elif event_type == "chaos.file.created":
-            self._audit("chaos_creation_noted", {"filename": payload.get("filename")})
+            self.audit("chaos_creation_noted", {"filename": payload.get("filename")})
+    
+    def _default_permissions(self) -> Dict[str, Any]:
+        """Empty permissions document."""
+        return {
+            "permissions": {},
+            "requests": {},
+            "audit": [],
+            "allowed_paths": [],
+            "exclusion_zones": self.exclusion_zones
+        }
     
     def _load_permissions(self) -> Dict[str, Any]:
-        """Load permissions from file with caching."""
-        current_time = time.time()
-        
-        # Cache for 5 seconds to avoid excessive file reads
-        if self._cache and (current_time - self._cache_timestamp) < 5:
-            return self._cache
-        
+        """Get the in-memory permissions document (loaded from disk once)."""
         try:
-            if os.path.exists(self.permissions_file):
-                with open(self.permissions_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-            else:
-                data = {
-                    "permissions": {},
-                    "requests": {}, 
-                    "audit": [],
-                    "allowed_paths": [],
-                    "exclusion_zones": self.exclusion_zones
-                }
-                self._save_permissions(data)
-            
-            self._cache = data
-            self._cache_timestamp = current_time
-            return data
-            
-        except Exception:
+            return self._store.load()
+        except Exception as e:
+            print(f"[PermissionsEngine] Failed to load permissions: {e}")
             # Fallback to safe defaults
-            self._cache = {
-                "permissions": {},
-                "requests": {},
-                "audit": [],
-                "allowed_paths": [],
-                "exclusion_zones": self.exclusion_zones
-            }
-            self._cache_timestamp = current_time
-            return self._cache
+            return self._default_permissions()
     
-    def _save_permissions(self, data: Dict[str, Any]) -> bool:
-        """Save permissions to file."""
+    def _record(self, op: str, **fields) -> bool:
+        """Apply a mutation to the permissions document and log it."""
         try:
-            with open(self.permissions_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-            
-            # Invalidate cache
-            self._cache = None
-            self._cache_timestamp = 0
+            self._store.append({"op": op, **fields})
+            if op != "audit":
+                self.policy_generation += 1
             return True
-            
         except Exception as e:
             print(f"[PermissionsEngine] Failed to save permissions: {e}")
             return False
     
+    def reload_permissions(self) -> Dict[str, Any]:
+        """Re-read permissions from disk, e.g. after editing the file by hand."""
+        data = self._store.reload()
+        self.policy_generation += 1
+        return data
+    
+    def _cached_decision(self, key: tuple, decide) -> bool:
+        """Look up a memoized decision, computing it on a miss."""
+        if self._decisions_generation != self.policy_generation:
+            self._decisions.clear()
+            self._decisions_generation = self.policy_generation
+        
+        allowed = self._decisions.get(key, _MISS)
+        if allowed is not _MISS:
+            self._decision_hits += 1
+            return allowed
+        
+        self._decision_misses += 1
+        allowed = decide()
+        if len(self._decisions) >= DECISION_CACHE_SIZE:
+            self._decisions.clear()
+        self._decisions[key] = allowed
+        return allowed
+    
+    def get_decision_cache_stats(self) -> Dict[str, Any]:
+        """Decision cache hit/miss counters."""
+        lookups = self._decision_hits + self._decision_misses
+        return {
+            "hits": self._decision_hits,
+            "misses": self._decision_misses,
+            "hit_rate": self._decision_hits / lookups if lookups else 0.0,
+            "entries": len(self._decisions),
+            "generation": self.policy_generation
+        }
+    
     def audit(self, event_type: str, details: Dict[str, Any]) -> bool:
         """Append an audit entry to permissions store."""
-        try:
-            data = self._load_permissions()
-            entry = {
-                "id": self._make_id(),
-                "event": event_type,
-                "details": details,
-                "ts": time.time(),
-            }
-            data.setdefault("audit", []).append(entry)
-            return self._save_permissions(data)
-            
-        except Exception as e:
-            print(f"[PermissionsEngine] Audit failed: {e}")
-            return False
+        entry = {
+            "id": self._make_id(),
+            "event": event_type,
+            "details": details,
+            "ts": time.time(),
+        }
+        return self._record("audit", entry=entry)
     
     def is_excluded(self, path: str) -> bool:
         """Check if path is in exclusion zones."""
@@ -134,23 +151,23 @@ class PermissionsEngine:
         if not path:
             return False
         
-        if self.is_excluded(path):
-            return False
-        
         try:
-            data = self._load_permissions()
-            allowed_paths = data.get("allowed_paths", [])
-            
-            for allowed_path in allowed_paths:
-                if os.path.abspath(path).startswith(os.path.abspath(allowed_path)):
-                    return True
-            
-            return False
-            
+            normalized = os.path.abspath(path)
+            return self._cached_decision(("path", normalized), lambda: self._evaluate_path(normalized))
         except Exception as e:
             print(f"[PermissionsEngine] Path check failed: {e}")
             return False
     
+    def _evaluate_path(self, normalized: str) -> bool:
+        if self.is_excluded(normalized):
+            return False
+        
+        data = self._load_permissions()
+        for allowed_path in data.get("allowed_paths", []):
+            if normalized.startswith(os.path.abspath(allowed_path)):
+                return True
+        return False
+    
     def add_allowed_path(self, path: str) -> bool:
         """Add a path to the allowed paths list."""
         if not path or not os.path.exists(path):
@@ -158,12 +175,11 @@ class PermissionsEngine:
         
         try:
             data = self._load_permissions()
-            allowed_paths = data.setdefault("allowed_paths", [])
+            allowed_paths = data.get("allowed_paths", [])
             abs_path = os.path.abspath(path)
             
             if abs_path not in allowed_paths:
-                allowed_paths.append(abs_path)
-                success = self._save_permissions(data)
+                success = self._record("add_path", path=abs_path)
                 
                 if success:
                     self.audit("path_allowed", {"path": path})
@@ -187,8 +203,7 @@ class PermissionsEngine:
             abs_path = os.path.abspath(path)
             
             if abs_path in allowed_paths:
-                allowed_paths.remove(abs_path)
-                success = self._save_permissions(data)
+                success = self._record("remove_path", path=abs_path)
                 
                 if success:
                     self.audit("path_removed", {"path": path})
@@ -213,10 +228,12 @@ class PermissionsEngine:
     def get_audit_log(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get recent audit entries."""
         try:
+            if limit <= 0:
+                return []
             data = self._load_permissions()
             audit = data.get("audit", [])
-            # Return most recent entries first
-            return sorted(audit, key=lambda x: x.get("ts", 0), reverse=True)[:limit]
+            # Entries are appended in time order; return most recent first
+            return audit[-limit:][::-1]
         except Exception as e:
             print(f"[PermissionsEngine] Failed to get audit log: {e}")
             return []
@@ -224,16 +241,10 @@ class PermissionsEngine:
     def set_permission(self, entity: str, resource: str, action: str, allowed: bool) -> bool:
         """Set a specific permission."""
         try:
-            data = self._load_permissions()
-            permissions = data.setdefault("permissions", {})
-            
-            entity_perms = permissions.setdefault(entity, {})
-            entity_perms[f"{resource}:{action}"] = allowed
-            
-            success = self._save_permissions(data)
+            success = self._record("set_permission", entity=entity, key=f"{resource}:{action}", allowed=allowed)
             
             if success:
-                self._audit("permission_set", {
+                self.audit("permission_set", {
                     "entity": entity,
                     "resource": resource,
                     "action": action,
@@ -258,12 +269,10 @@ class PermissionsEngine:
     def check_permission(self, entity: str, resource: str, action: str) -> bool:
         """Check a specific permission."""
         try:
-            data = self._load_permissions()
-            permissions = data.get("permissions", {})
-            
-            entity_perms = permissions.get(entity, {})
-            return entity_perms.get(f"{resource}:{action}", False)
-            
+            return self._cached_decision(
+                ("permission", entity, resource, action),
+                lambda: self._load_permissions().get("permissions", {}).get(entity, {}).get(f"{resource}:{action}", False)
+            )
         except Exception as e:
             print(f"[PermissionsEngine] Failed to check permission: {e}")
             return False
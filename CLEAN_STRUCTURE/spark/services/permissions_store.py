@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - Permissions Store
+Write-ahead log plus snapshot persistence for the permissions document.
+
+Mutations are applied to the in-memory document and appended to
+``<permissions_file>.wal`` as one sequence-numbered JSON record per line,
+fsynced before append() returns.
+A background timer compacts: the document is serialized and the log
+rotated to ``.wal.1`` under the lock, then the snapshot is written (temp
+file + ``os.replace``) off the lock. The snapshot stores the last sequence
+number it covers, so loading replays only newer records from ``.wal.1``
+and ``.wal`` and a crash at any point neither loses nor repeats a record.
+
+The audit list keeps only the newest AUDIT_MAX_ENTRIES entries.
+"""
+
+import atexit
+import json
+import os
+import threading
+from typing import Dict, Any, Callable, Optional
+
+AUDIT_MAX_ENTRIES = 10000
+
+def open_log(path: str):
+    """Open a line log for appending, terminating any torn last line first."""
+    log = open(path, "a+", encoding="utf-8")
+    if log.tell():
+        log.seek(log.tell() - 1)
+        if log.read(1) != "\n":
+            log.write("\n")
+    return log
+
+class PermissionsStore:
+    """In-memory permissions document backed by a snapshot and a WAL."""
+
+    def __init__(self, permissions_file: str, defaults: Callable[[], Dict[str, Any]],
+                 compact_interval: float = 5.0, compact_records: int = 1000,
+                 audit_max_entries: int = AUDIT_MAX_ENTRIES):
+        self.permissions_file = permissions_file
+        self.wal_file = permissions_file + ".wal"
+        self.rotated_wal_file = self.wal_file + ".1"
+        self.defaults = defaults
+        self.compact_interval = compact_interval
+        self.compact_records = compact_records
+        self.audit_max_entries = audit_max_entries
+
+        self.data: Optional[Dict[str, Any]] = None
+        self._lock = threading.RLock()
+        self._wal = None
+        self._timer: Optional[threading.Timer] = None
+        self._pending = 0
+        self._seq = 0
+        # Serializes snapshot writes; always taken before self._lock, and
+        # compact() is never called with self._lock held
+        self._compact_lock = threading.Lock()
+
+        atexit.register(self.close)
+
+    def load(self) -> Dict[str, Any]:
+        """Load the snapshot and replay the WAL (once; later calls are free)."""
+        if self.data is not None:
+            return self.data
+
+        with self._lock:
+            if self.data is not None:
+                return self.data
+
+            data = self.defaults()
+            if os.path.exists(self.permissions_file):
+                try:
+                    with open(self.permissions_file, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except Exception as e:
+                    print(f"[PermissionsStore] Failed to load snapshot: {e}")
+            # Snapshots written before the cap may hold more
+            if len(data.get("audit", [])) > self.audit_max_entries:
+                data["audit"] = data["audit"][-self.audit_max_entries:]
+
+            self._seq = data.pop("wal_seq", 0)
+            replayed = 0
+            for wal_file in (self.rotated_wal_file, self.wal_file):
+                if not os.path.exists(wal_file):
+                    continue
+                with open(wal_file, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            # Torn record from a crash; it was never applied
+                            continue
+                        if record.get("seq", 0) <= self._seq:
+                            continue
+                        self._apply(data, record)
+                        self._seq = record["seq"]
+                        replayed += 1
+
+            self.data = data
+            if replayed or not os.path.exists(self.permissions_file):
+                self._schedule(0)
+            return data
+
+    def reload(self) -> Dict[str, Any]:
+        """Drop the in-memory document and load it again from disk."""
+        self.compact()
+        with self._lock:
+            self.data = None
+            return self.load()
+
+    def _apply(self, data: Dict[str, Any], record: Dict[str, Any]):
+        op = record["op"]
+        if op == "audit":
+            audit = data.setdefault("audit", [])
+            audit.append(record["entry"])
+            # Trim in steps of a tenth so the cap costs O(1) per entry
+            if len(audit) > self.audit_max_entries + self.audit_max_entries // 10:
+                del audit[:len(audit) - self.audit_max_entries]
+        elif op == "set_permission":
+            data.setdefault("permissions", {}).setdefault(record["entity"], {})[record["key"]] = record["allowed"]
+        elif op == "add_path":
+            allowed_paths = data.setdefault("allowed_paths", [])
+            if record["path"] not in allowed_paths:
+                allowed_paths.append(record["path"])
+        elif op == "remove_path":
+            allowed_paths = data.setdefault("allowed_paths", [])
+            if record["path"] in allowed_paths:
+                allowed_paths.remove(record["path"])
+
+    def append(self, record: Dict[str, Any]):
+        """Apply a mutation record and write it ahead to the log."""
+        with self._lock:
+            data = self.load()
+            self._seq += 1
+            record["seq"] = self._seq
+            line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+            if self._wal is None:
+                self._wal = open_log(self.wal_file)
+            self._wal.write(line)
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+            self._apply(data, record)
+            self._pending += 1
+
+            if self._pending >= self.compact_records:
+                self._schedule(0)
+            elif self._timer is None:
+                self._schedule(self.compact_interval)
+
+    def _schedule(self, delay: float):
+        # Callers hold self._lock, so compact() must only ever run on the timer
+        if self._timer is not None:
+            if delay:
+                return
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self.compact)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def compact(self) -> bool:
+        """Fold the WAL into a new snapshot."""
+        with self._compact_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if self.data is None:
+                    return True
+
+                try:
+                    snapshot = json.dumps({**self.data, "wal_seq": self._seq}, default=str)
+                    if self._wal is not None:
+                        self._wal.close()
+                        self._wal = None
+                    if os.path.exists(self.wal_file):
+                        if os.path.exists(self.rotated_wal_file):
+                            # A previous snapshot write failed; keep its records too
+                            with open(self.wal_file, "r", encoding="utf-8") as src, \
+                                    open_log(self.rotated_wal_file) as dst:
+                                dst.write(src.read())
+                            os.remove(self.wal_file)
+                        else:
+                            os.replace(self.wal_file, self.rotated_wal_file)
+                except Exception as e:
+                    print(f"[PermissionsStore] Failed to compact: {e}")
+                    return False
+                self._pending = 0
+
+            # Appends continue into a fresh .wal while the snapshot is written
+            tmp_path = f"{self.permissions_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(snapshot)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.permissions_file)
+                try:
+                    os.remove(self.rotated_wal_file)
+                except FileNotFoundError:
+                    pass
+                return True
+            except Exception as e:
+                print(f"[PermissionsStore] Failed to compact: {e}")
+                return False
+
+    def close(self):
+        """Compact pending records and release the log file."""
+        if self._pending:
+            self.compact()
+        with self._lock:
+            if self._wal is not None:
+                self._wal.close()
+                self._wal = None
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+EdenOS MCP Server Hub - Rate Limiter
+Token buckets keyed by (agent, resource class).
+
+A bucket holds up to ``burst`` tokens and refills at ``rate`` tokens per
+second; each call takes one token. Buckets refill lazily from a monotonic
+clock when they are touched, so an idle agent costs nothing and a
+rejection is a dict lookup, a little arithmetic and a counter increment.
+"""
+
+import threading
+import time
+from typing import Dict, Any, Callable, Optional, Tuple
+
+# (rate in tokens per second, burst capacity); None means unlimited
+Limit = Optional[Tuple[float, float]]
+
+# Buckets are dropped wholesale past this many keys
+MAX_BUCKETS = 65536
+
+class TokenBucket:
+    """A single token bucket."""
+
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = now
+
+    def take(self, now: float) -> float:
+        """Take a token; returns 0.0 on success, else seconds until one is available."""
+        tokens = self.tokens + (now - self.stamp) * self.rate
+        if tokens > self.burst:
+            tokens = self.burst
+        self.stamp = now
+        if tokens >= 1.0:
+            self.tokens = tokens - 1.0
+            return 0.0
+        self.tokens = tokens
+        return (1.0 - tokens) / self.rate if self.rate > 0 else float("inf")
+
+class RateLimiter:
+    """Per-key token buckets whose limits come from a lookup callable."""
+
+    def __init__(self, limit_for: Callable[[str, str], Limit]):
+        # limit_for(agent_id, resource_class) -> (rate, burst) or None
+        self.limit_for = limit_for
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._allowed: Dict[str, int] = {}
+        self._rejected: Dict[str, int] = {}
+        self._rejected_by_agent: Dict[str, int] = {}
+
+    def acquire(self, agent_id: str, resource_class: str) -> float:
+        """Take a token for agent_id; returns 0.0 if allowed, else retry-after seconds."""
+        key = (agent_id, resource_class)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                limit = self.limit_for(agent_id, resource_class)
+                if limit is None:
+                    self._allowed[resource_class] = self._allowed.get(resource_class, 0) + 1
+                    return 0.0
+                if len(self._buckets) >= MAX_BUCKETS:
+                    self._buckets.clear()
+                bucket = self._buckets[key] = TokenBucket(limit[0], limit[1], now)
+
+            retry_after = bucket.take(now)
+            if retry_after:
+                self._rejected[resource_class] = self._rejected.get(resource_class, 0) + 1
+                self._rejected_by_agent[agent_id] = self._rejected_by_agent.get(agent_id, 0) + 1
+            else:
+                self._allowed[resource_class] = self._allowed.get(resource_class, 0) + 1
+            return retry_after
+
+    def reset(self, agent_id: Optional[str] = None):
+        """Drop buckets (one agent's, or all) so they pick up current limits."""
+        with self._lock:
+            if agent_id is None:
+                self._buckets.clear()
+            else:
+                for key in [key for key in self._buckets if key[0] == agent_id]:
+                    del self._buckets[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Allowed/rejected counters per resource class and rejections per agent."""
+        with self._lock:
+            return {
+                "allowed": dict(self._allowed),
+                "rejected": dict(self._rejected),
+                "rejected_by_agent": dict(self._rejected_by_agent),
+                "total_allowed": sum(self._allowed.values()),
+                "total_rejected": sum(self._rejected.values()),
+                "buckets": len(self._buckets)
+            }
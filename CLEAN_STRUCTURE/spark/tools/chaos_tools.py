@@ -1,14 +1,41 @@
 # chaos_tools.py
 
+import importlib.util
+import os
+import sys
 from . import eden_tool, TextContent, JsonContent
 from typing import Dict, Any
 
+# Shared CHAOS parser from the spark services
+CHAOS_TOKENIZER_PATH = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "services", "chaos", "tokenizer.py"))
+CHAOS_TOKENIZER_MODULE = "eden_spark_chaos_tokenizer"
+
+def _load_chaos_tokenizer(path):
+    """Load the spark CHAOS tokenizer from its file under a private module name.
+
+    Nothing is added to sys.path, so the spark services can neither shadow
+    nor be shadowed by a top-level ``chaos`` module.
+    """
+    module = sys.modules.get(CHAOS_TOKENIZER_MODULE)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(CHAOS_TOKENIZER_MODULE, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[CHAOS_TOKENIZER_MODULE] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[CHAOS_TOKENIZER_MODULE]
+            raise
+    return module
+
+parse_document = _load_chaos_tokenizer(CHAOS_TOKENIZER_PATH).parse_document
+
 @eden_tool()
 def chaos_inspect(text: str):
     """
     Basic CHAOS diagnostic tool.
     Returns structural clues, tag counts, and metadata.
-    This is a staging version until the real parser is plugged in.
     """
     lines = text.splitlines()
     length = len(text)
@@ -20,12 +47,22 @@ def chaos_inspect(text: str):
             tag = line.strip().split("]")[0] + "]"
             tag_counts[tag] = tag_counts.get(tag, 0) + 1
 
+    parsed = parse_document(text)
+    emotive = parsed["emotive_layer"]
+
     return [JsonContent(
         type="json",
         data={
             "length": length,
             "lines": num_lines,
             "tags_detected": tag_counts,
+            "structure": {
+                "core_keys": list(parsed["structured_core"]),
+                "emotions": len(emotive["emotions"]),
+                "symbols": len(emotive["symbols"]),
+                "relationships": len(emotive["relationships"]),
+                "chaosfield_chars": len(parsed["chaosfield_layer"])
+            },
             "preview": text[:300]
         }
     )]
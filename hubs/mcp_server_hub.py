@@ -13,6 +13,7 @@ Author: Cascade AI Assistant
 """
 
 import datetime
+import importlib.util
 import json
 import os
 import random
@@ -28,6 +29,31 @@ import zipfile
 
 from mcp.server.fastmcp import FastMCP
 
+# The CHAOS parser is shared with the spark services
+SPARK_SERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "CLEAN_STRUCTURE", "spark", "services")
+CHAOS_TOKENIZER_MODULE = "eden_spark_chaos_tokenizer"
+
+def _load_chaos_tokenizer(path):
+    """Load the spark CHAOS tokenizer from its file under a private module name.
+
+    Nothing is added to sys.path, so the spark services can neither shadow
+    nor be shadowed by a top-level ``chaos`` module.
+    """
+    module = sys.modules.get(CHAOS_TOKENIZER_MODULE)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(CHAOS_TOKENIZER_MODULE, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[CHAOS_TOKENIZER_MODULE] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[CHAOS_TOKENIZER_MODULE]
+            raise
+    return module
+
+parse_document = _load_chaos_tokenizer(
+    os.path.normpath(os.path.join(SPARK_SERVICES_DIR, "chaos", "tokenizer.py"))).parse_document
+
 # Initialize FastMCP server
 server = FastMCP("eden-mcp-server-hub")
 
@@ -141,67 +167,133 @@ def save_context(context):
     with open(CONTEXT_FILE, "w", encoding="utf-8") as f:
         json.dump(context, f, indent=2)
 
-# CHAOS Processing Helpers
-def parse_chaos_file(content):
-    """Simple parser for CHAOS files."""
-    result = {
-        "structured_core": {},
-        "emotive_layer": {
-            "emotions": [],
-            "symbols": [],
-            "relationships": []
-        },
-        "chaosfield_layer": ""
-    }
+# Per-window symbol posting lists: window_id -> {"size", "last_id", "postings"}.
+# Positions are entry offsets into window["content"], so each posting list is
+# a sorted int array and stays valid while the window is only appended to.
+_symbol_indexes = {}
+
+def _window_symbol_index(window, content=None):
+    """Return the symbol -> sorted entry-position postings for a window."""
+    if content is None:
+        content = window["content"]
+
+    # Views are recomputed from their sources, so their positions can shift
+    if window.get("view"):
+        postings = {}
+        for position, entry in enumerate(content):
+            for symbol in set(entry.get("symbols") or []):
+                postings.setdefault(symbol, []).append(position)
+        return postings
+
+    cached = _symbol_indexes.get(window["id"])
+
+    # Reuse the cached postings if the window has only grown since we built them
+    start = 0
+    if cached and 0 < cached["size"] <= len(content) and content[cached["size"] - 1]["id"] == cached["last_id"]:
+        start = cached["size"]
+        postings = cached["postings"]
+    else:
+        postings = {}
 
-    lines = content.strip().split('\n')
-    current_section = "structured_core"
+    for position in range(start, len(content)):
+        for symbol in set(content[position].get("symbols") or []):
+            postings.setdefault(symbol, []).append(position)
 
-    for line in lines:
-        line = line.strip()
-        if not line:
+    _symbol_indexes[window["id"]] = {
+        "size": len(content),
+        "last_id": content[-1]["id"] if content else None,
+        "postings": postings
+    }
+    return postings
+
+def _match_symbol_positions(postings, symbols, match="any"):
+    """Resolve a symbol filter to entry positions, newest first."""
+    lists = [postings.get(s, []) for s in symbols]
+    if match == "all":
+        # Intersect starting from the rarest symbol
+        lists.sort(key=len)
+        hits = set(lists[0])
+        for positions in lists[1:]:
+            if not hits:
+                break
+            hits.intersection_update(positions)
+    else:
+        hits = set().union(*lists)
+    return sorted(hits, reverse=True)
+
+# Window merge engine
+MERGE_STRATEGIES = ("union", "intersection", "difference", "dedup")
+
+def _entry_digest(entry):
+    """Content digest used to compare entries across windows."""
+    digest = entry.get("digest")
+    if not digest:
+        payload = f"{entry.get('type', '')}\x00{entry.get('content', '')}"
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return digest
+
+def _merge_entries(sources, strategy="union"):
+    """Merge lists of window entries in O(total entries).
+
+    union keeps every entry once by id, dedup keeps one entry per content
+    digest, intersection keeps first-source entries whose digest occurs in
+    every source, and difference keeps first-source entries whose digest
+    occurs in no other source.
+    """
+    if strategy not in MERGE_STRATEGIES:
+        raise ValueError(f"Unknown merge strategy: {strategy}")
+    if not sources:
+        return []
+
+    merged = []
+    seen = set()
+
+    if strategy in ("union", "dedup"):
+        key = (lambda e: e["id"]) if strategy == "union" else _entry_digest
+        for entries in sources:
+            for entry in entries:
+                k = key(entry)
+                if k not in seen:
+                    seen.add(k)
+                    merged.append(entry)
+        return merged
+
+    other_digests = [{_entry_digest(e) for e in entries} for entries in sources[1:]]
+    for entry in sources[0]:
+        digest = _entry_digest(entry)
+        if digest in seen:
             continue
+        if strategy == "intersection":
+            keep = all(digest in digests for digests in other_digests)
+        else:
+            keep = not any(digest in digests for digests in other_digests)
+        if keep:
+            seen.add(digest)
+            merged.append(entry)
+    return merged
+
+def _window_content(context, window, _resolving=None):
+    """Return a window's entries, resolving lazy merged views."""
+    view = window.get("view")
+    if not view:
+        return window["content"]
+
+    # Guard against views that (indirectly) reference themselves
+    resolving = _resolving or set()
+    if window["id"] in resolving:
+        return []
+    resolving = resolving | {window["id"]}
+
+    sources = [
+        _window_content(context, context["windows"][sid], resolving)
+        for sid in view["sources"] if sid in context["windows"]
+    ]
+    return _merge_entries(sources, view.get("strategy", "union"))
 
-        if line.startswith('[EMOTION:'):
-            current_section = "emotive_layer"
-            parts = line.strip('[]').split(':')
-            if len(parts) >= 3:
-                result["emotive_layer"]["emotions"].append({
-                    "type": parts[1],
-                    "intensity": parts[2]
-                })
-        elif line.startswith('[SYMBOL:'):
-            current_section = "emotive_layer"
-            parts = line.strip('[]').split(':')
-            if len(parts) >= 3:
-                result["emotive_layer"]["symbols"].append({
-                    "type": parts[1],
-                    "presence": parts[2]
-                })
-        elif line.startswith('[RELATIONSHIP:'):
-            current_section = "emotive_layer"
-            parts = line.strip('[]').split(':')
-            if len(parts) >= 4:
-                result["emotive_layer"]["relationships"].append({
-                    "source": parts[1],
-                    "type": parts[2],
-                    "target": parts[3]
-                })
-        elif line.startswith('{'):
-            current_section = "chaosfield_layer"
-            chaosfield_content = []
-            chaosfield_index = lines.index(line)
-            for i in range(chaosfield_index + 1, len(lines)):
-                if lines[i].strip().startswith('}'):
-                    break
-                chaosfield_content.append(lines[i].strip())
-            result["chaosfield_layer"] = "\n".join(chaosfield_content)
-        elif line.startswith('[') and ']:' in line and current_section == "structured_core":
-            key = line[1:line.index(']')]
-            value = line[line.index(']:') + 2:].strip()
-            result["structured_core"][key] = value
-
-    return result
+# CHAOS Processing Helpers
+def parse_chaos_file(content):
+    """Parse a CHAOS file with the shared spark CHAOS parser."""
+    return parse_document(content)
 
 def analyze_emotions(emotions):
     if not emotions:
@@ -431,19 +523,35 @@ async def add_context(content: str, type: str, window_id: str = None, symbols: L
         "symbols": symbols,
         "timestamp": datetime.datetime.now().isoformat()
     }
+    context_entry["digest"] = _entry_digest(context_entry)
 
-    context["windows"][target_window_id]["content"].append(context_entry)
-    context["windows"][target_window_id]["lastModified"] = datetime.datetime.now().isoformat()
+    window = context["windows"][target_window_id]
+    if window.get("view"):
+        # Writing to a merged view materializes it first
+        window["content"] = list(_window_content(context, window))
+        del window["view"]
+
+    window["content"].append(context_entry)
+    window["lastModified"] = datetime.datetime.now().isoformat()
     save_context(context)
 
     return f"Added {type} context to window {target_window_id}"
 
 @server.tool()
-async def query_context(query: str, window_id: str = None, symbols: List[str] = None, limit: int = 10) -> str:
-    """Query context windows with symbolic reasoning."""
+async def query_context(query: str, window_id: str = None, symbols: List[str] = None, limit: int = 10,
+                        match: str = "any", cursor: int = None) -> str:
+    """Query context windows with symbolic reasoning.
+
+    Symbol filters use the window's posting index; ``match`` is "any" (OR) or
+    "all" (AND). Results are newest first; pass the returned ``next_cursor``
+    back as ``cursor`` to fetch the next page.
+    """
     if symbols is None:
         symbols = []
 
+    if match not in ("any", "all"):
+        return "Invalid match mode (expected 'any' or 'all')"
+
     context = load_context()
     target_window_id = window_id or context.get("activeWindow")
 
@@ -451,21 +559,37 @@ async def query_context(query: str, window_id: str = None, symbols: List[str] =
         return "Invalid window ID"
 
     window = context["windows"][target_window_id]
-    results = window["content"]
+    content = _window_content(context, window)
+
+    # Resume below the cursor without walking the newer entries
+    end = len(content) if cursor is None else max(0, min(cursor, len(content)))
 
     # Filter by symbols if provided
     if symbols:
-        results = [item for item in results if any(s in item["symbols"] for s in symbols)]
+        positions = _match_symbol_positions(_window_symbol_index(window, content), symbols, match)
+        if end < len(content):
+            positions = [p for p in positions if p < end]
+    else:
+        positions = range(end - 1, -1, -1)
 
-    # Simple text search
-    if query:
-        query_lower = query.lower()
-        results = [item for item in results if query_lower in item["content"].lower()]
+    query_lower = query.lower() if query else None
+    results = []
+    last_position = None
+    next_cursor = None
 
-    # Limit results
-    results = results[:limit]
+    for position in positions:
+        item = content[position]
+        # Simple text search
+        if query_lower and query_lower not in item["content"].lower():
+            continue
+        # Only hand out a cursor when another match actually exists
+        if len(results) >= limit:
+            next_cursor = last_position
+            break
+        results.append(item)
+        last_position = position
 
-    return json.dumps(results, indent=2)
+    return json.dumps({"results": results, "next_cursor": next_cursor}, indent=2)
 
 @server.tool()
 async def list_windows() -> str:
@@ -478,10 +602,11 @@ async def list_windows() -> str:
             "name": window["name"],
             "description": window["description"],
             "symbols": window["symbols"],
-            "contentCount": len(window["content"]),
+            "contentCount": len(_window_content(context, window)),
             "created": window["created"],
             "lastModified": window["lastModified"],
-            "isActive": window["id"] == context.get("activeWindow")
+            "isActive": window["id"] == context.get("activeWindow"),
+            "isView": bool(window.get("view"))
         })
 
     return json.dumps(windows, indent=2)
@@ -501,8 +626,16 @@ async def set_active_window(window_id: str) -> str:
     return f"Set active window to: {window['name']} ({window_id})"
 
 @server.tool()
-async def merge_windows(source_windows: List[str], target_window: str, strategy: str = "union") -> str:
-    """Merge multiple context windows with symbolic reasoning."""
+async def merge_windows(source_windows: List[str], target_window: str, strategy: str = "union", lazy: bool = False) -> str:
+    """Merge multiple context windows with symbolic reasoning.
+
+    Strategies: union, intersection, difference (first source minus the
+    rest) and dedup (union deduplicated by content digest). With ``lazy``
+    the merged window is stored as a view over its sources instead of a copy.
+    """
+    if strategy not in MERGE_STRATEGIES:
+        return f"Invalid merge strategy '{strategy}' (expected one of: {', '.join(MERGE_STRATEGIES)})"
+
     context = load_context()
 
     # Validate source windows exist
@@ -511,36 +644,34 @@ async def merge_windows(source_windows: List[str], target_window: str, strategy:
         return "No valid source windows found"
 
     new_window_id = _make_id()
-    merged_content = []
     merged_symbols = set()
 
-    # Collect content and symbols
+    # Collect symbols
     for source_id in valid_sources:
-        source = context["windows"][source_id]
-        merged_content.extend(source["content"])
-        merged_symbols.update(source["symbols"])
-
-    # Apply merge strategy
-    if strategy == "intersection":
-        # Find common content across all windows
-        source_contents = [set(w["content"] for w in context["windows"][sid]["content"]) for sid in valid_sources]
-        merged_content = [item for item in merged_content if all(item["id"] in sc for sc in source_contents)]
+        merged_symbols.update(context["windows"][source_id]["symbols"])
 
     new_window = {
         "id": new_window_id,
         "name": target_window,
         "description": f"Merged window from {len(valid_sources)} sources using {strategy} strategy",
         "symbols": list(merged_symbols),
-        "content": merged_content,
+        "content": [],
         "created": datetime.datetime.now().isoformat(),
         "lastModified": datetime.datetime.now().isoformat()
     }
 
+    if lazy:
+        new_window["view"] = {"sources": valid_sources, "strategy": strategy}
+    else:
+        sources = [_window_content(context, context["windows"][sid]) for sid in valid_sources]
+        new_window["content"] = _merge_entries(sources, strategy)
+
     context["windows"][new_window_id] = new_window
     context["activeWindow"] = new_window_id
     save_context(context)
 
-    return f"Created merged window '{target_window}' with ID: {new_window_id}"
+    kind = "view" if lazy else "window"
+    return f"Created merged {kind} '{target_window}' with ID: {new_window_id}"
 
 # CHAOS Tools
 @server.tool()